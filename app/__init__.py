@@ -1 +0,0 @@
-from app.main import app
\ No newline at end of file
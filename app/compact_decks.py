@@ -0,0 +1,50 @@
+"""
+Remove stored decks that have the same cards as an older deck.
+
+Decks are compared by fingerprint; fingerprints missing from decks stored before they existed
+are filled in first. The oldest deck of each group is kept.
+
+    python -m app.compact_decks --dry-run
+"""
+
+import argparse
+import asyncio
+import json
+
+from app.config import setup_logging
+from app.database import apply_schema, get_db, migrate_db
+from app.services.decks import compact_duplicate_decks
+
+
+async def compact(dry_run: bool) -> dict:
+    conn = await get_db()
+    try:
+        await apply_schema(conn)
+        await migrate_db(conn)
+        cursor = await conn.execute("SELECT COUNT(*) FROM decks")
+        (decks_before,) = await cursor.fetchone()
+        duplicate_ids = await compact_duplicate_decks(conn, dry_run=dry_run)
+        if not dry_run and duplicate_ids:
+            await conn.execute("VACUUM")
+    finally:
+        await conn.close()
+
+    return {
+        "dry_run": dry_run,
+        "decks": decks_before,
+        "duplicates": len(duplicate_ids),
+        "duplicate_ids": duplicate_ids[:100],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="Only report the duplicates")
+    args = parser.parse_args()
+    setup_logging()
+
+    print(json.dumps(asyncio.run(compact(args.dry_run))))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,17 @@
 from pathlib import Path
 import os
+import atexit
 import logging
 import logging.config
+import logging.handlers
 import os
 import uuid
 from contextvars import ContextVar
 from datetime import datetime
 from pathlib import Path
 
+from seventeenlands.batched_logging import DeferredFlushMixin
+
 request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
 
 
@@ -28,8 +32,58 @@ template_path = project_root / "app/templates"
 logger_path = project_root / "logs"
 data_path = project_root / "seeds"
 
-
-class DailyFileHandler(logging.FileHandler):
+# Chance that a request to these paths gets "Request started/completed" log lines; slow and
+# failing requests are always logged, and every request is counted in app.metrics
+REQUEST_LOG_SAMPLE_RATES = {"/check-logs": 0.01}
+DEFAULT_REQUEST_LOG_SAMPLE_RATE = 1.0
+SLOW_REQUEST_SECONDS = 1.0
+
+# Finished live update traces kept in memory for /metrics/traces
+TRACE_BUFFER_SIZE = 2000
+
+HTTP_TIMEOUT_SECONDS = 30.0
+HTTP_MAX_RETRIES = 4
+HTTP_BACKOFF_BASE_SECONDS = 0.5
+HTTP_BACKOFF_MAX_SECONDS = 30.0
+# Retry-After waits longer than this fail the request instead
+HTTP_MAX_RETRY_AFTER_SECONDS = 120.0
+
+# Persistent cache of untapped.gg API responses, see app.services.http_cache
+HTTP_CACHE_TTL_SECONDS = 24 * 60 * 60
+HTTP_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Overridable so imports can be pointed at a local stand-in server
+UNTAPPED_API_BASE_URL = os.environ.get(
+    "UNTAPPED_API_BASE_URL", "https://api.mtga.untapped.gg/api/v1/decks/pricing/cardkingdom/"
+)
+UNTAPPED_CONCURRENCY = int(os.environ.get("UNTAPPED_CONCURRENCY", "4"))
+UNTAPPED_REQUESTS_PER_SECOND = float(os.environ.get("UNTAPPED_REQUESTS_PER_SECOND", "2"))
+UNTAPPED_BURST = float(os.environ.get("UNTAPPED_BURST", "4"))
+
+# Worker pools in app.executors
+THREAD_POOL_WORKERS = int(os.environ.get("THREAD_POOL_WORKERS", "8"))
+PROCESS_POOL_WORKERS = int(os.environ.get("PROCESS_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Decks written per transaction by add_decks_to_db
+DECK_INSERT_BATCH_SIZE = 500
+# Decks per page on / and /untapped
+DECK_PAGE_SIZE = 10
+DECK_PAGE_MAX_SIZE = 100
+# Rendered deck list pages kept for the current deck generation
+RENDER_CACHE_MAX_ENTRIES = 64
+
+# Background deck imports, see app.services.jobs
+IMPORT_WORKERS = int(os.environ.get("IMPORT_WORKERS", "1"))
+IMPORT_CHUNK_SIZE = 10
+# Pause between chunks while a /check-logs stream is open
+IMPORT_PAUSE_WHILE_LIVE_SECONDS = 1.0
+
+
+class BufferedStreamHandler(DeferredFlushMixin, logging.StreamHandler):
+    pass
+
+
+class DailyFileHandler(DeferredFlushMixin, logging.FileHandler):
     def __init__(self, log_dir: Path = logger_path, prefix: str = "app", encoding: str = "utf-8"):
         self.log_dir = log_dir
         self.prefix = prefix
@@ -65,9 +119,14 @@ LOGGING_CONFIG = {
             },
         },
     },
+    "filters": {
+        "request_context": {
+            "()": "app.config.RequestContextFilter",
+        },
+    },
     "handlers": {
         "console": {
-            "class": "logging.StreamHandler",
+            "class": "app.config.BufferedStreamHandler",
             "formatter": "json",
             "level": "DEBUG",
         },
@@ -78,21 +137,29 @@ LOGGING_CONFIG = {
             "formatter": "json",
             "level": "DEBUG",
         },
+        # Callers only enqueue; the listener thread formats and writes
+        "queue": {
+            "class": "logging.handlers.QueueHandler",
+            "handlers": ["console", "file"],
+            "listener": "seventeenlands.batched_logging.BatchingQueueListener",
+            "respect_handler_level": True,
+            "filters": ["request_context"],
+        },
     },
     "loggers": {
         "app": {
-            "handlers": ["console", "file"],
+            "handlers": ["queue"],
             "level": "DEBUG",
             "propagate": False,
         },
         "uvicorn": {
-            "handlers": ["console", "file"],
+            "handlers": ["queue"],
             "level": "INFO",
             "propagate": False,
         },
     },
     "root": {
-        "handlers": ["console"],
+        "handlers": ["queue"],
         "level": "WARNING",
     },
 }
@@ -110,3 +177,6 @@ def generate_request_id() -> str:
 
 def setup_logging() -> None:
     logging.config.dictConfig(LOGGING_CONFIG)
+    listener = logging.getHandlerByName("queue").listener
+    listener.start()
+    atexit.register(listener.stop)
@@ -5,6 +5,7 @@ from typing import Annotated
 from fastapi import Depends
 
 from app.config import db_path, schema_path, data_path
+from app.services.decks import backfill_deck_fingerprints
 
 logger = logging.getLogger(__name__)
 
@@ -29,13 +30,11 @@ DBConnDep = Annotated[aiosqlite.Connection, Depends(get_db_conn)]
 async def init_db():
     conn = await get_db()
     logger.info("Initializing database from schema.sql")
-    cursor = await conn.cursor()
     try:
-        with open(schema_path, "r") as f:
-            await cursor.executescript(f.read())
-        await conn.commit()
+        await apply_schema(conn)
         logger.info("Database initialized from schema.sql")
 
+        await migrate_db(conn)
         await seed_if_empty(conn)
 
         await conn.close()
@@ -43,6 +42,33 @@ async def init_db():
         print(f"Warning: Could not initialize database from schema.sql: {e}")
 
 
+async def apply_schema(conn: aiosqlite.Connection):
+    with open(schema_path, "r") as f:
+        await conn.executescript(f.read())
+    await conn.commit()
+
+
+async def migrate_db(conn: aiosqlite.Connection):
+    # CREATE TABLE IF NOT EXISTS leaves tables from older schema.sql versions as they were
+    cursor = await conn.execute("PRAGMA table_info(decks)")
+    deck_columns = {row["name"] for row in await cursor.fetchall()}
+    if "fingerprint" not in deck_columns:
+        logger.info("Adding decks.fingerprint column")
+        await conn.execute("ALTER TABLE decks ADD COLUMN fingerprint TEXT")
+    await conn.execute("CREATE INDEX IF NOT EXISTS decks_fingerprint ON decks (fingerprint)")
+
+    cursor = await conn.execute("PRAGMA table_info(import_jobs)")
+    import_job_columns = {row["name"] for row in await cursor.fetchall()}
+    if "skipped" not in import_job_columns:
+        logger.info("Adding import_jobs.skipped column")
+        await conn.execute("ALTER TABLE import_jobs ADD COLUMN skipped INTEGER NOT NULL DEFAULT 0")
+    await conn.commit()
+
+    backfilled = await backfill_deck_fingerprints(conn)
+    if backfilled:
+        logger.info("Backfilled deck fingerprints", extra={"count": backfilled})
+
+
 async def seed_if_empty(conn: aiosqlite.Connection):
     cursor = await conn.cursor()
 
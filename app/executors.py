@@ -0,0 +1,78 @@
+import asyncio
+import concurrent.futures
+import functools
+import logging
+import multiprocessing
+import threading
+import time
+from typing import Any, Callable, TypeVar
+
+from app.config import THREAD_POOL_WORKERS, PROCESS_POOL_WORKERS
+from app.metrics import executor_queue_wait_seconds, executor_run_seconds
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _timed_call(func: Callable[..., T], args: tuple, kwargs: dict) -> tuple[float, float, T]:
+    # time.monotonic() is system-wide, so process pool workers can report it back too
+    started = time.monotonic()
+    result = func(*args, **kwargs)
+    return started, time.monotonic(), result
+
+
+class Executor:
+    """
+    A lazily started thread or process pool for work that would otherwise block the event loop.
+
+    run() records how long each call waited for a free worker and how long it ran, labelled
+    with the pool's name. Functions and arguments sent to a process pool have to be
+    picklable, so pass module-level functions.
+    """
+
+    def __init__(self, name: str, kind: str, max_workers: int):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers
+        self._pool: concurrent.futures.Executor | None = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> concurrent.futures.Executor:
+        with self._lock:
+            if self._pool is None:
+                logger.info("Starting executor", extra={"pool": self.name, "kind": self.kind, "workers": self.max_workers})
+                if self.kind == "thread":
+                    self._pool = concurrent.futures.ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix=f"{self.name}-pool"
+                    )
+                else:
+                    # Forking would copy the app's threads' locks mid-use
+                    self._pool = concurrent.futures.ProcessPoolExecutor(
+                        max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+            return self._pool
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        loop = asyncio.get_running_loop()
+        submitted = time.monotonic()
+        started, finished, result = await loop.run_in_executor(
+            self._get_pool(), functools.partial(_timed_call, func, args, kwargs)
+        )
+        executor_queue_wait_seconds.observe(max(0.0, started - submitted), pool=self.name)
+        executor_run_seconds.observe(finished - started, pool=self.name)
+        return result
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+
+
+# Blocking file reads and template rendering
+thread_pool = Executor("thread", "thread", THREAD_POOL_WORKERS)
+# CPU-heavy parsing of uploaded pages
+process_pool = Executor("process", "process", PROCESS_POOL_WORKERS)
@@ -1,12 +1,26 @@
 import logging
+import random
+import time
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.database import init_db
-from app.config import setup_logging, request_id_var, generate_request_id
-from app.routes import pages, decks, logs
+from app.config import (
+    setup_logging,
+    request_id_var,
+    generate_request_id,
+    REQUEST_LOG_SAMPLE_RATES,
+    DEFAULT_REQUEST_LOG_SAMPLE_RATE,
+    SLOW_REQUEST_SECONDS,
+)
+from app.metrics import request_metrics
+from app.executors import thread_pool, process_pool
+from app.services.jobs import import_jobs
+from app.services.untapped import create_untapped_fetcher
+from app.utils.http import create_http_client
+from app.routes import pages, decks, logs, metrics, jobs
 
 setup_logging()
 logger = logging.getLogger(__name__)
@@ -16,7 +30,14 @@ logger = logging.getLogger(__name__)
 async def lifespan(_app: FastAPI):
     logger.info("Starting application")
     await init_db()
-    yield
+    async with create_http_client() as http_client:
+        await import_jobs.start(create_untapped_fetcher(http_client))
+        try:
+            yield
+        finally:
+            await import_jobs.stop()
+            thread_pool.shutdown()
+            process_pool.shutdown()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -29,26 +50,61 @@ app.add_middleware(
 )
 
 
+def get_route_template(request: Request) -> str:
+    # Set by the router once the request has been matched
+    route = request.scope.get("route")
+    return getattr(route, "path", "<unmatched>")
+
+
 @app.middleware("http")
 async def add_logging_middleware(request: Request, call_next):
     request_id = generate_request_id()
     request_id_var.set(request_id)
+    start = time.perf_counter()
 
-    logger.info(
-        "Request started",
-        extra={"method": request.method, "path": request.url.path},
-    )
+    sample_rate = REQUEST_LOG_SAMPLE_RATES.get(request.url.path, DEFAULT_REQUEST_LOG_SAMPLE_RATE)
+    sampled = sample_rate >= 1.0 or random.random() < sample_rate
+
+    if sampled and logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Request started",
+            extra={"method": request.method, "path": request.url.path},
+        )
 
     response: Response = await call_next(request)
 
-    logger.info(
-        "Request completed",
-        extra={"method": request.method, "path": request.url.path, "status_code": response.status_code},
+    # For streaming responses this is the time until the response started
+    elapsed = time.perf_counter() - start
+    route = get_route_template(request)
+    request_metrics.observe(
+        elapsed, method=request.method, route=route, status=f"{response.status_code // 100}xx"
     )
 
+    if response.status_code >= 500 or elapsed >= SLOW_REQUEST_SECONDS:
+        level = logging.WARNING
+    elif sampled:
+        level = logging.INFO
+    else:
+        level = None
+
+    if level is not None and logger.isEnabledFor(level):
+        logger.log(
+            level,
+            "Request completed",
+            extra={
+                "method": request.method,
+                "path": request.url.path,
+                "route": route,
+                "status_code": response.status_code,
+                "duration_ms": round(elapsed * 1000, 2),
+            },
+        )
+
     return response
 
 
 app.include_router(pages.router)
 app.include_router(decks.router)
 app.include_router(logs.router)
+app.include_router(metrics.router)
+app.include_router(jobs.router)
@@ -0,0 +1,274 @@
+import abc
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Iterator
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+@dataclass
+class Histogram:
+    buckets: tuple[float, ...] = LATENCY_BUCKETS
+    counts: list[int] = field(default_factory=list)
+    count: int = 0
+    total: float = 0.0
+
+    def __post_init__(self):
+        if not self.counts:
+            # The last slot counts observations above the largest bucket
+            self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q: float) -> float | None:
+        """Estimate a quantile by interpolating within the bucket it falls in."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i else 0.0
+                if i == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[i] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def cumulative_buckets(self) -> list[tuple[str, int]]:
+        cumulative = 0
+        buckets = []
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            cumulative += bucket_count
+            buckets.append((str(bound), cumulative))
+        buckets.append(("+Inf", self.count))
+        return buckets
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "buckets": dict(self.cumulative_buckets()),
+        }
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{name}="{escape_label_value(str(value))}"' for name, value in labels.items())
+    return f"{{{pairs}}}"
+
+
+class MetricFamily(abc.ABC):
+    """A named metric split by label values, rendered in the Prometheus text format."""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, description: str, label_names: tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _labels(self, key: tuple[str, ...], **extra: str) -> dict[str, str]:
+        return {**dict(zip(self.label_names, key)), **extra}
+
+    @abc.abstractmethod
+    def samples(self) -> list[str]:
+        """The sample lines for every label set."""
+
+    def to_prometheus(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.type_name}",
+            *self.samples(),
+        ]
+
+
+class HistogramFamily(MetricFamily):
+    type_name = "histogram"
+
+    def __init__(self, name: str, description: str, label_names: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, description, label_names)
+        self.buckets = buckets
+        self._histograms: dict[tuple[str, ...], Histogram] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            return [
+                {**self._labels(key), **histogram.to_dict()}
+                for key, histogram in sorted(self._histograms.items())
+            ]
+
+    def samples(self) -> list[str]:
+        lines = []
+        with self._lock:
+            for key, histogram in sorted(self._histograms.items()):
+                for bound, cumulative in histogram.cumulative_buckets():
+                    lines.append(f"{self.name}_bucket{format_labels(self._labels(key, le=bound))} {cumulative}")
+                lines.append(f"{self.name}_sum{format_labels(self._labels(key))} {histogram.total}")
+                lines.append(f"{self.name}_count{format_labels(self._labels(key))} {histogram.count}")
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+class CounterFamily(MetricFamily):
+    type_name = "counter"
+
+    def __init__(self, name: str, description: str, label_names: tuple[str, ...] = ()):
+        super().__init__(name, description, label_names)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            return [
+                f"{self.name}_total{format_labels(self._labels(key))} {value}"
+                for key, value in sorted(self._values.items())
+            ]
+
+
+class Gauge(MetricFamily):
+    """A single value, either set directly or read from a callback at scrape time."""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, description: str, callback: Callable[[], float] | None = None):
+        super().__init__(name, description)
+        self.callback = callback
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.inc(-amount)
+
+    def samples(self) -> list[str]:
+        value = self.callback() if self.callback is not None else self.value
+        return [f"{self.name} {value}"]
+
+
+request_metrics = HistogramFamily(
+    "http_request_duration_seconds",
+    "Time until the response started, by method, route template and status class.",
+    ("method", "route", "status"),
+)
+
+# Stages between a record landing in the 17lands log and the SSE log-update event
+live_update_stage_seconds = HistogramFamily(
+    "live_update_stage_seconds",
+    "Time spent in each stage of the live update pipeline.",
+    ("stage",),
+)
+live_update_lines = CounterFamily(
+    "live_update_log_lines",
+    "Log lines read by live update streams.",
+    ("kind",),
+)
+live_update_events = CounterFamily(
+    "live_update_events",
+    "Log-update events sent to live update streams.",
+)
+live_update_subscribers = Gauge(
+    "live_update_subscribers",
+    "Open live update streams.",
+)
+
+executor_queue_wait_seconds = HistogramFamily(
+    "executor_queue_wait_seconds",
+    "Time calls waited for a free worker, by pool.",
+    ("pool",),
+)
+executor_run_seconds = HistogramFamily(
+    "executor_run_seconds",
+    "Time calls ran in a worker, by pool.",
+    ("pool",),
+)
+
+http_cache_requests = CounterFamily(
+    "http_cache_requests",
+    "Cached HTTP fetches by result: hit, revalidated or miss.",
+    ("result",),
+)
+
+deck_page_requests = CounterFamily(
+    "deck_page_requests",
+    "Deck list page requests by result: not_modified, hit or miss.",
+    ("result",),
+)
+
+
+def _log_queue_depth() -> int:
+    handler = logging.getHandlerByName("queue")
+    return handler.queue.qsize() if handler is not None else 0
+
+
+log_queue_depth = Gauge(
+    "log_queue_depth",
+    "Log records waiting for the logging listener thread.",
+    callback=_log_queue_depth,
+)
+
+REGISTRY: list[MetricFamily] = [
+    request_metrics,
+    live_update_stage_seconds,
+    live_update_lines,
+    live_update_events,
+    live_update_subscribers,
+    executor_queue_wait_seconds,
+    executor_run_seconds,
+    http_cache_requests,
+    deck_page_requests,
+    log_queue_depth,
+]
+
+
+def render_prometheus() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.to_prometheus())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,75 @@
+import hashlib
+import secrets
+import threading
+from collections import OrderedDict
+from typing import Hashable
+
+from app.config import RENDER_CACHE_MAX_ENTRIES
+
+# Part of every ETag, so tags from before a restart never match; a database that was
+# replaced in between starts its generation over
+BOOT_ID = secrets.token_hex(4)
+
+
+def page_etag(key: Hashable, generation: int) -> str:
+    digest = hashlib.blake2b(f"{BOOT_ID}:{generation}:{key!r}".encode(), digest_size=8).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip().removeprefix("W/")
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+
+class RenderCache:
+    """
+    Rendered pages by key, valid for one deck generation.
+
+    Entries from an older generation are dropped on the next lookup; otherwise the least
+    recently used entry goes once there are more than max_entries.
+    """
+
+    def __init__(self, max_entries: int = RENDER_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._generation: int | None = None
+        self._entries: OrderedDict[Hashable, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _check_generation(self, generation: int) -> None:
+        if generation != self._generation:
+            self._entries.clear()
+            self._generation = generation
+
+    def get(self, key: Hashable, generation: int) -> str | None:
+        with self._lock:
+            if self._generation is not None and generation < self._generation:
+                return None
+            self._check_generation(generation)
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key: Hashable, generation: int, body: str) -> None:
+        with self._lock:
+            if self._generation is not None and generation < self._generation:
+                # Rendered before decks changed; a newer page is on its way
+                return
+            self._check_generation(generation)
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation = None
+
+
+deck_pages = RenderCache()
@@ -1 +1 @@
-from app.routes import pages, decks, logs
\ No newline at end of file
+from app.routes import pages, decks, logs, metrics, jobs
\ No newline at end of file
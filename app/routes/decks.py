@@ -4,13 +4,16 @@ from fastapi import APIRouter, Request, Form, HTTPException, UploadFile, File
 from starlette import status
 from starlette.responses import RedirectResponse, Response
 
+from app.config import DECK_PAGE_SIZE
 from app.database import DBConnDep
-from app.services.decks import get_decks, add_decks_to_db, delete_deck
+from app.executors import thread_pool
+from app.routes.pages import get_deck_page
+from app.services.decks import delete_deck
+from app.services.jobs import import_jobs, get_job
 from app.services.untapped import (
     parse_untapped_html,
     build_untapped_decks_api_urls,
-    fetch_untapped_decks_from_api,
-    add_decks_by_html,
+    save_untapped_session,
 )
 from app.templates import templates
 
@@ -24,6 +27,28 @@ async def delete_deck_route(conn: DBConnDep, deck_id: int):
     return Response(status_code=200)
 
 
+def read_upload(file: UploadFile) -> str:
+    return file.file.read().decode("utf-8")
+
+
+async def render_import_job(request: Request, conn: DBConnDep, job_id: int) -> Response:
+    context = await get_deck_page(conn, None, DECK_PAGE_SIZE)
+    context["job"] = await get_job(conn, job_id)
+    return templates.TemplateResponse(request=request, name="untapped.html", context=context)
+
+
+async def submit_html_import(request: Request, conn: DBConnDep, kind: str, html_doc: str) -> Response:
+    data = await parse_untapped_html(html_doc)
+    if not await save_untapped_session(conn, data):
+        # Decks are only imported along with a new session
+        context = await get_deck_page(conn, None, DECK_PAGE_SIZE)
+        return templates.TemplateResponse(request=request, name="untapped.html", context=context)
+
+    untapped_decks = await build_untapped_decks_api_urls(data["deck_urls"])
+    job_id = await import_jobs.submit(conn, kind, untapped_decks, data["cookies"])
+    return await render_import_job(request, conn, job_id)
+
+
 @router.post("/add/untapped-decks-urls")
 async def add_untapped_decks_url_list_route(
         request: Request,
@@ -31,23 +56,11 @@ async def add_untapped_decks_url_list_route(
         url_list: Annotated[str, Form(...)]
 ):
     try:
-        print(url_list)
         urls = url_list.split("\n")
         urls = list(set(urls))
         data = await build_untapped_decks_api_urls(urls)
-        cursor = await conn.cursor()
-
-        try:
-            decks = await fetch_untapped_decks_from_api(cursor=cursor, cookies=None, untapped_decks=data)
-        except Exception as e:
-            decks = []
-
-        await add_decks_to_db(conn, decks)
-        added_decks = await get_decks(cursor)
-
-        return templates.TemplateResponse(
-            request=request, name="untapped.html", context={"decks": added_decks}
-        )
+        job_id = await import_jobs.submit(conn, "urls", data, cookies=None)
+        return await render_import_job(request, conn, job_id)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing decks: {str(e)}")
@@ -60,13 +73,7 @@ async def add_untapped_decks_html_route(
         html_doc: Annotated[str, Form(...)]
 ):
     try:
-        data = await parse_untapped_html(html_doc)
-        await add_decks_by_html(conn, data)
-        cursor = await conn.cursor()
-        decks = await get_decks(cursor)
-        return templates.TemplateResponse(
-            request=request, name="untapped.html", context={"decks": decks}
-        )
+        return await submit_html_import(request, conn, "html", html_doc)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing decks: {str(e)}")
 
@@ -78,12 +85,7 @@ async def add_decks_by_html_route(
         file: Annotated[UploadFile, File(...)]
 ):
     try:
-        data = await parse_untapped_html(file.file.read().decode("utf-8"))
-        await add_decks_by_html(conn, data)
-        cursor = await conn.cursor()
-        decks = await get_decks(cursor)
-        return templates.TemplateResponse(
-            request=request, name="untapped.html", context={"decks": decks}
-        )
+        html_doc = await thread_pool.run(read_upload, file)
+        return await submit_html_import(request, conn, "upload", html_doc)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing decks: {str(e)}")
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, HTTPException, Request
+from sse_starlette import EventSourceResponse
+
+from app.database import DBConnDep
+from app.services.jobs import import_jobs, get_job, FINISHED_STATUSES
+from app.templates import templates
+
+router = APIRouter()
+
+
+@router.get("/jobs/{job_id}")
+async def job_route(conn: DBConnDep, job_id: int):
+    job = await get_job(conn, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}/events")
+async def job_events_route(request: Request, conn: DBConnDep, job_id: int):
+    if await get_job(conn, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_generator():
+        async for job in import_jobs.watch(conn, job_id):
+            if await request.is_disconnected():
+                break
+            html = templates.get_template("partials/_import_job_progress.html").render(job=job)
+            yield {"event": "progress", "data": html}
+            if job["status"] in FINISHED_STATUSES:
+                yield {"event": "done", "data": html}
+
+    return EventSourceResponse(event_generator())
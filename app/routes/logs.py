@@ -1,18 +1,23 @@
 import asyncio
 import logging
+import time
 from collections import defaultdict
 
 from fastapi import APIRouter, Request
 from sse_starlette import EventSourceResponse
 
 from app.database import get_db
+from app.executors import thread_pool
 from app.database import DBConnDep
+from app.metrics import (
+    live_update_stage_seconds,
+    live_update_lines,
+    live_update_events,
+    live_update_subscribers,
+)
 from app.models import ManaPool
 from app.services.logs import (
-    get_last_log_line,
-    get_log_line_count,
-    get_last_processed_count,
-    set_last_processed_count,
+    OPPONENT_STATE_MARKER,
     LogEntry,
     LogState,
 )
@@ -26,6 +31,7 @@ from app.services.cards import (
 from app.utils.cards import fetch_missing_cards_from_17lands
 from app.utils.mana import enrich_decks_with_playability
 from app.templates import templates
+from app.tracing import Trace, new_trace_id, stage_span
 
 BASIC_MANA_ABILITY_MAP = {1001: "W", 1002: "U", 1003: "B", 1004: "R", 1005: "G", 1152: "C"}
 ANNOTATION_MANA_MAP = {1: "W", 2: "U", 4: "B", 8: "R", 16: "G", 32: "C"}
@@ -109,7 +115,9 @@ async def render_log_update_html(
         producible_mana_tags: list[tuple[str, int]],
         missing_ids: list[str],
 ) -> str:
-    html_content = templates.get_template("game_view.html").render(
+    # Rendering takes long enough to hold up the other streams if done on the loop
+    html_content = await thread_pool.run(
+        templates.get_template("game_view.html").render,
         cards=current_deck_cards,
         matching_decks=matching_decks,
         opponent_mana=opponent_mana_tags,
@@ -119,15 +127,20 @@ async def render_log_update_html(
     return html_content.replace("\n", " ")
 
 
-async def process_cards(conn, cursor, state: LogState) -> tuple[list[dict], list[dict], list[str]]:
+async def process_cards(
+        conn, cursor, state: LogState, trace: Trace | None = None
+) -> tuple[list[dict], list[dict], list[str]]:
     if not state.has_cards():
         return [], [], []
 
     logger.debug("Processing current deck cards")
-    current_deck_cards, missing_ids = await process_missing_cards(conn, cursor, state.cards_log)
+    with stage_span(trace, "process_missing_cards"):
+        current_deck_cards, missing_ids = await process_missing_cards(conn, cursor, state.cards_log)
     card_count_by_name = await build_card_count_map(state.cards_log, current_deck_cards)
-    matching_decks = await find_matching_decks(cursor, current_deck_cards)
-    await enrich_decks_with_cards(cursor, matching_decks, card_count_by_name)
+    with stage_span(trace, "find_matching_decks"):
+        matching_decks = await find_matching_decks(cursor, current_deck_cards)
+    with stage_span(trace, "enrich_decks_with_cards"):
+        await enrich_decks_with_cards(cursor, matching_decks, card_count_by_name)
     compute_deck_type_counts(matching_decks)
 
     return current_deck_cards, matching_decks, missing_ids
@@ -148,16 +161,17 @@ def process_mana(state: LogState) -> ManaPool:
     return ManaPool(**opponent_mana_dict)
 
 
-async def process_log_update(conn, cursor, state: LogState) -> dict | None:
+async def process_log_update(conn, cursor, state: LogState, trace: Trace | None = None) -> dict | None:
     if not state.has_cards():
         return None
 
-    current_deck_cards, matching_decks, missing_ids = await process_cards(conn, cursor, state)
+    current_deck_cards, matching_decks, missing_ids = await process_cards(conn, cursor, state, trace)
     
     # get producible mana from current deck
     producible_mana = await get_producible_mana(current_deck_cards)
     opponent_mana = process_mana(state)
-    enrich_decks_with_playability(matching_decks, opponent_mana)
+    with stage_span(trace, "playability"):
+        enrich_decks_with_playability(matching_decks, opponent_mana)
     
     opponent_mana_tags = build_mana_tags(opponent_mana)
     producible_mana_tags = build_mana_tags(producible_mana)
@@ -168,17 +182,19 @@ async def process_log_update(conn, cursor, state: LogState) -> dict | None:
         "opponent_mana_tags": opponent_mana_tags,
         "producible_mana_tags": producible_mana_tags,
         "missing_ids": missing_ids,
+        "trace_id": state.trace_id,
     }
 
 
 def is_opponent_log_entry(log_entry: str) -> bool:
-    return "::Opponent::" in log_entry
+    return OPPONENT_STATE_MARKER in log_entry
 
 
 @router.get("/check-logs")
 async def check_logs_stream(request: Request, conn: DBConnDep):
     async def event_generator():
         logger.info("SSE stream started")
+        live_update_subscribers.inc()
         cursor = await conn.cursor()
         log_entry = LogEntry()
 
@@ -188,20 +204,42 @@ async def check_logs_stream(request: Request, conn: DBConnDep):
                     logger.info("Client disconnected from SSE stream")
                     break
 
-                last_log_entry = await get_last_log_line()
-                log_line_count = await get_log_line_count()
-                last_processed = await get_last_processed_count()
-
-                if log_line_count != last_processed:
-                    await set_last_processed_count(log_line_count)
-
-                    if is_opponent_log_entry(last_log_entry):
-                        await log_entry.parse_opponent_log_line(last_log_entry)
-
-                        state = await log_entry.get_current_state()
-                        result = await process_log_update(conn, cursor, state)
-
-                        if result is not None:
+                # Every record is applied, since deltas build on each other; only the
+                # resulting state is rendered
+                state_changed = False
+                read_start = time.perf_counter()
+                lines = log_entry.read_new_lines()
+                if lines:
+                    read_end = time.perf_counter()
+                    opponent_lines = [line for line in lines if is_opponent_log_entry(line)]
+                    live_update_lines.inc(len(lines) - len(opponent_lines), kind="other")
+                    live_update_lines.inc(len(opponent_lines), kind="opponent_state")
+                    for line in opponent_lines:
+                        state_changed |= await log_entry.parse_opponent_log_line(line)
+                    parse_end = time.perf_counter()
+                    if not state_changed:
+                        # No trace for reads that change nothing, but the stage histograms
+                        # still time every non-empty read
+                        live_update_stage_seconds.observe(read_end - read_start, stage="tail_read")
+                        live_update_stage_seconds.observe(parse_end - read_end, stage="parse_opponent_log_line")
+
+                if state_changed:
+                    state = await log_entry.get_current_state()
+                    # Empty polls are not timed; they would swamp the stage histograms
+                    trace = Trace(
+                        trace_id=state.trace_id or new_trace_id(),
+                        match_id=state.match_id,
+                        origin=state.trace_origin,
+                        _started_perf=read_start,
+                    )
+                    trace.add_span("tail_read", read_start, read_end - read_start)
+                    trace.add_span("parse_opponent_log_line", read_end, parse_end - read_end)
+
+                    with trace.span("process_log_update"):
+                        result = await process_log_update(conn, cursor, state, trace)
+
+                    if result is not None:
+                        with trace.span("render_log_update_html"):
                             html_content = await render_log_update_html(
                                 result["current_deck_cards"],
                                 result["matching_decks"],
@@ -210,18 +248,21 @@ async def check_logs_stream(request: Request, conn: DBConnDep):
                                 result["missing_ids"],
                             )
 
-                            logger.debug(
-                                "Sending log update",
-                                extra={
-                                    "deck_count": len(result["matching_decks"]),
-                                    "card_count": len(result["current_deck_cards"]),
-                                },
-                            )
-                            yield {"event": "log-update", "data": html_content}
-                    
+                        logger.debug(
+                            "Sending log update",
+                            extra={
+                                "deck_count": len(result["matching_decks"]),
+                                "card_count": len(result["current_deck_cards"]),
+                            },
+                        )
+                        live_update_events.inc()
+                        trace.finish()
+                        yield {"event": "log-update", "id": trace.trace_id, "data": html_content}
+
                 await asyncio.sleep(0)
         finally:
             logger.info("SSE stream closed")
+            live_update_subscribers.dec()
             await conn.close()
 
     return EventSourceResponse(event_generator())
\ No newline at end of file
@@ -0,0 +1,24 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Query
+from starlette.responses import PlainTextResponse
+
+from app.metrics import request_metrics, render_prometheus
+from app.tracing import traces
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def prometheus_metrics_route():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/metrics/requests")
+async def request_metrics_route():
+    return {"requests": request_metrics.snapshot()}
+
+
+@router.get("/metrics/traces")
+async def traces_route(match_id: str | None = None, limit: Annotated[int, Query(ge=1)] = 100):
+    return {"summary": traces.summary(), "traces": traces.recent(match_id, limit)}
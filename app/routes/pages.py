@@ -1,26 +1,77 @@
-from fastapi import APIRouter, Request
+from typing import Annotated
+
+from fastapi import APIRouter, HTTPException, Query, Request
 from fastapi.responses import HTMLResponse
+from starlette.responses import Response
 
-from app.database import DBConnDep
-from app.services.decks import get_decks
+from app.config import DECK_PAGE_SIZE, DECK_PAGE_MAX_SIZE
+from app.database import DBConnDep, get_db
+from app.executors import thread_pool
+from app.metrics import deck_page_requests
+from app.render_cache import deck_pages, page_etag, etag_matches
+from app.services.decks import get_decks, get_deck_generation, parse_deck_cursor, next_deck_cursor
 from app.templates import templates
 
 router = APIRouter()
 
+DeckCursorQuery = Annotated[str | None, Query(description="<added_at>,<id> of the last deck on the previous page")]
+DeckLimitQuery = Annotated[int, Query(ge=1, le=DECK_PAGE_MAX_SIZE)]
 
-@router.get("/", response_class=HTMLResponse)
-async def list_follow(request: Request, conn: DBConnDep):
+
+async def get_deck_page(conn, after: str | None, limit: int) -> dict:
+    try:
+        cursor_key = parse_deck_cursor(after) if after else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     cursor = await conn.cursor()
-    decks = await get_decks(cursor)
-    return templates.TemplateResponse(
-        request=request, name="follow.html", context={"decks": decks}
-    )
+    decks = await get_decks(cursor, after=cursor_key, limit=limit)
+    return {"decks": decks, "next_after": next_deck_cursor(decks, limit), "limit": limit}
+
+
+async def render_deck_page(request: Request, name: str, after: str | None, limit: int) -> Response:
+    """
+    A deck list page, rendered once per deck generation.
+
+    Every change to decks bumps the generation stored with them, whichever process made it,
+    so the ETag is known after one lookup and a matching If-None-Match gets a 304 without
+    querying decks.
+    """
+    key = (name, after, limit)
+    conn = await get_db()
+    try:
+        generation = await get_deck_generation(await conn.cursor())
+        headers = {"ETag": page_etag(key, generation), "Cache-Control": "no-cache"}
+
+        if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            deck_page_requests.inc(result="not_modified")
+            return Response(status_code=304, headers=headers)
+
+        body = deck_pages.get(key, generation)
+        if body is not None:
+            deck_page_requests.inc(result="hit")
+            return HTMLResponse(body, headers=headers)
+
+        deck_page_requests.inc(result="miss")
+        context = await get_deck_page(conn, after, limit)
+    finally:
+        await conn.close()
+    body = await thread_pool.run(templates.get_template(name).render, request=request, **context)
+    deck_pages.put(key, generation, body)
+    return HTMLResponse(body, headers=headers)
+
+
+@router.get("/", response_class=HTMLResponse)
+async def list_follow(request: Request):
+    # The follow page only streams the log and links to the deck list, so it queries no decks
+    return templates.TemplateResponse(request=request, name="follow.html")
 
 
 @router.get("/untapped", response_class=HTMLResponse)
-async def list_untapped(request: Request, conn: DBConnDep):
-    cursor = await conn.cursor()
-    decks = await get_decks(cursor)
-    return templates.TemplateResponse(
-        request=request, name="untapped.html", context={"decks": decks}
-    )
+async def list_untapped(request: Request, after: DeckCursorQuery = None, limit: DeckLimitQuery = DECK_PAGE_SIZE):
+    return await render_deck_page(request, "untapped.html", after, limit)
+
+
+@router.get("/decks")
+async def list_decks(conn: DBConnDep, after: DeckCursorQuery = None, limit: DeckLimitQuery = DECK_PAGE_SIZE):
+    page = await get_deck_page(conn, after, limit)
+    return {"decks": page["decks"], "next": page["next_after"]}
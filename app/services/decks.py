@@ -1,115 +1,301 @@
 import aiosqlite
+import hashlib
+import itertools
+import logging
+import time
+from collections import defaultdict
 from datetime import datetime
+from typing import Iterable
+
+from app.config import DECK_INSERT_BATCH_SIZE, DECK_PAGE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Stays under SQLite's default limit on bound parameters per statement
+SQL_VARIABLE_CHUNK_SIZE = 900
+
+async def get_deck_generation(cursor: aiosqlite.Cursor) -> int:
+    """The deck generation, bumped whenever decks are added or removed by any process."""
+    await cursor.execute("SELECT generation FROM deck_generation WHERE id = 1")
+    row = await cursor.fetchone()
+    return row[0] if row else 0
+
+
+async def bump_deck_generation(cursor: aiosqlite.Cursor) -> None:
+    """Call within the transaction that changes decks, so readers never see one without the other."""
+    await cursor.execute("UPDATE deck_generation SET generation = generation + 1 WHERE id = 1")
 
 
 async def delete_deck(conn: aiosqlite.Connection, deck_id: int) -> None:
     cursor = await conn.cursor()
     await cursor.execute("DELETE FROM decks WHERE id = ?", (deck_id,))
     await cursor.execute("DELETE FROM deck_cards WHERE deck_id = ?", (deck_id,))
+    await bump_deck_generation(cursor)
     await conn.commit()
     await cursor.close()
 
 
-async def get_decks(cursor: aiosqlite.Cursor) -> list[dict]:
-    # TODO: make a better query or the get_decks logic and api
-
-    await cursor.execute("""
-    WITH aaa AS
-    (
-    SELECT     d.id        AS deck_id,
-              d.NAME      AS deck_name,
-              d.source    AS deck_source,
-              d.url       AS deck_url,
-              c.NAME      AS name,
-              dc.quantity AS quantity,
-              c.mana_cost AS mana_cost,
-              c.type_line AS type_line,
-              c.component AS component
-    FROM       decks d
-    INNER JOIN deck_cards dc
-    ON         d.id = dc.deck_id
-    INNER JOIN scryfall_all_cards c
-    ON         dc.card_id = c.id
-    ORDER BY   d.added_at DESC )
-    SELECT aaa.deck_id, aaa.deck_name, aaa.deck_source, aaa.deck_url, aaa.name, aaa.quantity, aaa.mana_cost, aaa.type_line, aaa.component
-    FROM   aaa
-    WHERE  aaa.deck_id IN
-        (
-        SELECT DISTINCT d.id
-        FROM            decks d
-        INNER JOIN      deck_cards dc
-        ON              d.id = dc.deck_id
-        INNER JOIN      scryfall_all_cards c
-        ON              dc.card_id = c.id
-        ORDER BY        d.added_at DESC limit 10);
-    """)
-    rows = await cursor.fetchall()
-    cards = [dict(row) for row in rows]
-    decks = {}
-    cards = [card for card in cards if card["component"] != "combo_piece"]
-    for card in cards:
-        deck_id = card["deck_id"]
-
-        if deck_id not in decks:
-            decks[deck_id] = {
-                "id": card["deck_id"],
-                "name": card["deck_name"],
-                "source": card["deck_source"],
-                "url": card["deck_url"],
-                "cards": []
-            }
-
-        card_info = {
-            "name": card["name"],
-            "quantity": card["quantity"],
-            "mana_cost": card["mana_cost"],
-            "type_line": card["type_line"]
-        }
-        decks[deck_id]["cards"].append(card_info)
+def parse_deck_cursor(after: str) -> tuple[str, int]:
+    """Split an "<added_at>,<id>" page cursor; raises ValueError if it isn't one."""
+    added_at, _, deck_id = after.rpartition(",")
+    if not added_at:
+        raise ValueError(f"Invalid deck cursor: {after!r}")
+    return added_at, int(deck_id)
+
+
+def next_deck_cursor(decks: list[dict], limit: int) -> str | None:
+    """Cursor for the page after decks, or None if this was the last page."""
+    if len(decks) < limit:
+        return None
+    return f"{decks[-1]['added_at']},{decks[-1]['id']}"
+
+
+async def get_decks(
+        cursor: aiosqlite.Cursor, after: tuple[str, int] | None = None, limit: int = DECK_PAGE_SIZE
+) -> list[dict]:
+    """
+    The newest decks with at least one known card, newest first, with their cards.
+
+    Pages are keyed on (added_at, id), so a page is a range scan of decks_added_at however
+    many decks come before it. Pass the last deck's (added_at, id) as after for the next page.
+    """
+    # A plain range condition, so the planner seeks into decks_added_at instead of filtering
+    page_condition = "(d.added_at, d.id) < (?, ?) AND" if after is not None else ""
+    await cursor.execute(
+        f"""
+        SELECT d.id, d.name, d.source, d.url, d.added_at
+        FROM decks d
+        WHERE {page_condition} EXISTS (
+            SELECT 1
+            FROM deck_cards dc
+            INNER JOIN scryfall_all_cards c ON dc.card_id = c.id
+            WHERE dc.deck_id = d.id
+        )
+        ORDER BY d.added_at DESC, d.id DESC
+        LIMIT ?
+        """,
+        (*(after or ()), limit),
+    )
+    decks = {row["id"]: {**dict(row), "cards": []} for row in await cursor.fetchall()}
+    if not decks:
+        return []
+
+    placeholders = ",".join("?" * len(decks))
+    await cursor.execute(
+        f"""
+        SELECT dc.deck_id, c.name, dc.quantity, c.mana_cost, c.type_line
+        FROM deck_cards dc
+        INNER JOIN scryfall_all_cards c ON dc.card_id = c.id
+        WHERE dc.deck_id IN ({placeholders})
+          AND c.component IS NOT 'combo_piece'
+        ORDER BY dc.deck_id, dc.id
+        """,
+        list(decks),
+    )
+    for row in await cursor.fetchall():
+        decks[row["deck_id"]]["cards"].append({
+            "name": row["name"],
+            "quantity": row["quantity"],
+            "mana_cost": row["mana_cost"],
+            "type_line": row["type_line"],
+        })
 
     return list(decks.values())
 
 
-async def add_decks_to_db(conn: aiosqlite.Connection, decks: list) -> None:
+def deck_fingerprint(cards: Iterable[tuple[str | None, str, int]]) -> str | None:
+    """
+    Stable hash of a deck's (section, card name, quantity) entries, whatever order they come in.
+
+    Names are compared case-insensitively and repeated entries are summed. None for a deck
+    without cards, so empty decks are never taken for duplicates of each other.
+    """
+    counts = defaultdict(int)
+    for section, name, quantity in cards:
+        counts[(section or "main", name.casefold())] += quantity
+    if not counts:
+        return None
+    digest = hashlib.blake2b(digest_size=16)
+    for (section, name), quantity in sorted(counts.items()):
+        digest.update(f"{section}\t{name}\t{quantity}\n".encode())
+    return digest.hexdigest()
+
+
+async def find_stored_fingerprints(cursor: aiosqlite.Cursor, fingerprints: set[str]) -> set[str]:
+    stored = set()
+    fingerprints = list(fingerprints)
+    for i in range(0, len(fingerprints), SQL_VARIABLE_CHUNK_SIZE):
+        chunk = fingerprints[i:i + SQL_VARIABLE_CHUNK_SIZE]
+        placeholders = ",".join("?" * len(chunk))
+        await cursor.execute(f"SELECT fingerprint FROM decks WHERE fingerprint IN ({placeholders})", chunk)
+        stored.update(row[0] for row in await cursor.fetchall())
+    return stored
+
+
+async def backfill_deck_fingerprints(conn: aiosqlite.Connection) -> int:
+    """Set the fingerprint of stored decks that don't have one yet; returns how many were set."""
+    cursor = await conn.execute(
+        """
+        SELECT dc.deck_id, dc.section, dc.name, dc.quantity
+        FROM decks d
+        INNER JOIN deck_cards dc ON d.id = dc.deck_id
+        WHERE d.fingerprint IS NULL
+        ORDER BY dc.deck_id
+        """
+    )
+    rows = await cursor.fetchall()
+    updates = [
+        (deck_fingerprint((section, name, quantity) for _, section, name, quantity in deck_cards), deck_id)
+        for deck_id, deck_cards in itertools.groupby(rows, key=lambda row: row[0])
+    ]
+    await conn.executemany("UPDATE decks SET fingerprint = ? WHERE id = ?", updates)
+    await conn.commit()
+    return len(updates)
+
+
+async def compact_duplicate_decks(conn: aiosqlite.Connection, dry_run: bool = False) -> list[int]:
+    """Delete decks with the same fingerprint as an older deck, keeping the oldest; returns the deleted ids."""
+    await backfill_deck_fingerprints(conn)
+    cursor = await conn.execute(
+        """
+        SELECT d.id
+        FROM decks d
+        WHERE d.fingerprint IS NOT NULL
+          AND d.id > (SELECT MIN(id) FROM decks WHERE fingerprint = d.fingerprint)
+        ORDER BY d.id
+        """
+    )
+    duplicate_ids = [row[0] for row in await cursor.fetchall()]
+    if dry_run or not duplicate_ids:
+        return duplicate_ids
+
+    rows = [(deck_id,) for deck_id in duplicate_ids]
+    await conn.executemany("DELETE FROM deck_cards WHERE deck_id = ?", rows)
+    await conn.executemany("DELETE FROM decks WHERE id = ?", rows)
+    await bump_deck_generation(await conn.cursor())
+    await conn.commit()
+    logger.info("Removed duplicate decks", extra={"count": len(duplicate_ids)})
+    return duplicate_ids
+
+
+async def resolve_card_ids(cursor: aiosqlite.Cursor, names: set[str]) -> dict[str, str]:
+    """scryfall_all_cards ids by card name, falling back to printed and flavor names."""
+    card_ids = {}
+    names = list(names)
+    for i in range(0, len(names), SQL_VARIABLE_CHUNK_SIZE):
+        chunk = names[i:i + SQL_VARIABLE_CHUNK_SIZE]
+        placeholders = ",".join("?" * len(chunk))
+        await cursor.execute(
+            f"SELECT name, id FROM scryfall_all_cards WHERE name IN ({placeholders}) ORDER BY rowid", chunk
+        )
+        for name, card_id in await cursor.fetchall():
+            card_ids.setdefault(name, card_id)
+
+    # Case-insensitive like the LIKE lookup it replaces, for names the API gives in another form
+    unresolved = {name.lower(): name for name in names if name not in card_ids}
+    lowered = list(unresolved)
+    for i in range(0, len(lowered), SQL_VARIABLE_CHUNK_SIZE // 2):
+        chunk = lowered[i:i + SQL_VARIABLE_CHUNK_SIZE // 2]
+        placeholders = ",".join("?" * len(chunk))
+        await cursor.execute(
+            f"""
+            SELECT lower(printed_name), lower(flavor_name), id FROM scryfall_all_cards
+            WHERE lower(printed_name) IN ({placeholders}) OR lower(flavor_name) IN ({placeholders})
+            ORDER BY rowid
+            """,
+            chunk + chunk,
+        )
+        for printed_name, flavor_name, card_id in await cursor.fetchall():
+            for alias in (printed_name, flavor_name):
+                if alias in unresolved:
+                    card_ids.setdefault(unresolved[alias], card_id)
+
+    return card_ids
+
+
+async def add_decks_to_db(
+        conn: aiosqlite.Connection, decks: list, batch_size: int = DECK_INSERT_BATCH_SIZE
+) -> list[str]:
+    """
+    Insert decks and their cards, one transaction per batch; returns the URLs of the decks added.
+
+    Called inside an open transaction, the batches join it and the caller commits, so it can
+    record what was added in the same commit.
+    """
+    decks = [deck for deck in decks if not deck.get("error")]
+    added_urls = []
+    for i in range(0, len(decks), batch_size):
+        added_urls += await _add_deck_batch(conn, decks[i:i + batch_size])
+    return added_urls
+
+
+async def _add_deck_batch(conn: aiosqlite.Connection, decks: list) -> list[str]:
+    start = time.perf_counter()
     cursor = await conn.cursor()
+    card_ids = await resolve_card_ids(cursor, {card["name"] for deck in decks for card in deck.get("cards", [])})
+    missing = {card["name"] for deck in decks for card in deck.get("cards", [])} - card_ids.keys()
+    if missing:
+        logger.warning("Cards not found in database", extra={"count": len(missing), "names": sorted(missing)[:20]})
 
-    for deck in decks:
-        if deck.get("error"):
-            print(f"Skipping deck {deck['name']} due to error: {deck['error']}")
-            continue
+    # Same entries as the deck_cards rows below, so backfilled fingerprints match
+    fingerprints = [
+        deck_fingerprint(
+            ("main", card["name"], card.get("qty", 1)) for card in deck.get("cards", []) if card["name"] in card_ids
+        )
+        for deck in decks
+    ]
 
-        try:
-            await cursor.execute(
-                "INSERT INTO decks (name, source, url, added_at) VALUES (?, ?, ?, ?)",
-                (deck["name"], "untapped", deck["url"], datetime.now())
-            )
-            await conn.commit()
-        except aiosqlite.IntegrityError:
-            print(f"Deck {deck['name']} already exists in database")
-            continue
-        except Exception as e:
-            print(f"Error adding deck {deck['name']} to database: {e}")
-            continue
-
-        deck_id = cursor.lastrowid
-
-        for card in deck.get("cards", []):
-            await cursor.execute(
-                "SELECT id FROM scryfall_all_cards WHERE name = ?",
-                (card["name"],)
-            )
-            result = await cursor.fetchone()
-
-            if not result:
-                print(f"Card {card['name']} not found in database")
-                await cursor.execute(
-                    "SELECT id FROM scryfall_all_cards WHERE printed_name LIKE ? OR flavor_name LIKE ?",
-                    (card["name"], card["name"]))
-                result = await cursor.fetchone()
-
-            card_id = result[0]
-            await cursor.execute(
-                "INSERT OR IGNORE INTO deck_cards (deck_id, card_id, quantity, name, section) VALUES (?, ?, ?, ?, ?)",
-                (deck_id, card_id, card.get("qty", 1), card["name"], "main")
+    owns_transaction = not conn.in_transaction
+    if owns_transaction:
+        # Holds the write lock, so the ids below can't be taken by another connection
+        await cursor.execute("BEGIN IMMEDIATE")
+    try:
+        seen = await find_stored_fingerprints(cursor, {fingerprint for fingerprint in fingerprints if fingerprint})
+        await cursor.execute("SELECT COALESCE(MAX(id), 0) FROM decks")
+        (last_id,) = await cursor.fetchone()
+        added_at = datetime.now()
+        deck_rows = []
+        card_rows = []
+        duplicates = 0
+        for deck, fingerprint in zip(decks, fingerprints):
+            if fingerprint in seen:
+                duplicates += 1
+                continue
+            if fingerprint:
+                seen.add(fingerprint)
+            deck_id = last_id + len(deck_rows) + 1
+            deck_rows.append((deck_id, deck["name"], "untapped", deck["url"], added_at, fingerprint))
+            card_rows.extend(
+                (deck_id, card_ids[card["name"]], card.get("qty", 1), card["name"], "main")
+                for card in deck.get("cards", [])
+                if card["name"] in card_ids
             )
+
+        await cursor.executemany(
+            "INSERT INTO decks (id, name, source, url, added_at, fingerprint) VALUES (?, ?, ?, ?, ?, ?)", deck_rows
+        )
+        await cursor.executemany(
+            "INSERT OR IGNORE INTO deck_cards (deck_id, card_id, quantity, name, section) VALUES (?, ?, ?, ?, ?)",
+            card_rows,
+        )
+        if deck_rows:
+            await bump_deck_generation(cursor)
+        if owns_transaction:
             await conn.commit()
+    except Exception:
+        if owns_transaction:
+            await conn.rollback()
+        raise
+
+    elapsed = time.perf_counter() - start
+    logger.info(
+        "Added decks",
+        extra={
+            "decks": len(deck_rows),
+            "duplicates": duplicates,
+            "cards": len(card_rows),
+            "duration_ms": round(elapsed * 1000, 2),
+            "decks_per_second": round(len(deck_rows) / elapsed, 1) if elapsed else None,
+        },
+    )
+    return [row[3] for row in deck_rows]
@@ -0,0 +1,139 @@
+import logging
+import time
+from typing import Any
+
+import aiosqlite
+import httpx
+
+from app.config import HTTP_CACHE_TTL_SECONDS, HTTP_CACHE_MAX_BYTES
+from app.metrics import http_cache_requests
+from app.utils.http import RateLimitedFetcher
+
+logger = logging.getLogger(__name__)
+
+
+def parse_max_age(cache_control: str | None) -> tuple[float | None, bool]:
+    """The max-age from a Cache-Control header, and whether the response may be stored at all."""
+    if not cache_control:
+        return None, True
+    max_age = None
+    for directive in cache_control.lower().split(","):
+        name, _, value = directive.strip().partition("=")
+        if name == "no-store":
+            return None, False
+        if name == "no-cache":
+            max_age = 0.0
+        elif name == "max-age" and max_age is None:
+            try:
+                max_age = float(value.strip('"'))
+            except ValueError:
+                pass
+    return max_age, True
+
+
+class ResponseCache:
+    """
+    Response bodies stored in the http_cache table, keyed by URL.
+
+    Fresh entries are served without a request. Stale entries are revalidated with
+    If-None-Match / If-Modified-Since when the server sent an ETag or Last-Modified, and
+    refetched otherwise. evict() trims the least recently used entries once the bodies add
+    up to more than max_bytes.
+    """
+
+    def __init__(
+            self,
+            conn: aiosqlite.Connection,
+            ttl: float = HTTP_CACHE_TTL_SECONDS,
+            max_bytes: int = HTTP_CACHE_MAX_BYTES,
+    ):
+        self.conn = conn
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+    async def get(self, fetcher: RateLimitedFetcher, url: str, **kwargs: Any) -> bytes:
+        """Body of a GET, from the cache when possible; params are part of the key."""
+        params = kwargs.pop("params", None)
+        key = str(httpx.URL(url, params=params))
+        now = time.time()
+
+        cursor = await self.conn.execute(
+            "SELECT body, etag, last_modified, expires_at FROM http_cache WHERE url = ?", (key,)
+        )
+        entry = await cursor.fetchone()
+
+        if entry is not None and entry["expires_at"] > now:
+            await self._touch(key, now)
+            http_cache_requests.inc(result="hit")
+            return entry["body"]
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = await fetcher.get(key, headers=headers, **kwargs)
+
+        if response.status_code == httpx.codes.NOT_MODIFIED and entry is not None:
+            max_age, _ = parse_max_age(response.headers.get("Cache-Control"))
+            await self.conn.execute(
+                "UPDATE http_cache SET expires_at = ?, last_used_at = ? WHERE url = ?",
+                (now + (self.ttl if max_age is None else max_age), now, key),
+            )
+            await self.conn.commit()
+            http_cache_requests.inc(result="revalidated")
+            return entry["body"]
+
+        http_cache_requests.inc(result="miss")
+        await self._store(key, response, now)
+        return response.content
+
+    async def _touch(self, key: str, now: float) -> None:
+        await self.conn.execute("UPDATE http_cache SET last_used_at = ? WHERE url = ?", (now, key))
+        await self.conn.commit()
+
+    async def _store(self, key: str, response: httpx.Response, now: float) -> None:
+        max_age, storable = parse_max_age(response.headers.get("Cache-Control"))
+        if response.status_code != httpx.codes.OK or not storable:
+            return
+
+        body = response.content
+        await self.conn.execute(
+            """
+            INSERT OR REPLACE INTO http_cache
+                (url, body, etag, last_modified, size, fetched_at, expires_at, last_used_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                key,
+                body,
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+                len(body),
+                now,
+                now + (self.ttl if max_age is None else max_age),
+                now,
+            ),
+        )
+        await self.conn.commit()
+
+    async def evict(self) -> None:
+        """Drop the least recently used entries beyond max_bytes; run after a batch of fetches."""
+        cursor = await self.conn.execute(
+            """
+            DELETE FROM http_cache
+            WHERE url IN (
+                SELECT url FROM (
+                    SELECT url, SUM(size) OVER (ORDER BY last_used_at DESC, url) AS running_size
+                    FROM http_cache
+                )
+                WHERE running_size > ?
+            )
+            """,
+            (self.max_bytes,),
+        )
+        await self.conn.commit()
+        if cursor.rowcount > 0:
+            logger.info("Evicted cached responses", extra={"count": cursor.rowcount})
@@ -0,0 +1,200 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime
+
+import aiosqlite
+
+from app.config import IMPORT_WORKERS, IMPORT_CHUNK_SIZE, IMPORT_PAUSE_WHILE_LIVE_SECONDS
+from app.database import get_db
+from app.metrics import live_update_subscribers
+from app.services.decks import add_decks_to_db
+from app.services.http_cache import ResponseCache
+from app.services.untapped import fetch_untapped_decks_from_api, skip_stored_decks
+from app.utils.http import RateLimitedFetcher
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ("done", "failed")
+
+
+async def get_job(conn: aiosqlite.Connection, job_id: int) -> dict | None:
+    cursor = await conn.execute(
+        "SELECT id, kind, status, total, done, skipped, failed, error, created_at, updated_at FROM import_jobs WHERE id = ?",
+        (job_id,),
+    )
+    row = await cursor.fetchone()
+    return dict(row) if row else None
+
+
+class ImportJobQueue:
+    """
+    Deck imports run in the background by a few worker tasks.
+
+    Jobs and their decks are stored in SQLite, so a restart picks up the decks that had not
+    been imported yet. Decks whose URL is already stored are skipped without a request, decks
+    with the same cards as a stored one are skipped once fetched, and API responses go through
+    the http_cache table. Workers import in chunks and publish the job after each one to
+    anyone watching it.
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue[int] = asyncio.Queue()
+        self._workers: list[asyncio.Task] = []
+        self._subscribers: dict[int, set[asyncio.Queue]] = defaultdict(set)
+        self._fetcher: RateLimitedFetcher | None = None
+
+    async def start(self, fetcher: RateLimitedFetcher, workers: int = IMPORT_WORKERS) -> None:
+        # Shared by every worker, so the rate limits hold across chunks and jobs
+        self._fetcher = fetcher
+        conn = await get_db()
+        try:
+            cursor = await conn.execute(
+                "SELECT id FROM import_jobs WHERE status NOT IN (?, ?) ORDER BY id", FINISHED_STATUSES
+            )
+            unfinished = [row["id"] for row in await cursor.fetchall()]
+        finally:
+            await conn.close()
+
+        if unfinished:
+            logger.info("Resuming import jobs", extra={"job_ids": unfinished})
+        for job_id in unfinished:
+            self._queue.put_nowait(job_id)
+        self._workers = [asyncio.create_task(self._work()) for _ in range(workers)]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(
+            self, conn: aiosqlite.Connection, kind: str, untapped_decks: list, cookies: dict | None
+    ) -> int:
+        now = datetime.now()
+        cursor = await conn.cursor()
+        await cursor.execute(
+            "INSERT INTO import_jobs (kind, status, cookies, total, created_at, updated_at) VALUES (?, 'queued', ?, ?, ?, ?)",
+            (kind, json.dumps(cookies) if cookies else None, len(untapped_decks), now, now),
+        )
+        job_id = cursor.lastrowid
+        await cursor.executemany(
+            "INSERT INTO import_job_items (job_id, name, url, api_url, status) VALUES (?, ?, ?, ?, 'pending')",
+            [(job_id, name, url, api_url) for name, url, api_url in untapped_decks],
+        )
+        await conn.commit()
+
+        logger.info("Import job queued", extra={"job_id": job_id, "kind": kind, "total": len(untapped_decks)})
+        self._queue.put_nowait(job_id)
+        return job_id
+
+    async def watch(self, conn: aiosqlite.Connection, job_id: int):
+        """Yield the job now and after every change, until it finishes."""
+        updates: asyncio.Queue = asyncio.Queue()
+        self._subscribers[job_id].add(updates)
+        try:
+            job = await get_job(conn, job_id)
+            while job is not None:
+                yield job
+                if job["status"] in FINISHED_STATUSES:
+                    break
+                job = await updates.get()
+        finally:
+            self._subscribers[job_id].discard(updates)
+            if not self._subscribers[job_id]:
+                del self._subscribers[job_id]
+
+    def _publish(self, job: dict) -> None:
+        for updates in self._subscribers.get(job["id"], ()):
+            updates.put_nowait(job)
+
+    async def _set_status(self, conn: aiosqlite.Connection, job_id: int, status: str, error: str | None = None) -> None:
+        await conn.execute(
+            "UPDATE import_jobs SET status = ?, error = COALESCE(?, error), updated_at = ? WHERE id = ?",
+            (status, error, datetime.now(), job_id),
+        )
+        await conn.commit()
+        self._publish(await get_job(conn, job_id))
+
+    async def _work(self) -> None:
+        conn = await get_db()
+        try:
+            while True:
+                job_id = await self._queue.get()
+                try:
+                    await self._run(conn, job_id)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.exception("Import job failed", extra={"job_id": job_id})
+                    await self._set_status(conn, job_id, "failed", str(e))
+                finally:
+                    self._queue.task_done()
+        finally:
+            await conn.close()
+
+    async def _run(self, conn: aiosqlite.Connection, job_id: int) -> None:
+        cursor = await conn.execute("SELECT cookies FROM import_jobs WHERE id = ?", (job_id,))
+        row = await cursor.fetchone()
+        if row is None:
+            return
+        cookies = json.loads(row["cookies"]) if row["cookies"] else None
+        cache = ResponseCache(conn)
+        await self._set_status(conn, job_id, "running")
+
+        while True:
+            cursor = await conn.execute(
+                "SELECT id, name, url, api_url FROM import_job_items WHERE job_id = ? AND status = 'pending' ORDER BY id LIMIT ?",
+                (job_id, IMPORT_CHUNK_SIZE),
+            )
+            items = [dict(row) for row in await cursor.fetchall()]
+            if not items:
+                break
+
+            untapped_decks = [(item["name"], item["url"], item["api_url"]) for item in items]
+            untapped_decks = await skip_stored_decks(await conn.cursor(), untapped_decks)
+            decks = await fetch_untapped_decks_from_api(
+                cursor=await conn.cursor(),
+                cookies=cookies,
+                untapped_decks=untapped_decks,
+                fetcher=self._fetcher,
+                cache=cache,
+            )
+            errors = {deck["url"]: deck["error"] for deck in decks if deck.get("error")}
+            failed = [(errors[item["url"]], item["id"]) for item in items if item["url"] in errors]
+
+            # The decks, the item statuses and the job's counts go in one commit, so a crash can't
+            # leave decks stored while their items stay pending
+            await conn.execute("BEGIN IMMEDIATE")
+            try:
+                added = set(await add_decks_to_db(conn, decks))
+                # Already stored URLs and decks matching a stored one are skipped; a URL listed twice
+                # is done once
+                statuses = []
+                for item in items:
+                    if item["url"] in errors:
+                        continue
+                    statuses.append(("done" if item["url"] in added else "skipped", item["id"]))
+                    added.discard(item["url"])
+                done = sum(1 for status, _ in statuses if status == "done")
+                await conn.executemany("UPDATE import_job_items SET status = 'failed', error = ? WHERE id = ?", failed)
+                await conn.executemany("UPDATE import_job_items SET status = ? WHERE id = ?", statuses)
+                await conn.execute(
+                    "UPDATE import_jobs SET done = done + ?, skipped = skipped + ?, failed = failed + ?, updated_at = ? WHERE id = ?",
+                    (done, len(statuses) - done, len(failed), datetime.now(), job_id),
+                )
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+            self._publish(await get_job(conn, job_id))
+
+            # Leave the event loop and the database to open live update streams between chunks
+            await asyncio.sleep(IMPORT_PAUSE_WHILE_LIVE_SECONDS if live_update_subscribers.value > 0 else 0)
+
+        await self._set_status(conn, job_id, "done")
+        logger.info("Import job finished", extra={"job_id": job_id})
+
+
+import_jobs = ImportJobQueue()
@@ -1,10 +1,14 @@
+import json
 import os
 from dataclasses import dataclass, field
 
 from app.config import seventeenlands_log_file_path
 
-log_line_count = 0
-last_processed_log_line_count = 0
+OPPONENT_STATE_MARKER = "::OpponentState::"
+OPPONENT_STATE_VERSION = 1
+
+# How far back from the end of the log to look for a snapshot to start from
+SNAPSHOT_SEARCH_BYTES = 1024 * 1024
 
 
 @dataclass
@@ -12,6 +16,10 @@ class LogState:
     cards_log: list[str] = field(default_factory=list)
     actions_log: list[dict] = field(default_factory=list)
     annotations_log: list[dict] = field(default_factory=list)
+    # Latest applied record's trace id, and the write time of the oldest change not yet rendered
+    trace_id: str | None = None
+    trace_origin: float | None = None
+    match_id: str | None = None
 
     def has_cards(self) -> bool:
         return bool(self.cards_log)
@@ -30,117 +38,143 @@ class LogState:
 
 
 class LogEntry:
-    def __init__(self):
-        self._cards_log: list[str] | None = None
-        self._actions_log: list[dict] | None = None
-        self._annotations_log: list[dict] | None = None
-        self.file_handle = None
+    """
+    Opponent state rebuilt from the follower's ::OpponentState:: records.
 
-        if self.file_handle is None and seventeenlands_log_file_path.exists():
-            self.file_handle = open(seventeenlands_log_file_path, 'rb')
-            self.file_handle.seek(0, os.SEEK_END)
+    Snapshots replace the state and deltas patch it. A delta only applies on top of the record
+    before it, so after a gap the state waits for the next snapshot.
+    """
 
-        if self.file_handle:
-            self.file_handle.seek(-2, os.SEEK_END)
-            while self.file_handle.read(1) != b'\n':
-                if self.file_handle.tell() == 1:
-                    self.file_handle.seek(0)
-                    break
-                self.file_handle.seek(-2, os.SEEK_CUR)
+    def __init__(self):
+        self._cards: dict[int, int] = {}
+        self._actions: dict[tuple, dict] = {}
+        self._annotations: list[dict] = []
+        self._seq: int | None = None
+        self._trace_id: str | None = None
+        self._trace_origin: float | None = None
+        self._match_id: str | None = None
+        self.file_handle = None
+        self._file_id: tuple[int, int] | None = None
+        self._partial_line = b""
+
+        if seventeenlands_log_file_path.exists():
+            self._open(from_last_snapshot=True)
+
+    def _open(self, from_last_snapshot: bool) -> None:
+        if self.file_handle is not None:
+            self.file_handle.close()
+        self.file_handle = open(seventeenlands_log_file_path, 'rb')
+        stat = os.fstat(self.file_handle.fileno())
+        self._file_id = (stat.st_dev, stat.st_ino)
+        self._partial_line = b""
+
+        if from_last_snapshot:
+            start = max(0, stat.st_size - SNAPSHOT_SEARCH_BYTES)
+            self.file_handle.seek(start)
+            tail = self.file_handle.read()
+            snapshot_at = tail.rfind(b'"type":"snapshot"')
+            if snapshot_at == -1:
+                self.file_handle.seek(0, os.SEEK_END)
+            else:
+                self.file_handle.seek(start + tail.rfind(b'\n', 0, snapshot_at) + 1)
+
+    def _check_rotated(self) -> None:
+        try:
+            stat = seventeenlands_log_file_path.stat()
+        except FileNotFoundError:
+            return
+        if self.file_handle is None:
+            self._open(from_last_snapshot=False)
+        elif (stat.st_dev, stat.st_ino) != self._file_id or stat.st_size < self.file_handle.tell():
+            # The log was rotated or truncated; the new file holds only newer records
+            self._open(from_last_snapshot=False)
+
+    def read_new_lines(self) -> list[str]:
+        self._check_rotated()
+        if self.file_handle is None:
+            return []
+
+        data = self.file_handle.read()
+        if not data:
+            return []
+        lines = (self._partial_line + data).split(b'\n')
+        self._partial_line = lines.pop()
+        return [line.decode('utf-8', errors='replace') for line in lines]
 
     @property
     def cards_log(self) -> list[str] | None:
-        return self._cards_log
+        return [str(card_id) for card_id in self._cards.values()] if self._cards else None
 
     @property
     def actions_log(self) -> list[dict] | None:
-        return self._actions_log
+        return list(self._actions.values()) if self._actions else None
 
     @property
     def annotations_log(self) -> list[dict] | None:
-        return self._annotations_log
+        return self._annotations or None
 
     async def get_current_state(self) -> LogState:
-        return LogState(
-            cards_log=self._cards_log or [],
-            actions_log=self._actions_log or [],
-            annotations_log=self._annotations_log or [],
+        state = LogState(
+            cards_log=self.cards_log or [],
+            actions_log=self.actions_log or [],
+            annotations_log=self.annotations_log or [],
+            trace_id=self._trace_id,
+            trace_origin=self._trace_origin,
+            match_id=self._match_id,
         )
+        self._trace_origin = None
+        return state
 
     def reset(self) -> None:
-        self._cards_log = None
-        self._actions_log = None
-        self._annotations_log = None
+        self._cards = {}
+        self._actions = {}
+        self._annotations = []
+        self._seq = None
+        self._trace_id = None
+        self._trace_origin = None
 
     def reset_cards(self) -> None:
-        self._cards_log = None
+        self._cards = {}
 
     def reset_actions(self) -> None:
-        self._actions_log = None
+        self._actions = {}
 
     def reset_annotations(self) -> None:
-        self._annotations_log = None
-
-    async def parse_opponent_log_line(self, log_line: str) -> None:
-        import jsonpickle
+        self._annotations = []
+
+    def apply_record(self, record: dict) -> bool:
+        if record.get("v") != OPPONENT_STATE_VERSION:
+            return False
+
+        seq = record.get("seq")
+        if record.get("type") == "snapshot":
+            self._cards = {}
+            self._actions = {}
+            self._annotations = []
+            self._match_id = record.get("match_id")
+        elif self._seq is None or seq != self._seq + 1:
+            return False
+        self._seq = seq
+
+        for instance_id, card_id in record.get("cards", []):
+            self._cards[instance_id] = card_id
+        for instance_id, action_type in record.get("actions_removed", []):
+            self._actions.pop((instance_id, action_type), None)
+        for action in record.get("actions", []):
+            self._actions[(action.get("instanceId"), action.get("actionType"))] = action
+        self._annotations.extend(record.get("annotations", []))
+
+        self._trace_id = record.get("trace")
+        if self._trace_origin is None:
+            self._trace_origin = record.get("ts")
+        return True
+
+    async def parse_opponent_log_line(self, log_line: str) -> bool:
         try:
-            if "::Opponent::" not in log_line:
-                return
-
-            content = log_line.split("::Opponent::")[1].strip()
-            parts = [p.strip() for p in content.split(" | ")]
-
-            for part in parts:
-                if part.startswith("cards="):
-                    arena_ids_str = part[6:].strip("[]")
-                    self._cards_log = [id.strip() for id in arena_ids_str.split(", ") if id.strip()]
-                elif part.startswith("actions="):
-                    actions_str = part[8:]
-                    self._actions_log = jsonpickle.decode(actions_str)
-                elif part.startswith("annotations="):
-                    annotations_str = part[12:]
-                    self._annotations_log = jsonpickle.decode(annotations_str)
-        except (IndexError, AttributeError, ValueError):
-            pass
-
-
-async def get_last_log_line() -> str | None:
-    global log_line_count
-    try:
-        if not seventeenlands_log_file_path.exists():
-            return None
-
-        with open(seventeenlands_log_file_path, 'rb') as file:
-            log_line_count = sum(1 for _ in file)
-
-            file.seek(0, os.SEEK_END)
-            file_size = file.tell()
-
-            if file_size == 0:
-                return None
-
-            file.seek(-2, os.SEEK_END)
-            while file.read(1) != b'\n':
-                if file.tell() == 1:
-                    file.seek(0)
-                    break
-                file.seek(-2, os.SEEK_CUR)
-
-            last_line = file.readline().decode('utf-8').strip()
-            return last_line
-    except Exception as e:
-        print(f"Error reading log file: {e}")
-        return None
-
-
-async def get_log_line_count() -> int:
-    return log_line_count
-
-
-async def get_last_processed_count() -> int:
-    return last_processed_log_line_count
-
+            if OPPONENT_STATE_MARKER not in log_line:
+                return False
 
-async def set_last_processed_count(count: int) -> None:
-    global last_processed_log_line_count
-    last_processed_log_line_count = count
\ No newline at end of file
+            content = log_line.split(OPPONENT_STATE_MARKER, 1)[1]
+            return self.apply_record(json.loads(content))
+        except (IndexError, AttributeError, TypeError, ValueError):
+            return False
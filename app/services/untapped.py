@@ -1,47 +1,33 @@
 import aiosqlite
 import asyncio
+import json
+import logging
 from collections import namedtuple
 from datetime import datetime
 
-from app.services.decks import add_decks_to_db
+import httpx
 
+from app.config import (
+    UNTAPPED_API_BASE_URL,
+    UNTAPPED_CONCURRENCY,
+    UNTAPPED_REQUESTS_PER_SECOND,
+    UNTAPPED_BURST,
+)
+from app.executors import process_pool
+from app.services.http_cache import ResponseCache
+from app.utils.http import RateLimitedFetcher, create_http_client
+from app.utils.untapped_html import extract_untapped_page
 
-async def parse_untapped_html(html_doc: str):
-    from bs4 import BeautifulSoup
-    import jsonpickle
+logger = logging.getLogger(__name__)
 
-    result = {}
-    soup = BeautifulSoup(html_doc, 'html.parser')
 
-    _next_data_raw = soup.find("script", type="application/json", id="__NEXT_DATA__")
-    if not _next_data_raw:
-        raise ValueError("Could not find __NEXT_DATA__ script tag in HTML")
-
-    _next_data_dict = jsonpickle.decode(_next_data_raw.string)
-
-    _cookie_header = _next_data_dict.get("props", {}).get("cookieHeader", "")
-    if not _cookie_header:
-        raise ValueError("No cookieHeader found in __NEXT_DATA__")
-
-    _cookie_header = _cookie_header.split(";")
-    result["cookies"] = {}
-    for cookie in _cookie_header:
-        if "sessionid" in cookie:
-            result["cookies"]["session_id"] = cookie.split("=")[1].strip()
-        if "csrftoken" in cookie:
-            result["cookies"]["csrf_token"] = cookie.split("=")[1].strip()
-
-    _deck_tags = soup.find_all("a", class_="sc-bf50840f-1 ptaNk")
-    result["deck_urls"] = list(set([dt.get("href") for dt in _deck_tags if dt.get("href")]))
-
-    if not result["deck_urls"]:
-        raise ValueError("No deck URLs found in HTML")
-
-    return result
+async def parse_untapped_html(html_doc: str) -> dict:
+    # A few MB of regex scanning and JSON decoding, kept off the event loop
+    return await process_pool.run(extract_untapped_page, html_doc)
 
 
 async def build_untapped_decks_api_urls(deck_urls: list) -> list[tuple[str, str, str]]:
-    base_api_url = "https://api.mtga.untapped.gg/api/v1/decks/pricing/cardkingdom/"
+    base_api_url = UNTAPPED_API_BASE_URL
     UntappedDeck = namedtuple("Deck", ["name", "url", "api_url"])
     untapped_decks = []
     for deck_url in deck_urls:
@@ -52,10 +38,66 @@ async def build_untapped_decks_api_urls(deck_urls: list) -> list[tuple[str, str,
     return untapped_decks
 
 
-async def fetch_untapped_decks_from_api(cursor: aiosqlite.Cursor, cookies: dict | None, untapped_decks: list) -> list[
-    dict]:
-    import httpx
-
+async def skip_stored_decks(cursor: aiosqlite.Cursor, untapped_decks: list) -> list:
+    """Drop decks whose URL is already in decks, before anything is fetched for them."""
+    urls = list({untapped_deck[1] for untapped_deck in untapped_decks})
+    if not urls:
+        return []
+    placeholders = ",".join("?" * len(urls))
+    await cursor.execute(f"SELECT url FROM decks WHERE url IN ({placeholders})", urls)
+    stored = {row[0] for row in await cursor.fetchall()}
+    return [untapped_deck for untapped_deck in untapped_decks if untapped_deck[1] not in stored]
+
+
+async def fetch_untapped_deck(
+        fetcher: RateLimitedFetcher,
+        cookies: dict,
+        params: dict,
+        untapped_deck,
+        cache: ResponseCache | None = None,
+) -> dict:
+    name, url, api_url = untapped_deck
+    try:
+        if cache is not None:
+            content = await cache.get(fetcher, api_url, cookies=cookies, params=params)
+        else:
+            content = (await fetcher.get(api_url, cookies=cookies, params=params)).content
+        deck = {
+            "name": name,
+            "url": url,
+            "api_url": api_url,
+            "cards": json.loads(content)
+        }
+        logger.info("Fetched deck", extra={"deck_name": name})
+        return deck
+    except httpx.HTTPStatusError as e:
+        logger.error("HTTP error fetching deck", extra={"deck_name": name, "status_code": e.response.status_code})
+        return {"name": name, "url": url, "cards": [], "error": str(e)}
+    except httpx.RequestError as e:
+        logger.error("Request failed fetching deck", extra={"deck_name": name, "error": str(e)})
+        return {"name": name, "url": url, "cards": [], "error": str(e)}
+    except ValueError as e:
+        logger.error("JSON decode failed for deck", extra={"deck_name": name, "error": str(e)})
+        return {"name": name, "url": url, "cards": [], "error": "Invalid JSON"}
+
+
+def create_untapped_fetcher(client: httpx.AsyncClient) -> RateLimitedFetcher:
+    """The fetcher for untapped.gg; share one so every import counts against the same limits."""
+    return RateLimitedFetcher(
+        client,
+        concurrency=UNTAPPED_CONCURRENCY,
+        rate=UNTAPPED_REQUESTS_PER_SECOND,
+        burst=UNTAPPED_BURST,
+    )
+
+
+async def fetch_untapped_decks_from_api(
+        cursor: aiosqlite.Cursor,
+        cookies: dict | None,
+        untapped_decks: list,
+        fetcher: RateLimitedFetcher | None = None,
+        cache: ResponseCache | None = None,
+) -> list[dict]:
     if not cookies:
         await cursor.execute("SELECT session_id, csrf_token FROM user_info ORDER BY added_at DESC LIMIT 1")
         cookies_row = await cursor.fetchone()
@@ -68,73 +110,35 @@ async def fetch_untapped_decks_from_api(cursor: aiosqlite.Cursor, cookies: dict
         "format": "json"
     }
 
-    decks = []
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        for name, url, api_url in untapped_decks:
-            try:
-                response = await client.get(api_url, cookies=cookies, params=params)
-                response.raise_for_status()
-                deck = {
-                    "name": name,
-                    "url": url,
-                    "api_url": api_url,
-                    "cards": response.json()
-                }
-                decks.append(deck)
-                print(f"Fetched deck: {name}")
-                await asyncio.sleep(2)
-
-
-            # TODO: use logger
-            except httpx.HTTPStatusError as e:
-                print(f"HTTP error for {name}: {e.response.status_code}")
-                decks.append({"name": name, "url": url, "cards": [], "error": str(e)})
-            except httpx.RequestError as e:
-                print(f"Request failed for {name}: {e}")
-                decks.append({"name": name, "url": url, "cards": [], "error": str(e)})
-            except ValueError as e:
-                print(f"JSON decode failed for {name}: {e}")
-                decks.append({"name": name, "url": url, "cards": [], "error": "Invalid JSON"})
-
-    return decks
-
-
-async def fetch_untapped_decks_from_html(cursor: aiosqlite.Cursor, data: dict) -> list[dict]:
-    cookies = data.get("cookies", {})
-    if not cookies:
-        raise ValueError("No cookies provided for API requests")
-
-    untapped_decks = await build_untapped_decks_api_urls(data["deck_urls"])
-
-    cookies = {
-        "session_id": data["cookies"]["session_id"],
-        "csrf_token": data["cookies"]["csrf_token"],
-    }
-
-    try:
-        decks = await fetch_untapped_decks_from_api(cursor=cursor, cookies=cookies, untapped_decks=untapped_decks)
-    except Exception as e:
-        decks = []
+    if fetcher is None:
+        async with create_http_client() as client:
+            return await fetch_untapped_decks_from_api(
+                cursor, cookies, untapped_decks, create_untapped_fetcher(client), cache
+            )
 
+    # gather keeps the decks in the order they were given
+    decks = list(await asyncio.gather(
+        *(fetch_untapped_deck(fetcher, cookies, params, untapped_deck, cache) for untapped_deck in untapped_decks)
+    ))
+    if cache is not None:
+        await cache.evict()
     return decks
 
 
-async def add_decks_by_html(conn: aiosqlite.Connection, data: dict) -> None:
+async def save_untapped_session(conn: aiosqlite.Connection, data: dict) -> bool:
+    """Store the untapped.gg session from a parsed page; False if it was already stored."""
     cursor = await conn.cursor()
+    session_id = data["cookies"]["session_id"]
+    csrf_token = data["cookies"]["csrf_token"]
+    await cursor.execute("SELECT id FROM user_info where session_id = ? and csrf_token = ?", (session_id, csrf_token))
+    user_info = await cursor.fetchone()
+    if user_info:
+        return False
+
+    await cursor.execute(
+        "INSERT INTO user_info (session_id, csrf_token, added_at) VALUES (?, ?, ?)",
+        (session_id, csrf_token, datetime.now())
+    )
+    await conn.commit()
+    return True
 
-    try:
-        session_id = data["cookies"]["session_id"]
-        csrf_token = data["cookies"]["csrf_token"]
-        await cursor.execute("SELECT id FROM user_info where session_id = ? and csrf_token = ?", (session_id, csrf_token))
-        user_info = await cursor.fetchone()
-
-        if not user_info:
-            await cursor.execute(
-                "INSERT INTO user_info (session_id, csrf_token, added_at) VALUES (?, ?, ?)",
-                (session_id, csrf_token, datetime.now())
-            )
-            await conn.commit()
-            decks = await fetch_untapped_decks_from_html(cursor=cursor, data=data)
-            await add_decks_to_db(conn, decks)
-    except Exception as e:
-        print(f"Error adding decks: {e}")
@@ -0,0 +1,126 @@
+import secrets
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from app.config import TRACE_BUFFER_SIZE
+from app.metrics import live_update_stage_seconds
+
+
+@dataclass
+class Trace:
+    """
+    One live update, from the follower writing an opponent record to the SSE event being sent.
+
+    Spans are timed from when the app picked the record up; origin is the follower's
+    write time, so latency_ms covers the time the record waited in the log as well.
+    """
+    trace_id: str
+    match_id: str | None = None
+    origin: float | None = None
+    started: float = field(default_factory=time.time)
+    _started_perf: float = field(default_factory=time.perf_counter, repr=False)
+    spans: list[dict] = field(default_factory=list)
+    latency_ms: float | None = None
+
+    def add_span(self, stage: str, start: float, duration: float) -> None:
+        """Record a stage timed with time.perf_counter(), and feed the stage histogram."""
+        live_update_stage_seconds.observe(duration, stage=stage)
+        self.spans.append({
+            "stage": stage,
+            "start_ms": round((start - self._started_perf) * 1000, 3),
+            "duration_ms": round(duration * 1000, 3),
+        })
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(stage, start, time.perf_counter() - start)
+
+    def finish(self) -> None:
+        end = time.time()
+        self.latency_ms = round((end - (self.origin or self.started)) * 1000, 3)
+        traces.record(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "match_id": self.match_id,
+            "origin": self.origin,
+            "started": self.started,
+            "latency_ms": self.latency_ms,
+            "spans": self.spans,
+        }
+
+
+@contextmanager
+def stage_span(trace: Trace | None, stage: str) -> Iterator[None]:
+    """Time a stage into the trace when there is one, and always into the stage histogram."""
+    if trace is not None:
+        with trace.span(stage):
+            yield
+        return
+    with live_update_stage_seconds.time(stage=stage):
+        yield
+
+
+def new_trace_id() -> str:
+    return secrets.token_hex(8)
+
+
+def percentile(sorted_values: list[float], q: float) -> float | None:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class TraceBuffer:
+    """The most recent finished traces, kept in a fixed-size ring."""
+
+    def __init__(self, size: int):
+        self._lock = threading.Lock()
+        self._traces: deque[Trace] = deque(maxlen=size)
+
+    def record(self, trace: Trace) -> None:
+        with self._lock:
+            self._traces.append(trace)
+
+    def recent(self, match_id: str | None = None, limit: int = 100) -> list[dict]:
+        if limit <= 0:
+            return []
+        with self._lock:
+            selected = [t for t in self._traces if match_id is None or t.match_id == match_id]
+        return [t.to_dict() for t in selected[-limit:]]
+
+    def summary(self) -> list[dict]:
+        """End-to-end latency percentiles per match, over the traces still in the buffer."""
+        with self._lock:
+            by_match: dict[str | None, list[float]] = {}
+            for t in self._traces:
+                if t.latency_ms is not None:
+                    by_match.setdefault(t.match_id, []).append(t.latency_ms)
+
+        result = []
+        for match_id, latencies in by_match.items():
+            latencies.sort()
+            result.append({
+                "match_id": match_id,
+                "count": len(latencies),
+                "p50_ms": percentile(latencies, 0.5),
+                "p99_ms": percentile(latencies, 0.99),
+                "max_ms": latencies[-1],
+            })
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._traces.clear()
+
+
+traces = TraceBuffer(TRACE_BUFFER_SIZE)
@@ -0,0 +1,177 @@
+import asyncio
+import email.utils
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.config import (
+    HTTP_TIMEOUT_SECONDS,
+    HTTP_MAX_RETRIES,
+    HTTP_BACKOFF_BASE_SECONDS,
+    HTTP_BACKOFF_MAX_SECONDS,
+    HTTP_MAX_RETRY_AFTER_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+
+def create_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=HTTP_TIMEOUT_SECONDS,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+    )
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header, given either as seconds or as an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """Allows rate requests per second on average, with bursts of up to capacity."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+        # The response that asked for a pause too long to wait out, see RateLimitedFetcher
+        self.refusal: httpx.Response | None = None
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def block_for(self, seconds: float) -> None:
+        """Hold every caller back, e.g. while the server asks clients to back off."""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def blocked_for(self) -> float:
+        return max(0.0, self._blocked_until - time.monotonic())
+
+
+class RateLimitedFetcher:
+    """
+    Fetches through a shared client with bounded concurrency, a token bucket per host and
+    retries with jittered exponential backoff.
+
+    A Retry-After header pauses the whole host, not only the request that got it, since the
+    other in-flight requests would be refused too. A pause longer than
+    HTTP_MAX_RETRY_AFTER_SECONDS fails requests to the host until it is over instead.
+    Share one fetcher for as long as the limits should hold.
+    """
+
+    def __init__(
+            self,
+            client: httpx.AsyncClient,
+            concurrency: int,
+            rate: float,
+            burst: float,
+            max_retries: int = HTTP_MAX_RETRIES,
+            backoff_base: float = HTTP_BACKOFF_BASE_SECONDS,
+            backoff_max: float = HTTP_BACKOFF_MAX_SECONDS,
+    ):
+        self.client = client
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._buckets: dict[str, TokenBucket] = {}
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return self._buckets[host]
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        """GET a URL, retrying transient failures; raises the last error once retries run out."""
+        bucket = self._bucket(url)
+        attempt = 0
+        while True:
+            async with self._semaphore:
+                if bucket.refusal is not None and bucket.blocked_for() > HTTP_MAX_RETRY_AFTER_SECONDS:
+                    raise httpx.HTTPStatusError(
+                        f"{urlsplit(url).netloc} asked to wait {round(bucket.blocked_for())}s before retrying",
+                        request=bucket.refusal.request,
+                        response=bucket.refusal,
+                    )
+                await bucket.acquire()
+                try:
+                    response = await self.client.get(url, **kwargs)
+                except httpx.TransportError as e:
+                    if attempt >= self.max_retries:
+                        raise
+                    delay = self._backoff(attempt)
+                    logger.warning(
+                        "Request failed, retrying",
+                        extra={"url": url, "attempt": attempt + 1, "delay": round(delay, 2), "error": str(e)},
+                    )
+                else:
+                    if response.status_code == httpx.codes.NOT_MODIFIED:
+                        # Answer to a conditional request, the caller has the body
+                        return response
+                    if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                        response.raise_for_status()
+                        return response
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    if retry_after is not None and retry_after > HTTP_MAX_RETRY_AFTER_SECONDS:
+                        # Not worth holding an import open for, but later requests keep off the host
+                        bucket.refusal = response
+                        bucket.block_for(retry_after)
+                        response.raise_for_status()
+                    delay = self._backoff(attempt)
+                    if retry_after is not None:
+                        # Jitter on top, so paused requests don't all come back at once
+                        delay = retry_after + random.uniform(0, self.backoff_base)
+                        bucket.block_for(delay)
+                    logger.warning(
+                        "Retryable response, retrying",
+                        extra={
+                            "url": url,
+                            "status_code": response.status_code,
+                            "attempt": attempt + 1,
+                            "delay": round(delay, 2),
+                        },
+                    )
+            # Sleep outside the semaphore so other hosts' requests can go ahead
+            await asyncio.sleep(delay)
+            attempt += 1
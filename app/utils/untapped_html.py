@@ -0,0 +1,89 @@
+import html
+import json
+import re
+
+# Deck links on untapped.gg deck list pages
+DECK_LINK_CLASSES = frozenset({"sc-bf50840f-1", "ptaNk"})
+
+_SCRIPT_OPEN_RE = re.compile(r"<script\b([^>]*)>", re.IGNORECASE)
+_SCRIPT_CLOSE_RE = re.compile(r"</script\s*>", re.IGNORECASE)
+_ANCHOR_OPEN_RE = re.compile(r"<a\s([^>]*)>", re.IGNORECASE)
+_ATTRIBUTE_RE = re.compile(r"""([^\s"'=<>/]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+)))?""")
+
+
+def parse_attributes(tag_body: str) -> dict[str, str]:
+    """Attributes of a start tag from the text between the tag name and '>'."""
+    attributes = {}
+    for match in _ATTRIBUTE_RE.finditer(tag_body):
+        name, double_quoted, single_quoted, unquoted = match.groups()
+        value = next((v for v in (double_quoted, single_quoted, unquoted) if v is not None), "")
+        attributes.setdefault(name.lower(), html.unescape(value))
+    return attributes
+
+
+def extract_next_data(html_doc: str) -> dict | None:
+    """
+    The JSON in <script id="__NEXT_DATA__">, found by scanning for script tags rather than
+    parsing the page. Script content is raw text in HTML, so the JSON needs no unescaping.
+    """
+    position = 0
+    while True:
+        # Cheap substring search first, the id is usually on the only such script
+        marker = html_doc.find("__NEXT_DATA__", position)
+        if marker == -1:
+            return None
+        tag_start = html_doc.rfind("<", 0, marker)
+        match = _SCRIPT_OPEN_RE.match(html_doc, tag_start) if tag_start != -1 else None
+        if match is None or match.end() <= marker:
+            position = marker + len("__NEXT_DATA__")
+            continue
+
+        attributes = parse_attributes(match.group(1))
+        if attributes.get("id") != "__NEXT_DATA__":
+            position = match.end()
+            continue
+
+        close = _SCRIPT_CLOSE_RE.search(html_doc, match.end())
+        if close is None:
+            return None
+        return json.loads(html_doc[match.end():close.start()])
+
+
+def extract_deck_urls(html_doc: str, classes: frozenset[str] = DECK_LINK_CLASSES) -> list[str]:
+    """hrefs of the anchors carrying all of the given classes, without duplicates."""
+    urls = {}
+    for match in _ANCHOR_OPEN_RE.finditer(html_doc):
+        tag_body = match.group(1)
+        # Skip the attribute parsing for anchors that can't match
+        if "href" not in tag_body.lower():
+            continue
+        attributes = parse_attributes(tag_body)
+        if attributes.get("href") and classes <= set(attributes.get("class", "").split()):
+            urls[attributes["href"]] = None
+    return list(urls)
+
+
+def extract_untapped_page(html_doc: str) -> dict:
+    """Session cookies and deck URLs from a saved untapped.gg deck list page."""
+    result = {}
+
+    next_data = extract_next_data(html_doc)
+    if not next_data:
+        raise ValueError("Could not find __NEXT_DATA__ script tag in HTML")
+
+    cookie_header = next_data.get("props", {}).get("cookieHeader", "")
+    if not cookie_header:
+        raise ValueError("No cookieHeader found in __NEXT_DATA__")
+
+    result["cookies"] = {}
+    for cookie in cookie_header.split(";"):
+        if "sessionid" in cookie:
+            result["cookies"]["session_id"] = cookie.split("=")[1].strip()
+        if "csrftoken" in cookie:
+            result["cookies"]["csrf_token"] = cookie.split("=")[1].strip()
+
+    result["deck_urls"] = extract_deck_urls(html_doc)
+    if not result["deck_urls"]:
+        raise ValueError("No deck URLs found in HTML")
+
+    return result
@@ -0,0 +1,114 @@
+"""
+Benchmark add_decks_to_db on a batch of fetched decks.
+
+Creates the app schema in a temporary database with a pool of scryfall cards, builds decks
+the way fetch_untapped_decks_from_api returns them (a share of card names given in another
+case, so the printed/flavor name fallback is exercised) and imports them. Reports wall time,
+decks/s and cards/s. Prints one JSON object per deck count.
+
+    python bench/deck_ingest.py --decks 1000 10000 --batch-size 500
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import pathlib
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Any
+
+_ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(_ROOT))
+
+import aiosqlite  # noqa: E402
+
+_DECK_SIZE = 60
+
+
+def seed_cards(path: str, card_pool: int) -> list[str]:
+    """Create the app schema with card_pool scryfall cards, returning their names."""
+    names = [f"Card {i}" for i in range(card_pool)]
+    conn = sqlite3.connect(path)
+    conn.executescript((_ROOT / "schema.sql").read_text())
+    conn.executemany(
+        "INSERT INTO scryfall_all_cards (id, name, printed_name, type_line, mana_cost) VALUES (?, ?, ?, 'Creature', '{1}')",
+        ((f"sf-{i}", name, name) for i, name in enumerate(names)),
+    )
+    conn.commit()
+    conn.close()
+    return names
+
+
+def fetched_decks(names: list[str], deck_count: int, seed: int) -> list[dict[str, Any]]:
+    rng = random.Random(seed)
+    decks = []
+    for i in range(deck_count):
+        cards = [
+            {"name": name.upper() if rng.random() < 0.02 else name, "qty": rng.randint(1, 4)}
+            for name in rng.sample(names, _DECK_SIZE)
+        ]
+        decks.append({
+            "name": f"deck-{i}",
+            "url": f"https://mtga.untapped.gg/meta/decks/deck-{i}/{i:08d}",
+            "api_url": f"https://example.com/{i:08d}",
+            "cards": cards,
+        })
+    return decks
+
+
+async def _ingest(path: str, decks: list[dict[str, Any]], batch_size: int) -> float:
+    from app.services.decks import add_decks_to_db
+
+    conn = await aiosqlite.connect(path)
+    conn.row_factory = aiosqlite.Row
+    try:
+        start = time.perf_counter()
+        await add_decks_to_db(conn, decks, batch_size=batch_size)
+        return time.perf_counter() - start
+    finally:
+        await conn.close()
+
+
+def run(deck_count: int, card_pool: int, batch_size: int, seed: int) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="bench-deck-ingest-") as tmp:
+        path = str(pathlib.Path(tmp) / "bench.db")
+        names = seed_cards(path, card_pool)
+        decks = fetched_decks(names, deck_count, seed)
+        seconds = asyncio.run(_ingest(path, decks, batch_size))
+
+        conn = sqlite3.connect(path)
+        (stored_decks,) = conn.execute("SELECT COUNT(*) FROM decks").fetchone()
+        (stored_cards,) = conn.execute("SELECT COUNT(*) FROM deck_cards").fetchone()
+        conn.close()
+
+    return {
+        "decks": deck_count,
+        "batch_size": batch_size,
+        "stored_decks": stored_decks,
+        "stored_cards": stored_cards,
+        "seconds": round(seconds, 3),
+        "decks_per_second": round(deck_count / seconds, 1),
+        "cards_per_second": round(stored_cards / seconds),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--decks", type=int, nargs="+", default=[1000])
+    parser.add_argument("--card-pool", type=int, default=5000, help="Distinct cards decks are drawn from")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=17)
+    args = parser.parse_args()
+    # add_decks_to_db logs every batch; keep stdout to the results
+    logging.disable(logging.INFO)
+
+    for deck_count in args.decks:
+        print(json.dumps(run(deck_count, args.card_pool, args.batch_size, args.seed)), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Benchmark Follower.parse_log throughput on a synthetic Player.log.
+
+Generates a session with bench/synthetic_log (or takes an existing log) and parses it with
+a Follower backed by MockApiClient, reporting MB/s and lines/s for the fastest of a few
+passes. A further, instrumented pass wraps each of the Follower's private handlers to report
+calls, inclusive time and self time (excluding nested handlers) per handler; its overall
+timing is reported separately since the wrappers add overhead. Prints one JSON object per
+decoder.
+
+    python bench/follower_throughput.py --drafts 2 --games-per-draft 5 --board-size 40
+    python bench/follower_throughput.py --log Player.log --decoder json orjson
+"""
+
+import argparse
+import functools
+import json
+import logging
+import os
+import pathlib
+import sys
+import tempfile
+import time
+from typing import Any, Callable
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "seventeenlands"))
+
+import http_session  # noqa: E402
+import mtga_follower  # noqa: E402
+import synthetic_log  # noqa: E402
+
+_HANDLER_PREFIXES = ("_Follower__handle", "_Follower__maybe_handle", "_Follower__append_line")
+
+
+class _OrjsonDecoder:
+    """raw_decode on top of orjson, falling back to the json module when text trails the object."""
+
+    def __init__(self) -> None:
+        import orjson
+        self._loads = orjson.loads
+        self._fallback = json.JSONDecoder()
+
+    def raw_decode(self, s: str, idx: int = 0) -> tuple[Any, int]:
+        try:
+            return self._loads(s[idx:] if idx else s), len(s)
+        except ValueError:
+            return self._fallback.raw_decode(s, idx)
+
+
+DECODERS: dict[str, Callable[[], Any]] = {
+    "json": json.JSONDecoder,
+    "orjson": _OrjsonDecoder,
+}
+
+
+class _HandlerTimer:
+    def __init__(self) -> None:
+        self.calls: dict[str, int] = {}
+        self.inclusive: dict[str, float] = {}
+        self.exclusive: dict[str, float] = {}
+        self._stack: list[float] = []
+
+    def wrap(self, name: str, method: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(method)
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            self._stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                nested = self._stack.pop()
+                if self._stack:
+                    self._stack[-1] += elapsed
+                self.calls[name] = self.calls.get(name, 0) + 1
+                self.inclusive[name] = self.inclusive.get(name, 0.0) + elapsed
+                self.exclusive[name] = self.exclusive.get(name, 0.0) + elapsed - nested
+
+        return timed
+
+    def instrument(self, follower: mtga_follower.Follower) -> None:
+        # Name-mangled calls look the method up on the instance first
+        for attribute in dir(mtga_follower.Follower):
+            if attribute.startswith(_HANDLER_PREFIXES):
+                name = attribute.removeprefix("_Follower__")
+                setattr(follower, attribute, self.wrap(name, getattr(follower, attribute)))
+
+    def breakdown(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "handler": name,
+                "calls": self.calls[name],
+                "seconds": round(self.inclusive[name], 4),
+                "self_seconds": round(self.exclusive[name], 4),
+            }
+            for name in sorted(self.exclusive, key=self.exclusive.get, reverse=True)
+        ]
+
+
+def _new_follower(decoder: str) -> mtga_follower.Follower:
+    follower = mtga_follower.Follower(
+        token="bench",
+        host=http_session.MOCK_HOST,
+        client=mtga_follower.MockApiClient(http_session.MOCK_HOST),
+        checkpoint_dir="",
+    )
+    follower.json_decoder = DECODERS[decoder]()
+    return follower
+
+
+def _parse(follower: mtga_follower.Follower, path: str) -> float:
+    start = time.perf_counter()
+    follower.parse_log(path, follow=False)
+    follower.close()
+    return time.perf_counter() - start
+
+
+def run(path: str, decoder: str, repeat: int) -> dict[str, Any]:
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        lines = sum(1 for _ in f)
+
+    seconds = min(_parse(_new_follower(decoder), path) for _ in range(repeat))
+
+    timer = _HandlerTimer()
+    follower = _new_follower(decoder)
+    timer.instrument(follower)
+    instrumented_seconds = _parse(follower, path)
+
+    return {
+        "decoder": decoder,
+        "bytes": size,
+        "lines": lines,
+        "seconds": round(seconds, 3),
+        "mb_per_second": round(size / 1e6 / seconds, 2),
+        "lines_per_second": round(lines / seconds),
+        "instrumented_seconds": round(instrumented_seconds, 3),
+        "handlers": timer.breakdown(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--log", help="Existing Player.log to parse instead of a synthetic one")
+    parser.add_argument("--decoder", nargs="+", default=["json"], choices=sorted(DECODERS))
+    parser.add_argument("--drafts", type=int, default=1)
+    parser.add_argument("--games-per-draft", type=int, default=5)
+    parser.add_argument("--turns", type=int, default=12)
+    parser.add_argument("--board-size", type=int, default=20)
+    parser.add_argument("--messages-per-turn", type=int, default=25)
+    parser.add_argument("--seed", type=int, default=17)
+    parser.add_argument("--repeat", type=int, default=3, help="Uninstrumented passes; the fastest is reported")
+    args = parser.parse_args()
+    # The follower logs every opponent update; keep stdout to the results
+    mtga_follower.logger.setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory(prefix="bench-follower-") as tmp:
+        path = args.log
+        if path is None:
+            path = os.path.join(tmp, "Player.log")
+            synthetic_log.write_player_log(
+                path,
+                drafts=args.drafts,
+                games_per_draft=args.games_per_draft,
+                turns=args.turns,
+                board_size=args.board_size,
+                messages_per_turn=args.messages_per_turn,
+                seed=args.seed,
+            )
+        for decoder in args.decoder:
+            print(json.dumps(run(path, decoder, args.repeat)), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark handing a completed game over for submission.
+
+Replays a synthetic game through a Follower, then times _enqueue_game_data against the
+copy.deepcopy of the finished game that it used to make, reporting wall time and peak
+allocations for each. Prints one JSON object per variant.
+
+    python bench/game_enqueue.py --turns 30 --board-size 40
+"""
+
+import argparse
+import copy
+import json
+import logging
+import pathlib
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "seventeenlands"))
+
+import http_session  # noqa: E402
+import mtga_follower  # noqa: E402
+import synthetic_game  # noqa: E402
+
+
+def _replayed_follower(messages: list[dict[str, Any]]) -> mtga_follower.Follower:
+    follower = mtga_follower.Follower(token="bench", host=http_session.MOCK_HOST)
+    for message in messages:
+        follower._Follower__handle_gre_to_client_message(message, None)
+    return follower
+
+
+def _measure(run: Callable[[], Any], repeat: int) -> dict[str, Any]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "seconds_median": statistics.median(times),
+        "seconds_min": min(times),
+        "peak_alloc_bytes": peak,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=16)
+    parser.add_argument("--board-size", type=int, default=20)
+    parser.add_argument("--messages-per-turn", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    # The follower logs every opponent update; keep stdout to the results
+    mtga_follower.logger.setLevel(logging.WARNING)
+
+    messages = list(
+        synthetic_game.game_state_messages(
+            turns=args.turns,
+            board_size=args.board_size,
+            messages_per_turn=args.messages_per_turn,
+        )
+    )
+    follower = _replayed_follower(messages)
+    events = len(follower.game_history_events)
+
+    def enqueue() -> None:
+        # Enqueueing hands the game over, so put it back for the next run
+        game_history_events = follower.game_history_events
+        drawn_cards_by_instance_id = follower.drawn_cards_by_instance_id
+        if not follower._enqueue_game_data():
+            raise RuntimeError("Synthetic game was not enqueued")
+        follower.game_history_events = game_history_events
+        follower.drawn_cards_by_instance_id = drawn_cards_by_instance_id
+
+    enqueue()
+    game = dict(follower.pending_game_submission)
+    game["history"] = {**game["history"], "events": list(game["history"]["events"])}
+
+    variants: dict[str, Callable[[], Any]] = {
+        "enqueue": enqueue,
+        "legacy-deepcopy": lambda: copy.deepcopy(game),
+    }
+    for name, run in variants.items():
+        print(json.dumps({"variant": name, "events": events, **_measure(run, args.repeat)}))
+
+    follower.close(timeout=mtga_follower.SUBMISSION_DRAIN_TIMEOUT.total_seconds())
+
+
+if __name__ == "__main__":
+    main()
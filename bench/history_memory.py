@@ -0,0 +1,108 @@
+"""
+Benchmark memory held by a game's recorded history.
+
+Records a synthetic game the way the follower does, once into a plain list of dicts (the
+original storage) and once into a GameHistory per compression mode, reporting the memory
+retained, the time spent appending and the time to stream the history into a request body.
+Prints one JSON object per store.
+
+    python bench/history_memory.py --turns 40 --board-size 40
+"""
+
+import argparse
+import json
+import pathlib
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "seventeenlands"))
+
+import game_history  # noqa: E402
+import payload_codec  # noqa: E402
+import synthetic_game  # noqa: E402
+
+_TIMESTAMP = "2025-01-01T12:00:00"
+
+
+class _ListHistory(list):
+    def append(self, event: dict[str, Any], timestamp: Any = None) -> None:
+        super().append({"_timestamp": timestamp, **event})
+
+    def freeze(self) -> list[dict[str, Any]]:
+        return self
+
+
+def _record(store: Any, lines: list[str]) -> float:
+    append_seconds = 0.0
+    for line in lines:
+        # Parsing is part of reading the log either way; only the append is timed
+        message = json.loads(line)
+        start = time.perf_counter()
+        store.append(message, timestamp=_TIMESTAMP)
+        append_seconds += time.perf_counter() - start
+        del message
+    return append_seconds
+
+
+def _measure(new_store: Callable[[], Any], lines: list[str]) -> dict[str, Any]:
+    store = new_store()
+    append_seconds = _record(store, lines)
+
+    start = time.perf_counter()
+    body = payload_codec.encode_payload({"events": store.freeze()}, payload_codec.GzipCodec())
+    encode_seconds = time.perf_counter() - start
+    del store
+
+    # Tracing slows allocation down, so memory is measured on a separate run
+    tracemalloc.start()
+    store = new_store()
+    _record(store, lines)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "retained_bytes": retained,
+        "append_seconds": append_seconds,
+        "encode_seconds": encode_seconds,
+        "body_bytes": len(body.body),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--board-size", type=int, default=30)
+    parser.add_argument("--messages-per-turn", type=int, default=25)
+    args = parser.parse_args()
+
+    lines = [
+        json.dumps(message)
+        for message in synthetic_game.game_state_messages(
+            turns=args.turns,
+            board_size=args.board_size,
+            messages_per_turn=args.messages_per_turn,
+        )
+    ]
+    json_bytes = sum(len(line) for line in lines)
+
+    stores: dict[str, Callable[[], Any]] = {"list-of-dicts": _ListHistory}
+    for mode in game_history.COMPRESSION_MODES:
+        stores[f"history-{mode}"] = lambda mode=mode: game_history.GameHistory(mode)
+
+    for name, new_store in stores.items():
+        print(
+            json.dumps(
+                {
+                    "store": name,
+                    "events": len(lines),
+                    "json_bytes": json_bytes,
+                    **_measure(new_store, lines),
+                }
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
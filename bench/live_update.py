@@ -0,0 +1,222 @@
+"""
+Benchmark the live update path against deck corpora of different sizes.
+
+Opponent state lines, either recorded from a 17lands log or produced by replaying a
+synthetic game through a Follower, are fed through LogEntry.parse_opponent_log_line,
+process_log_update and render_log_update_html against a temporary database seeded with
+the game's cards and a synthetic deck corpus. Each corpus size runs in a fresh process so
+its peak RSS is its own (not reported on Windows). Prints one JSON object per corpus size.
+
+    python bench/live_update.py --decks 1000 10000 100000
+    python bench/live_update.py --opponent-log ~/.seventeenlands/fake_seventeenlands.log
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import logging
+import multiprocessing
+import pathlib
+import random
+import re
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where peak RSS is not reported
+    resource = None
+
+_ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(_ROOT / "seventeenlands"))
+sys.path.insert(0, str(_ROOT))
+
+import aiosqlite  # noqa: E402
+
+import http_session  # noqa: E402
+import mtga_follower  # noqa: E402
+import opponent_state  # noqa: E402
+import synthetic_game  # noqa: E402
+
+DEFAULT_DECK_COUNTS = (1000, 10000, 100000)
+_DECK_SIZE = 23
+_TYPE_LINES = ("Creature — Human Soldier", "Instant", "Sorcery", "Basic Land — Forest", "Artifact")
+_MANA_COSTS = ("{1}{W}", "{2}{U}{U}", "{B}", "{3}{R}", "{G}{G}", "")
+
+
+class _RecordingFollower(mtga_follower.Follower):
+    def __init__(self) -> None:
+        self.lines: list[str] = []
+        super().__init__(token="bench", host=http_session.MOCK_HOST, checkpoint_dir="")
+
+    def _log_opponent_update(self, record: dict[str, Any]) -> None:
+        opponent_state.stamp_trace(record, match_id="bench")
+        self.lines.append(opponent_state.format_record(record))
+
+
+def synthetic_opponent_lines(turns: int, board_size: int, seed: int) -> list[str]:
+    follower = _RecordingFollower()
+    for message in synthetic_game.game_state_messages(turns=turns, board_size=board_size, seed=seed):
+        follower._Follower__handle_gre_to_client_message(message, None)
+    return follower.lines
+
+
+def recorded_opponent_lines(path: str) -> list[str]:
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return [line.rstrip("\n") for line in f if opponent_state.LOG_MARKER in line]
+
+
+def seed_database(path: str, lines: list[str], deck_count: int, card_pool: int, seed: int) -> None:
+    """Create the app schema and fill it with the game's cards, filler cards and decks."""
+    rng = random.Random(seed)
+    arena_ids = sorted({int(grp_id) for grp_id in re.findall(r"\[\d+,(\d+)\]", "\n".join(lines))})
+    filler_ids = [1_000_000 + i for i in range(max(0, card_pool - len(arena_ids)))]
+    pool = arena_ids + filler_ids
+
+    conn = sqlite3.connect(path)
+    conn.executescript((_ROOT / "schema.sql").read_text())
+    conn.executemany(
+        "INSERT INTO scryfall_all_cards (id, name, arena_id, type_line, mana_cost, produced_mana) VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (
+                f"sf-{arena_id}",
+                f"Card {arena_id}",
+                str(arena_id),
+                rng.choice(_TYPE_LINES),
+                rng.choice(_MANA_COSTS),
+                rng.choice(("G", "W,U", None, None)),
+            )
+            for arena_id in pool
+        ),
+    )
+    conn.executemany(
+        "INSERT INTO decks (id, name, source, author, format, url, added_at) VALUES (?, ?, '17lands.com', 'bench', 'standard', ?, '2025-01-01T00:00:00')",
+        ((deck_id, f"Deck {deck_id}", f"https://example.com/decks/{deck_id}") for deck_id in range(1, deck_count + 1)),
+    )
+    conn.executemany(
+        "INSERT INTO deck_cards (deck_id, card_id, name, section, quantity) VALUES (?, ?, ?, 'main', ?)",
+        (
+            (deck_id, f"sf-{arena_id}", f"Card {arena_id}", rng.randint(1, 4))
+            for deck_id in range(1, deck_count + 1)
+            for arena_id in rng.sample(pool, _DECK_SIZE)
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+async def _replay(db_path: str, lines: list[str]) -> list[float]:
+    from app.routes.logs import process_log_update, render_log_update_html
+    from app.services import logs as logs_service
+
+    # Read nothing from the real 17lands log
+    logs_service.seventeenlands_log_file_path = pathlib.Path(db_path).with_suffix(".missing")
+    log_entry = logs_service.LogEntry()
+
+    conn = await aiosqlite.connect(db_path)
+    conn.row_factory = aiosqlite.Row
+    cursor = await conn.cursor()
+    latencies = []
+    try:
+        for line in lines:
+            start = time.perf_counter()
+            if not await log_entry.parse_opponent_log_line(line):
+                continue
+            state = await log_entry.get_current_state()
+            result = await process_log_update(conn, cursor, state)
+            if result is None:
+                continue
+            await render_log_update_html(
+                result["current_deck_cards"],
+                result["matching_decks"],
+                result["opponent_mana_tags"],
+                result["producible_mana_tags"],
+                result["missing_ids"],
+            )
+            latencies.append(time.perf_counter() - start)
+    finally:
+        await conn.close()
+    return latencies
+
+
+def run_corpus(lines: list[str], deck_count: int, card_pool: int, seed: int) -> dict[str, Any]:
+    """Seed a database with deck_count decks and replay the lines against it. Runs in a worker process."""
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory(prefix="bench-live-update-") as tmp:
+        db_path = str(pathlib.Path(tmp) / "bench.db")
+        start = time.perf_counter()
+        seed_database(db_path, lines, deck_count, card_pool, seed)
+        seed_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        latencies = asyncio.run(_replay(db_path, lines))
+        seconds = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "decks": deck_count,
+        "lines": len(lines),
+        "updates": len(latencies),
+        "seed_seconds": round(seed_seconds, 3),
+        "seconds": round(seconds, 3),
+        "updates_per_second": round(len(latencies) / seconds, 2) if seconds else None,
+        "p50_ms": round(statistics.median(latencies) * 1000, 3) if latencies else None,
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))] * 1000, 3) if latencies else None,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return round(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1
+    )
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--decks", type=int, nargs="+", default=list(DEFAULT_DECK_COUNTS))
+    parser.add_argument("--card-pool", type=int, default=5000, help="Distinct cards decks are drawn from")
+    parser.add_argument("--opponent-log", help="17lands log to take recorded opponent state lines from")
+    parser.add_argument("--turns", type=int, default=12)
+    parser.add_argument("--board-size", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=17)
+    args = parser.parse_args()
+    # The follower logs every opponent update; keep stdout to the results
+    mtga_follower.logger.setLevel(logging.WARNING)
+
+    if args.opponent_log:
+        lines = recorded_opponent_lines(args.opponent_log)
+    else:
+        lines = synthetic_opponent_lines(args.turns, args.board_size, args.seed)
+
+    commit = _commit()
+    for deck_count in args.decks:
+        # A fresh process per corpus, so peak RSS is not carried over from a larger one
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            result = executor.submit(run_corpus, lines, deck_count, args.card_pool, args.seed).result()
+        print(json.dumps({"benchmark": "live_update", "commit": commit, **result}), flush=True)
+
+
+if __name__ == "__main__":
+    main()
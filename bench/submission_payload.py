@@ -0,0 +1,101 @@
+"""
+Benchmark encoding of api/client/add_game submissions.
+
+Compares the original one-shot gzip.compress(json.dumps(blob)) with the streaming codecs in
+seventeenlands/payload_codec.py, reporting compressed bytes, CPU time and peak allocations
+per game. Prints one JSON object per codec.
+
+    python bench/submission_payload.py --turns 20 --board-size 30
+"""
+
+import argparse
+import gzip
+import json
+import pathlib
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "seventeenlands"))
+
+import payload_codec  # noqa: E402
+import synthetic_game  # noqa: E402
+
+
+def _measure(encode: Callable[[], bytes], repeat: int) -> dict[str, Any]:
+    cpu_times = []
+    size = 0
+    for _ in range(repeat):
+        start = time.process_time()
+        size = len(encode())
+        cpu_times.append(time.process_time() - start)
+
+    tracemalloc.start()
+    encode()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "bytes": size,
+        "cpu_seconds_median": statistics.median(cpu_times),
+        "cpu_seconds_min": min(cpu_times),
+        "peak_alloc_bytes": peak,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=16)
+    parser.add_argument("--board-size", type=int, default=20)
+    parser.add_argument("--messages-per-turn", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--game-file",
+        help="JSON file holding a captured add_game blob to use instead of a synthetic game",
+    )
+    args = parser.parse_args()
+
+    if args.game_file:
+        blob = json.loads(pathlib.Path(args.game_file).read_text())
+    else:
+        blob = synthetic_game.game_submission_blob(
+            turns=args.turns,
+            board_size=args.board_size,
+            messages_per_turn=args.messages_per_turn,
+        )
+    json_bytes = len(json.dumps(blob).encode("utf8"))
+    events = len(blob.get("history", {}).get("events", []))
+
+    candidates: dict[str, Callable[[], bytes]] = {
+        "legacy-gzip-9": lambda: gzip.compress(json.dumps(blob).encode("utf8")),
+        "identity": lambda: payload_codec.encode_payload(blob).body,
+    }
+    for level in (1, 6, 9):
+        codec = payload_codec.GzipCodec(level)
+        candidates[f"gzip-{level}"] = lambda codec=codec: payload_codec.encode_payload(blob, codec).body
+    try:
+        for level in (1, 3, 9):
+            codec = payload_codec.get_codec("zstd", level)
+            candidates[f"zstd-{level}"] = lambda codec=codec: payload_codec.encode_payload(blob, codec).body
+    except ValueError as e:
+        print(f"Skipping zstd: {e}", file=sys.stderr)
+
+    for name, encode in candidates.items():
+        result = _measure(encode, args.repeat)
+        print(
+            json.dumps(
+                {
+                    "codec": name,
+                    "events": events,
+                    "json_bytes": json_bytes,
+                    **result,
+                    "ratio": round(json_bytes / result["bytes"], 2),
+                }
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Synthetic MTGA game data for the benchmarks.
+
+The messages mimic the shape and size of real GREMessageType_GameStateMessage blobs: each
+diff carries the turn info, both players, the zones, the objects on the board and a few
+annotations and actions. Output is deterministic for a given seed.
+"""
+
+import random
+from typing import Any, Iterator
+
+PLAYER_SEAT = 1
+OPPONENT_SEAT = 2
+
+BASIC_LAND_GRP_IDS = (87412, 87413, 87414, 87415, 87416)
+_PHASES = (
+    ("Phase_Beginning", "Step_Upkeep"),
+    ("Phase_Beginning", "Step_Draw"),
+    ("Phase_Main1", None),
+    ("Phase_Combat", "Step_DeclareAttack"),
+    ("Phase_Combat", "Step_CombatDamage"),
+    ("Phase_Main2", None),
+    ("Phase_Ending", "Step_End"),
+)
+
+
+def _game_object(rng: random.Random, instance_id: int, owner: int, zone_id: int) -> dict[str, Any]:
+    grp_id = rng.choice(BASIC_LAND_GRP_IDS) if rng.random() < 0.4 else rng.randint(80000, 99999)
+    return {
+        "instanceId": instance_id,
+        "grpId": grp_id,
+        "type": "GameObjectType_Card",
+        "zoneId": zone_id,
+        "visibility": "Visibility_Public",
+        "ownerSeatId": owner,
+        "controllerSeatId": owner,
+        "cardTypes": ["CardType_Creature"],
+        "subtypes": ["SubType_Human", "SubType_Soldier"],
+        "color": ["CardColor_White"],
+        "power": {"value": rng.randint(1, 5)},
+        "toughness": {"value": rng.randint(1, 5)},
+        "name": rng.randint(100000, 999999),
+        "abilities": [rng.randint(1000, 200000) for _ in range(rng.randint(0, 3))],
+        "overlayGrpId": grp_id,
+    }
+
+
+def game_state_messages(
+        turns: int = 12,
+        board_size: int = 20,
+        messages_per_turn: int = 25,
+        seed: int = 17,
+) -> Iterator[dict[str, Any]]:
+    """
+    Yield greToClientMessages for one synthetic game.
+
+    :param turns:             Number of turns in the game.
+    :param board_size:        Number of permanents per player once the board has filled up.
+    :param messages_per_turn: Number of GameStateMessages per turn.
+    :param seed:              Seed for the random choices.
+    """
+    rng = random.Random(seed)
+    next_instance_id = 100
+    board: dict[int, list[int]] = {PLAYER_SEAT: [], OPPONENT_SEAT: []}
+    hands: dict[int, list[int]] = {PLAYER_SEAT: [], OPPONENT_SEAT: []}
+    for seat in board:
+        for _ in range(7):
+            hands[seat].append(next_instance_id)
+            next_instance_id += 1
+
+    game_state_id = 1
+    for turn in range(1, turns + 1):
+        active_seat = PLAYER_SEAT if turn % 2 else OPPONENT_SEAT
+        for message_number in range(messages_per_turn):
+            phase, step = _PHASES[message_number * len(_PHASES) // messages_per_turn]
+
+            changed_objects = []
+            if game_state_id == 1:
+                changed_objects.extend(
+                    _game_object(rng, instance_id, seat, 30 + seat)
+                    for seat in hands
+                    for instance_id in hands[seat]
+                )
+            if message_number % 5 == 0 and hands[active_seat]:
+                played = hands[active_seat].pop(0)
+                board[active_seat].append(played)
+                if len(board[active_seat]) > board_size:
+                    board[active_seat].pop(0)
+                changed_objects.append(_game_object(rng, played, active_seat, 28))
+            if message_number == 0:
+                hands[active_seat].append(next_instance_id)
+                changed_objects.append(
+                    _game_object(rng, next_instance_id, active_seat, 30 + active_seat)
+                )
+                next_instance_id += 1
+            changed_objects.extend(
+                _game_object(rng, instance_id, seat, 28)
+                for seat in board
+                for instance_id in rng.sample(board[seat], min(len(board[seat]), board_size // 4))
+            )
+
+            turn_info = {
+                "phase": phase,
+                "turnNumber": turn,
+                "activePlayer": active_seat,
+                "priorityPlayer": active_seat,
+                "decisionPlayer": active_seat,
+                "nextPhase": phase,
+            }
+            if step is not None:
+                turn_info["step"] = step
+
+            yield {
+                "type": "GREMessageType_GameStateMessage",
+                "systemSeatIds": [PLAYER_SEAT],
+                "msgId": game_state_id,
+                "gameStateId": game_state_id,
+                "gameStateMessage": {
+                    "type": "GameStateType_Diff",
+                    "gameStateId": game_state_id,
+                    "prevGameStateId": game_state_id - 1,
+                    "turnInfo": turn_info,
+                    "players": [
+                        {
+                            "lifeTotal": rng.randint(1, 20),
+                            "systemSeatNumber": seat,
+                            "maxHandSize": 7,
+                            "turnNumber": turn // 2,
+                            "teamId": seat,
+                            "timerIds": [seat * 10 + 1, seat * 10 + 2],
+                            "controllerSeatId": seat,
+                            "controllerType": "ControllerType_Player",
+                            "startingLifeTotal": 20,
+                        }
+                        for seat in board
+                    ],
+                    "zones": [
+                        {
+                            "zoneId": 28,
+                            "type": "ZoneType_Battlefield",
+                            "visibility": "Visibility_Public",
+                            "objectInstanceIds": board[PLAYER_SEAT] + board[OPPONENT_SEAT],
+                        },
+                        {
+                            "zoneId": 27,
+                            "type": "ZoneType_Stack",
+                            "visibility": "Visibility_Public",
+                            "objectInstanceIds": [],
+                        },
+                    ] + [
+                        {
+                            "zoneId": 30 + seat,
+                            "type": "ZoneType_Hand",
+                            "visibility": "Visibility_Private",
+                            "ownerSeatId": seat,
+                            "objectInstanceIds": list(hands[seat]),
+                            "viewers": [seat],
+                        }
+                        for seat in board
+                    ],
+                    "gameObjects": changed_objects,
+                    "annotations": [
+                        {
+                            "id": game_state_id * 10 + i,
+                            "affectorId": rng.choice(board[active_seat] or [1]),
+                            "affectedIds": [rng.randint(100, next_instance_id)],
+                            "type": [
+                                "AnnotationType_ColorProduction" if i == 0 else "AnnotationType_ZoneTransfer"
+                            ],
+                            "details": [
+                                {
+                                    "key": "colors" if i == 0 else "zone_src",
+                                    "type": "KeyValuePairValueType_int32",
+                                    "valueInt32": [rng.choice((1, 2, 4, 8, 16))],
+                                }
+                            ],
+                        }
+                        for i in range(rng.randint(0, 3))
+                    ],
+                    "actions": [
+                        {
+                            "seatId": active_seat,
+                            "action": {
+                                "actionType": "ActionType_Activate_Mana",
+                                "instanceId": instance_id,
+                                "grpId": rng.choice(BASIC_LAND_GRP_IDS),
+                                "abilityGrpId": rng.choice((1001, 1002, 1003, 1004, 1005)),
+                            },
+                        }
+                        for instance_id in board[active_seat][:8]
+                    ],
+                    "update": "GameStateUpdate_SendAndRecord",
+                },
+            }
+            game_state_id += 1
+
+
+def game_submission_blob(**kwargs: Any) -> dict[str, Any]:
+    """Build an api/client/add_game blob whose history holds a synthetic game."""
+    events = [
+        {"_timestamp": f"2025-01-01T12:{i // 60 % 60:02d}:{i % 60:02d}", **message}
+        for i, message in enumerate(game_state_messages(**kwargs))
+    ]
+    return {
+        "token": "00000000-0000-4000-8000-000000000000",
+        "client_version": "0.1.44.p",
+        "event_name": "Ladder",
+        "match_id": "00000000-0000-0000-0000-000000000000",
+        "on_play": True,
+        "opening_hand": [87412, 87413, 90001, 90002, 90003, 90004, 90005],
+        "turns": kwargs.get("turns", 12),
+        "history": {
+            "seat_id": PLAYER_SEAT,
+            "opponent_seat_id": OPPONENT_SEAT,
+            "screen_name": "Player",
+            "opponent_screen_name": "Opponent",
+            "events": events,
+        },
+    }
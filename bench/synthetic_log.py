@@ -0,0 +1,279 @@
+"""
+Synthetic MTGA Player.log content for the benchmarks.
+
+A session starts with the account and business lines Arena writes at login (courses, rank,
+inventory), then runs a number of drafts, each a deck submission and a run of games. Games
+are framed by match room state changes, a ConnectResp carrying the deck and a
+LogBusinessEvents game end, with GRE game state messages from synthetic_game in between.
+Output is deterministic for a given seed.
+
+    python bench/synthetic_log.py Player.log --drafts 2 --games-per-draft 5 --board-size 40
+"""
+
+import argparse
+import datetime
+import json
+import random
+import uuid
+from typing import Any, Iterator
+
+import synthetic_game
+
+PLAYER_USER_ID = "SYNTHETICPLAYER0000000000"
+PLAYER_NAME = "Player#12345"
+_START_TIME = datetime.datetime(2025, 1, 1, 12, 0, 0)
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = _START_TIME
+
+    def tick(self, seconds: float = 1.0) -> str:
+        self.now += datetime.timedelta(seconds=seconds)
+        return self.now.strftime("%m/%d/%Y %I:%M:%S %p")
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _request(rng: random.Random, payload: dict[str, Any]) -> str:
+    # Client requests are logged with the payload serialized a second time
+    return json.dumps({"id": _uuid(rng), "request": json.dumps(payload)})
+
+
+def _session_start(rng: random.Random, clock: _Clock) -> Iterator[str]:
+    yield "DETAILED LOGS: ENABLED"
+    yield f"[UnityCrossThreadLogger]Updated account. DisplayName:{PLAYER_NAME}, AccountID:{PLAYER_USER_ID}, Token:SYNTHETIC"
+    yield f"[UnityCrossThreadLogger]{clock.tick()}: Logged in successfully. Display Name:{PLAYER_NAME}"
+    yield f"[UnityCrossThreadLogger]<== Event_GetCoursesV2({_uuid(rng)})"
+    yield json.dumps({
+        "Courses": [
+            {
+                "CourseId": _uuid(rng),
+                "InternalEventName": f"PremierDraft_SYN_{i}",
+                "CurrentModule": "CreateMatch",
+                "CurrentWins": rng.randint(0, 6),
+                "CurrentLosses": rng.randint(0, 2),
+                "CardPool": [rng.randint(80000, 99999) for _ in range(45)],
+            }
+            for i in range(3)
+        ]
+    })
+    yield f"[UnityCrossThreadLogger]<== Rank_GetCombinedRankInfo({_uuid(rng)})"
+    yield json.dumps({
+        "playerId": PLAYER_USER_ID,
+        "constructedSeasonOrdinal": 80,
+        "constructedClass": "Gold",
+        "constructedLevel": 2,
+        "limitedSeasonOrdinal": 80,
+        "limitedClass": "Platinum",
+        "limitedLevel": 4,
+        "limitedStep": 1,
+    })
+    yield f"[UnityCrossThreadLogger]<== StartHook({_uuid(rng)})"
+    yield json.dumps({
+        "DTO_InventoryInfo": {
+            "Gems": rng.randint(0, 10000),
+            "Gold": rng.randint(0, 50000),
+            "TotalVaultProgress": rng.randint(0, 1000),
+            "WildCardCommons": rng.randint(0, 50),
+            "WildCardUnCommons": rng.randint(0, 50),
+            "WildCardRares": rng.randint(0, 20),
+            "WildCardMythics": rng.randint(0, 10),
+            "DraftTokens": 0,
+            "SealedTokens": 0,
+            "Boosters": [{"CollationId": 100000 + i, "Count": rng.randint(0, 5)} for i in range(5)],
+        }
+    })
+
+
+def _draft(rng: random.Random, clock: _Clock, event_name: str, picks: int) -> Iterator[str]:
+    draft_id = _uuid(rng)
+    yield f"[UnityCrossThreadLogger]{clock.tick()}: ==> Event_Join {_request(rng, {'EventName': event_name, 'EntryCurrencyType': 'Gem'})}"
+    for pick in range(picks):
+        pack_number, pick_number = pick // 14 + 1, pick % 14 + 1
+        cards_in_pack = [rng.randint(80000, 99999) for _ in range(15 - pick % 14)]
+        yield f"[UnityCrossThreadLogger]{clock.tick(5)}: ==> LogBusinessEvents " + _request(rng, {
+            "PlayerId": PLAYER_USER_ID,
+            "ClientPlatform": "Windows",
+            "DraftId": draft_id,
+            "EventId": event_name,
+            "SeatNumber": 0,
+            "PackNumber": pack_number,
+            "PickNumber": pick_number,
+            "PickGrpId": rng.choice(cards_in_pack),
+            "CardsInPack": cards_in_pack,
+            "AutoPick": False,
+            "TimeRemainingOnPick": rng.randint(1, 60),
+            "EventType": 24,
+            "EventTime": clock.now.isoformat(),
+        })
+
+
+def _deck(rng: random.Random) -> list[dict[str, int]]:
+    return [{"cardId": rng.randint(80000, 99999), "quantity": rng.randint(1, 2)} for _ in range(23)] + [
+        {"cardId": grp_id, "quantity": 8} for grp_id in rng.sample(synthetic_game.BASIC_LAND_GRP_IDS, 2)
+    ]
+
+
+def _deck_submission(rng: random.Random, clock: _Clock, event_name: str, deck: list[dict[str, int]]) -> Iterator[str]:
+    yield f"[UnityCrossThreadLogger]{clock.tick(30)}: ==> Event_SetDeckV2 " + _request(rng, {
+        "EventName": event_name,
+        "Deck": {"MainDeck": deck, "Sideboard": [], "Companions": []},
+    })
+
+
+def _game(
+        rng: random.Random,
+        clock: _Clock,
+        event_name: str,
+        deck: list[dict[str, int]],
+        turns: int,
+        board_size: int,
+        messages_per_turn: int,
+        seed: int,
+) -> Iterator[str]:
+    match_id = _uuid(rng)
+    opponent_user_id = f"OPPONENT{rng.getrandbits(64):016X}"
+    room_config = {
+        "matchId": match_id,
+        "eventId": event_name,
+        "reservedPlayers": [
+            {"systemSeatId": synthetic_game.PLAYER_SEAT, "teamId": 1, "playerName": PLAYER_NAME,
+             "userId": PLAYER_USER_ID, "eventId": event_name},
+            {"systemSeatId": synthetic_game.OPPONENT_SEAT, "teamId": 2, "playerName": "Opponent#54321",
+             "userId": opponent_user_id, "eventId": event_name},
+        ],
+        "clientMetadata": {
+            f"{opponent_user_id}_RankClass": "Gold",
+            f"{opponent_user_id}_RankTier": "1",
+        },
+    }
+    yield f"[UnityCrossThreadLogger]{clock.tick(10)}: Match to {PLAYER_USER_ID}: MatchGameRoomStateChangedEvent"
+    yield json.dumps({"matchGameRoomStateChangedEvent": {
+        "gameRoomInfo": {"gameRoomConfig": room_config, "stateType": "MatchGameRoomStateType_Playing"}
+    }})
+
+    deck_cards = [entry["cardId"] for entry in deck for _ in range(entry["quantity"])]
+    yield f"[UnityCrossThreadLogger]{clock.tick()}: Match to {PLAYER_USER_ID}: GreToClientEvent"
+    yield json.dumps({"greToClientEvent": {"greToClientMessages": [{
+        "type": "GREMessageType_ConnectResp",
+        "systemSeatIds": [synthetic_game.PLAYER_SEAT],
+        "connectResp": {"status": "ConnectionStatus_Success", "deckMessage": {"deckCards": deck_cards, "sideboardCards": []}},
+    }]}})
+
+    for message in synthetic_game.game_state_messages(
+            turns=turns, board_size=board_size, messages_per_turn=messages_per_turn, seed=seed
+    ):
+        yield f"[UnityCrossThreadLogger]{clock.tick(2)}: Match to {PLAYER_USER_ID}: GreToClientEvent"
+        yield json.dumps({"greToClientEvent": {"greToClientMessages": [message]}})
+
+    won = rng.random() < 0.5
+    winning_team = 1 if won else 2
+    yield f"[UnityCrossThreadLogger]{clock.tick()}: ==> LogBusinessEvents " + _request(rng, {
+        "PlayerId": PLAYER_USER_ID,
+        "MatchId": match_id,
+        "EventId": event_name,
+        "SeatId": synthetic_game.PLAYER_SEAT,
+        "TeamId": 1,
+        "GameNumber": 1,
+        "WinningTeamId": winning_team,
+        "WinningReason": "ResultReason_Game",
+        "WinningType": "ResultType_WinLoss",
+        "TurnCount": turns,
+        "StartingTeamId": 1,
+        "EventTime": clock.now.isoformat(),
+    })
+    yield f"[UnityCrossThreadLogger]{clock.tick()}: Match to {PLAYER_USER_ID}: MatchGameRoomStateChangedEvent"
+    yield json.dumps({"matchGameRoomStateChangedEvent": {"gameRoomInfo": {
+        "gameRoomConfig": {"matchId": match_id, "eventId": event_name},
+        "stateType": "MatchGameRoomStateType_MatchCompleted",
+        "finalMatchResult": {
+            "matchId": match_id,
+            "matchCompletedReason": "MatchCompletedReasonType_Success",
+            "resultList": [
+                {"scope": "MatchScope_Game", "result": "ResultType_WinLoss", "winningTeamId": winning_team},
+                {"scope": "MatchScope_Match", "result": "ResultType_WinLoss", "winningTeamId": winning_team},
+            ],
+        },
+    }}})
+
+
+def player_log_lines(
+        drafts: int = 1,
+        games_per_draft: int = 5,
+        picks_per_draft: int = 42,
+        turns: int = 12,
+        board_size: int = 20,
+        messages_per_turn: int = 25,
+        seed: int = 17,
+) -> Iterator[str]:
+    """
+    Yield the lines of a synthetic Player.log session, without line endings.
+
+    :param drafts:            Number of drafts in the session.
+    :param games_per_draft:   Number of games played with each drafted deck.
+    :param picks_per_draft:   Number of picks in each draft.
+    :param turns:             Number of turns in each game.
+    :param board_size:        Number of permanents per player once the board has filled up.
+    :param messages_per_turn: Number of GameStateMessages per turn.
+    :param seed:              Seed for the random choices.
+    """
+    rng = random.Random(seed)
+    clock = _Clock()
+    yield from _session_start(rng, clock)
+    for draft in range(drafts):
+        event_name = f"PremierDraft_SYN_{draft}"
+        yield from _draft(rng, clock, event_name, picks_per_draft)
+        deck = _deck(rng)
+        yield from _deck_submission(rng, clock, event_name, deck)
+        for game in range(games_per_draft):
+            yield from _game(
+                rng,
+                clock,
+                event_name,
+                deck,
+                turns=turns,
+                board_size=board_size,
+                messages_per_turn=messages_per_turn,
+                seed=seed + draft * games_per_draft + game,
+            )
+
+
+def write_player_log(path: str, **kwargs: Any) -> int:
+    """Write a synthetic session to a file, returning its size in bytes."""
+    size = 0
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        for line in player_log_lines(**kwargs):
+            size += f.write(line + "\n")
+    return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("output")
+    parser.add_argument("--drafts", type=int, default=1)
+    parser.add_argument("--games-per-draft", type=int, default=5)
+    parser.add_argument("--picks-per-draft", type=int, default=42)
+    parser.add_argument("--turns", type=int, default=12)
+    parser.add_argument("--board-size", type=int, default=20)
+    parser.add_argument("--messages-per-turn", type=int, default=25)
+    parser.add_argument("--seed", type=int, default=17)
+    args = parser.parse_args()
+
+    size = write_player_log(
+        args.output,
+        drafts=args.drafts,
+        games_per_draft=args.games_per_draft,
+        picks_per_draft=args.picks_per_draft,
+        turns=args.turns,
+        board_size=args.board_size,
+        messages_per_turn=args.messages_per_turn,
+        seed=args.seed,
+    )
+    print(json.dumps({"output": args.output, "bytes": size}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark fetching untapped.gg decks against a local stand-in server.
+
+Starts a small server that answers deck API requests after a fixed latency and refuses a
+share of them with 429 and a Retry-After header, points UNTAPPED_API_BASE_URL at it and
+fetches a batch of decks through fetch_untapped_decks_from_api. Reports wall time, decks/s,
+how many requests the server refused and the most requests it saw at once. Prints one JSON
+object per run.
+
+    python bench/untapped_fetch.py --decks 200 --latency 0.2 --throttle-rate 0.1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import random
+import socket
+import sys
+import time
+from typing import Any
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import uvicorn  # noqa: E402
+from starlette.applications import Starlette  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+
+
+class StandInServer:
+    def __init__(self, latency: float, throttle_rate: float, retry_after: int, seed: int):
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.throttled = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.app = Starlette(routes=[Route("/api/v1/decks/pricing/cardkingdom/{deck_id}", self.deck)])
+
+    async def deck(self, request: Request) -> JSONResponse:
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            if self.rng.random() < self.throttle_rate:
+                self.throttled += 1
+                return JSONResponse(
+                    {"detail": "Too many requests"}, status_code=429,
+                    headers={"Retry-After": str(self.retry_after)},
+                )
+            deck_id = request.path_params["deck_id"]
+            return JSONResponse(
+                [{"name": f"Card {deck_id}-{i}", "qty": self.rng.randint(1, 4)} for i in range(23)]
+            )
+        finally:
+            self.in_flight -= 1
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    port = _free_port()
+    os.environ["UNTAPPED_API_BASE_URL"] = f"http://127.0.0.1:{port}/api/v1/decks/pricing/cardkingdom/"
+    from app.services.untapped import build_untapped_decks_api_urls, fetch_untapped_decks_from_api
+
+    stand_in = StandInServer(args.latency, args.throttle_rate, args.retry_after, args.seed)
+    server = uvicorn.Server(uvicorn.Config(stand_in.app, host="127.0.0.1", port=port, log_level="warning"))
+    serve = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    try:
+        untapped_decks = await build_untapped_decks_api_urls(
+            [f"/decks/deck-{i}/{i:08d}" for i in range(args.decks)]
+        )
+        start = time.perf_counter()
+        decks = await fetch_untapped_decks_from_api(
+            cursor=None, cookies={"sessionid": "bench", "csrfToken": "bench"}, untapped_decks=untapped_decks
+        )
+        seconds = time.perf_counter() - start
+    finally:
+        server.should_exit = True
+        await serve
+
+    return {
+        "decks": args.decks,
+        "fetched": sum(1 for deck in decks if not deck.get("error")),
+        "failed": sum(1 for deck in decks if deck.get("error")),
+        "seconds": round(seconds, 3),
+        "decks_per_second": round(args.decks / seconds, 2),
+        "requests": stand_in.requests,
+        "throttled": stand_in.throttled,
+        "max_in_flight": stand_in.max_in_flight,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--decks", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds the server takes per request")
+    parser.add_argument("--throttle-rate", type=float, default=0.05, help="Share of requests refused with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with a 429")
+    parser.add_argument("--seed", type=int, default=17)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Benchmark parsing saved untapped.gg deck list pages.
+
+Compares the previous BeautifulSoup + jsonpickle parse with extract_untapped_page on saved
+pages, or on synthetic Next.js pages of the given sizes: nested styled-component markup with
+deck links, inline scripts and a large __NEXT_DATA__ script at the end. Checks that both
+find the same cookies and deck URLs and reports the fastest of a few runs. Prints one JSON
+object per page.
+
+    python bench/untapped_html.py --size-mb 1 5 20
+    python bench/untapped_html.py --page saved_decks_page.html
+"""
+
+import argparse
+import json
+import pathlib
+import random
+import sys
+import time
+from typing import Any, Callable
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from app.utils.untapped_html import extract_untapped_page  # noqa: E402
+
+
+def beautifulsoup_parse(html_doc: str) -> dict:
+    """The parse extract_untapped_page replaced, minus the async wrapper."""
+    from bs4 import BeautifulSoup
+    import jsonpickle
+
+    result = {}
+    soup = BeautifulSoup(html_doc, 'html.parser')
+
+    next_data_raw = soup.find("script", type="application/json", id="__NEXT_DATA__")
+    if not next_data_raw:
+        raise ValueError("Could not find __NEXT_DATA__ script tag in HTML")
+    next_data = jsonpickle.decode(next_data_raw.string)
+
+    result["cookies"] = {}
+    for cookie in next_data.get("props", {}).get("cookieHeader", "").split(";"):
+        if "sessionid" in cookie:
+            result["cookies"]["session_id"] = cookie.split("=")[1].strip()
+        if "csrftoken" in cookie:
+            result["cookies"]["csrf_token"] = cookie.split("=")[1].strip()
+
+    deck_tags = soup.find_all("a", class_="sc-bf50840f-1 ptaNk")
+    result["deck_urls"] = list(set([dt.get("href") for dt in deck_tags if dt.get("href")]))
+    return result
+
+
+PARSERS: dict[str, Callable[[str], dict]] = {
+    "beautifulsoup": beautifulsoup_parse,
+    "streaming": extract_untapped_page,
+}
+
+
+def _deck_card(rng: random.Random, i: int) -> str:
+    slug = f"{rng.choice(['azorius', 'dimir', 'rakdos', 'gruul', 'selesnya'])}-{rng.choice(['control', 'aggro', 'midrange'])}"
+    return (
+        f'<div class="sc-1x5x9-0 kYqpBd"><div class="sc-bf50840f-0 hFhXvS">'
+        f'<a class="sc-bf50840f-1 ptaNk" href="/meta/decks/{slug}/{i:08d}?format=standard&amp;tier=1">'
+        f'<span class="sc-3c2b8f-2 eWqTzS">{slug.replace("-", " ").title()}</span></a>'
+        f'<a class="sc-7b1f1f-3 gQjTzS" href="/profile/{rng.getrandbits(32):08x}">author</a>'
+        + "".join(
+            f'<img class="sc-5e4f-1 mana" alt="{c}" src="/static/mana/{c}.svg" loading="lazy">'
+            for c in rng.sample("WUBRG", rng.randint(1, 3))
+        )
+        + f'<span class="sc-9d2f-4 win-rate" data-value="{rng.uniform(40, 65):.2f}">{rng.uniform(40, 65):.1f}%</span>'
+        + "</div></div>\n"
+    )
+
+
+def synthetic_page(size_bytes: int, seed: int) -> str:
+    """A Next.js-like deck list page of roughly size_bytes, half markup and half __NEXT_DATA__."""
+    rng = random.Random(seed)
+    head = (
+        "<!DOCTYPE html><html lang=\"en\"><head><meta charSet=\"utf-8\"/>"
+        "<title>MTGA Meta Decks | Untapped.gg</title>"
+        + "".join(f'<link rel="preload" href="/_next/static/chunks/{i}.js" as="script"/>' for i in range(40))
+        + "<style>" + "".join(f".sc-{i:x}{{display:flex;gap:{i % 8}px}}" for i in range(2000)) + "</style>"
+        + "<script>window.dataLayer=window.dataLayer||[];function gtag(){dataLayer.push(arguments)}</script>"
+        + "</head><body><div id=\"__next\">"
+    )
+    body = []
+    size = len(head)
+    i = 0
+    while size < size_bytes // 2:
+        card = _deck_card(rng, i)
+        body.append(card)
+        size += len(card)
+        i += 1
+
+    decks = []
+    data_size = 0
+    while data_size < size_bytes // 2:
+        deck = {
+            "id": rng.getrandbits(40),
+            "name": f"Deck {len(decks)}",
+            "cards": [{"arenaId": rng.randint(80000, 99999), "qty": rng.randint(1, 4)} for _ in range(30)],
+            "stats": {"winRate": rng.random(), "matches": rng.randint(100, 90000)},
+        }
+        decks.append(deck)
+        data_size += 1200
+    next_data = {
+        "props": {
+            "cookieHeader": "theme=dark; sessionid=bench-session-id; csrftoken=bench-csrf-token",
+            "pageProps": {"decks": decks},
+        },
+        "page": "/meta/decks",
+        "buildId": "bench",
+    }
+    tail = (
+        "</div>"
+        f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(next_data)}</script>'
+        + "".join(f'<script src="/_next/static/chunks/{i}.js" async=""></script>' for i in range(40))
+        + "</body></html>"
+    )
+    return head + "".join(body) + tail
+
+
+def _normalized(result: dict) -> dict:
+    return {"cookies": result["cookies"], "deck_urls": sorted(result["deck_urls"])}
+
+
+def run(name: str, html_doc: str, parsers: list[str], repeat: int) -> dict[str, Any]:
+    report: dict[str, Any] = {"page": name, "bytes": len(html_doc.encode("utf-8"))}
+    results = {}
+    for parser in parsers:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results[parser] = PARSERS[parser](html_doc)
+            timings.append(time.perf_counter() - start)
+        seconds = min(timings)
+        report[parser] = {
+            "seconds": round(seconds, 4),
+            "mb_per_second": round(report["bytes"] / 1e6 / seconds, 1),
+            "deck_urls": len(results[parser]["deck_urls"]),
+        }
+    normalized = [_normalized(result) for result in results.values()]
+    report["same_result"] = all(result == normalized[0] for result in normalized)
+    if "beautifulsoup" in report and "streaming" in report:
+        report["speedup"] = round(report["beautifulsoup"]["seconds"] / report["streaming"]["seconds"], 1)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--page", nargs="*", default=[], help="Saved pages to parse")
+    parser.add_argument("--size-mb", type=float, nargs="*", default=[1, 5], help="Synthetic page sizes")
+    parser.add_argument("--parser", nargs="+", default=sorted(PARSERS), choices=sorted(PARSERS))
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per parser; the fastest is reported")
+    parser.add_argument("--seed", type=int, default=17)
+    args = parser.parse_args()
+
+    pages = [(path, pathlib.Path(path).read_text(encoding="utf-8")) for path in args.page]
+    if not args.page:
+        pages = [(f"synthetic-{size}mb", synthetic_page(int(size * 1e6), args.seed)) for size in args.size_mb]
+    for name, html_doc in pages:
+        print(json.dumps(run(name, html_doc, args.parser, args.repeat)), flush=True)
+
+
+if __name__ == "__main__":
+    main()
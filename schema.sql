@@ -11,13 +11,14 @@ CREATE TABLE IF NOT EXISTS scryfall_all_cards (object TEXT, id TEXT, name TEXT,
 
 CREATE TABLE IF NOT EXISTS decks
 (
-    id       INTEGER PRIMARY KEY,
-    name     TEXT NOT NULL,
-    source   TEXT NOT NULL,
-    author   TEXT,
-    format   TEXT,
-    url      TEXT NOT NULL,
-    added_at TEXT NOT NULL
+    id          INTEGER PRIMARY KEY,
+    name        TEXT NOT NULL,
+    source      TEXT NOT NULL,
+    author      TEXT,
+    format      TEXT,
+    url         TEXT NOT NULL,
+    added_at    TEXT NOT NULL,
+    fingerprint TEXT
 );
 
 CREATE TABLE IF NOT EXISTS deck_cards
@@ -52,3 +53,60 @@ CREATE TABLE IF NOT EXISTS "17lands_abilities" (
 );
 
 
+
+CREATE TABLE IF NOT EXISTS import_jobs
+(
+    id         INTEGER PRIMARY KEY,
+    kind       TEXT    NOT NULL,
+    status     TEXT    NOT NULL,
+    cookies    TEXT,
+    total      INTEGER NOT NULL DEFAULT 0,
+    done       INTEGER NOT NULL DEFAULT 0,
+    skipped    INTEGER NOT NULL DEFAULT 0,
+    failed     INTEGER NOT NULL DEFAULT 0,
+    error      TEXT,
+    created_at TEXT    NOT NULL,
+    updated_at TEXT    NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS import_job_items
+(
+    id      INTEGER PRIMARY KEY,
+    job_id  INTEGER NOT NULL,
+    name    TEXT    NOT NULL,
+    url     TEXT    NOT NULL,
+    api_url TEXT    NOT NULL,
+    status  TEXT    NOT NULL,
+    error   TEXT,
+    FOREIGN KEY (job_id) REFERENCES import_jobs (id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS import_job_items_job_status ON import_job_items (job_id, status);
+
+CREATE TABLE IF NOT EXISTS http_cache
+(
+    url           TEXT PRIMARY KEY,
+    body          BLOB    NOT NULL,
+    etag          TEXT,
+    last_modified TEXT,
+    size          INTEGER NOT NULL,
+    fetched_at    REAL    NOT NULL,
+    expires_at    REAL    NOT NULL,
+    last_used_at  REAL    NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS http_cache_last_used ON http_cache (last_used_at);
+
+CREATE INDEX IF NOT EXISTS scryfall_all_cards_name ON scryfall_all_cards (name);
+CREATE INDEX IF NOT EXISTS scryfall_all_cards_id ON scryfall_all_cards (id);
+
+CREATE INDEX IF NOT EXISTS decks_added_at ON decks (added_at, id);
+
+-- Bumped in the same transaction as every change to decks; rendered deck pages are cached per generation
+CREATE TABLE IF NOT EXISTS deck_generation
+(
+    id         INTEGER PRIMARY KEY CHECK (id = 1),
+    generation INTEGER NOT NULL
+);
+
+INSERT OR IGNORE INTO deck_generation (id, generation) VALUES (1, 0);
@@ -1,12 +1,14 @@
 import datetime
-import gzip
-import json
 from typing import Any, Optional
 
 import requests
 
+import http_session
 import logging_utils
+import outbox
+import payload_codec
 import retry_utils
+import submission_queue
 
 logger = logging_utils.get_logger("api_client")
 
@@ -14,31 +16,95 @@ DEFAULT_HOST = "https://api.17lands.com"
 
 _ERROR_COOLDOWN = datetime.timedelta(minutes=2)
 
+# Game and error submissions are large, so allow fewer of them to pile up.
+_ENDPOINT_QUEUE_LIMITS = {
+    "api/client/add_game": 50,
+    "api/client/log_errors": 20,
+}
+# These endpoints replace the previous state wholesale, so only the latest pending blob matters.
+_COALESCED_ENDPOINTS = frozenset(
+    {
+        "api/client/update_card_collection",
+        "api/client/update_inventory",
+        "api/client/update_ongoing_events",
+        "api/client/update_player_progress",
+    }
+)
+
 
 class ApiClient:
-    def __init__(self, host: str) -> None:
+    def __init__(
+            self,
+            host: str,
+            outbox_path: Optional[str] = None,
+            http_options: Optional[http_session.HttpOptions] = None,
+            codec: Optional[payload_codec.Codec] = None,
+    ) -> None:
+        """
+        :param host:         The API host to submit to.
+        :param outbox_path:  SQLite file persisting pending submissions across restarts. When not
+                             given, pending submissions are only kept in memory.
+        :param http_options: Connection pool size, timeouts and HTTP/2 preference.
+        :param codec:        Compression for large submissions. Defaults to gzip.
+        """
         self.host = host
+        self._codec = codec or payload_codec.GzipCodec()
+        self._http_options = http_options or http_session.HttpOptions()
+        self._session = http_session.create_session(host, self._http_options)
         self._last_error_posted_at = datetime.datetime.utcnow() - _ERROR_COOLDOWN
 
+        store: submission_queue.SubmissionStore
+        if outbox_path:
+            store = outbox.Outbox(
+                path=outbox_path,
+                host=host,
+                encode=self._encode,
+                endpoint_limits=_ENDPOINT_QUEUE_LIMITS,
+                coalesced_endpoints=_COALESCED_ENDPOINTS,
+            )
+        else:
+            store = submission_queue.MemoryStore(
+                endpoint_limits=_ENDPOINT_QUEUE_LIMITS,
+                coalesced_endpoints=_COALESCED_ENDPOINTS,
+            )
+        self._submissions = submission_queue.SubmissionQueue(
+            send=self._send_submission, store=store
+        )
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Wait (up to the timeout) for queued submissions to be sent, then drop connections."""
+        drained = self._submissions.close(timeout=timeout)
+        self._session.close()
+        return drained
+
+    def _submit(self, endpoint: str, blob: Any, compress: bool = False) -> None:
+        self._submissions.put(endpoint, blob, compress=compress)
+
+    def _encode(self, blob: Any, compress: bool) -> payload_codec.Payload:
+        return payload_codec.encode_payload(blob, self._codec if compress else None)
+
+    def _send_submission(
+        self, submission: submission_queue.Submission
+    ) -> requests.Response:
+        payload = submission.payload
+        if payload is None:
+            payload = self._encode(submission.blob, submission.compress)
+        return self._retry_post(submission.endpoint, payload)
+
     def _retry_post(
-        self, endpoint: str, blob: Any, use_gzip: bool = False
+        self, endpoint: str, payload: payload_codec.Payload
     ) -> requests.Response:
+        # The payload is encoded once by the caller and reused by every attempt
         def _send_request() -> requests.Response:
-            args: dict[str, Any] = {
-                "url": f"{self.host}/{endpoint}",
-            }
-
-            if use_gzip:
-                args["data"] = gzip.compress(json.dumps(blob).encode("utf8"))
-                args["headers"] = {
-                    "content-type": "application/json",
-                    "content-encoding": "gzip",
-                }
-            else:
-                args["json"] = blob
-
-            logger.debug(f"Sending POST request: {args}")
-            return requests.post(**args)
+            logger.debug(
+                f"Sending POST request to {self.host}/{endpoint}: {len(payload.body)} bytes ({payload.content_encoding or 'identity'})"
+            )
+            return self._session.post(
+                url=f"{self.host}/{endpoint}",
+                data=payload.body,
+                headers=payload.headers,
+                timeout=self._http_options.timeout,
+            )
 
         def _validate_response(response: requests.Response) -> bool:
             logger.debug(
@@ -49,12 +115,17 @@ class ApiClient:
         return retry_utils.retry_api_call(
             callback=_send_request,
             response_validator=_validate_response,
+            idempotent=False,
         )
 
     def _retry_get(self, endpoint: str, params: dict[str, Any]) -> requests.Response:
         def _send_request() -> requests.Response:
             logger.debug(f"Sending GET to {self.host}/{endpoint}: {params}")
-            return requests.get(f"{self.host}/{endpoint}", params=params)
+            return self._session.get(
+                f"{self.host}/{endpoint}",
+                params=params,
+                timeout=self._http_options.timeout,
+            )
 
         def _validate_response(response: requests.Response) -> bool:
             logger.debug(f"{response.status_code} Response: {response.text}")
@@ -71,114 +142,114 @@ class ApiClient:
             params=params,
         )
 
-    def submit_collection(self, blob: dict[str, Any]) -> requests.Response:
-        return self._retry_post(
+    def submit_collection(self, blob: dict[str, Any]) -> None:
+        self._submit(
             endpoint="api/client/update_card_collection",  # Formerly /collection
             blob=blob,
         )
 
-    def submit_deck_submission(self, blob: dict[str, Any]) -> requests.Response:
-        return self._retry_post(
+    def submit_deck_submission(self, blob: dict[str, Any]) -> None:
+        self._submit(
             endpoint="api/client/add_deck",  # Formerly /deck
             blob=blob,
         )
 
-    def submit_draft_pack(self, blob: dict[str, Any]) -> requests.Response:
-        return self._retry_post(
+    def submit_draft_pack(self, blob: dict[str, Any]) -> None:
+        self._submit(
             endpoint="api/client/add_pack",  # Formerly /pack
             blob=blob,
         )
 
-    def submit_draft_pick(self, blob: dict[str, Any]) -> requests.Response:
-        return self._retry_post(
+    def submit_draft_pick(self, blob: dict[str, Any]) -> None:
+        self._submit(
             endpoint="api/client/add_pick",  # Formerly /pick
             blob=blob,
         )
 
-    def submit_event_course_submission(self, blob: dict[str, Any]) -> requests.Response:
-        return self._retry_post(
+    def submit_event_course_submission(self, blob: dict[str, Any]) -> None:
+        self._submit(
             endpoint="api/client/update_event_course",  # Formerly /event_course
             blob=blob,
         )
 
-    def submit_joined_event(self, blob: dict[str, Any]) -> requests.Response:
-        return self._retry_post(
+    def submit_joined_event(self, blob: dict[str, Any]) -> None:
+        self._submit(
             endpoint="api/client/record_event_join",
             blob=blob,
         )
 
-    def submit_event_ended(self, blob: dict[str, Any]) -> requests.Response:
-        return self._retry_post(
+    def submit_event_ended(self, blob: dict[str, Any]) -> None:
+        self._submit(
             endpoint="api/client/mark_event_ended",  # Formerly /event_ended
             blob=blob,
         )
 
-    def submit_event_submission(self, blob: dict[str, Any]) -> requests.Response:
-        return self._retry_post(
+    def submit_event_submission(self, blob: dict[str, Any]) -> None:
+        self._submit(
             endpoint="api/client/add_event",  # Formerly /event
             blob=blob,
         )
 
-    def submit_game_result(self, blob: dict[str, Any]) -> requests.Response:
-        return self._retry_post(
+    def submit_game_result(self, blob: dict[str, Any]) -> None:
+        self._submit(
             endpoint="api/client/add_game",  # Formerly /game
             blob=blob,
-            use_gzip=True,
+            compress=True,
         )
 
-    def submit_human_draft_pack(self, blob: dict[str, Any]) -> requests.Response:
-        return self._retry_post(
+    def submit_human_draft_pack(self, blob: dict[str, Any]) -> None:
+        self._submit(
             endpoint="api/client/add_human_draft_pack",  # Formerly /human_draft_pack
             blob=blob,
         )
 
-    def submit_human_draft_pick(self, blob: dict[str, Any]) -> requests.Response:
-        return self._retry_post(
+    def submit_human_draft_pick(self, blob: dict[str, Any]) -> None:
+        self._submit(
             endpoint="api/client/add_human_draft_pick",  # Formerly /human_draft_pick
             blob=blob,
         )
 
-    def submit_inventory(self, blob: dict[str, Any]) -> requests.Response:
-        return self._retry_post(
+    def submit_inventory(self, blob: dict[str, Any]) -> None:
+        self._submit(
             endpoint="api/client/update_inventory",  # Formerly /inventory
             blob=blob,
         )
 
-    def submit_ongoing_events(self, blob: dict[str, Any]) -> requests.Response:
-        return self._retry_post(
+    def submit_ongoing_events(self, blob: dict[str, Any]) -> None:
+        self._submit(
             endpoint="api/client/update_ongoing_events",  # Formerly /ongoing_events
             blob=blob,
         )
 
-    def submit_player_progress(self, blob: dict[str, Any]) -> requests.Response:
-        return self._retry_post(
+    def submit_player_progress(self, blob: dict[str, Any]) -> None:
+        self._submit(
             endpoint="api/client/update_player_progress",  # Formerly /player_progress
             blob=blob,
         )
 
-    def submit_rank(self, blob: dict[str, Any]) -> requests.Response:
-        return self._retry_post(
+    def submit_rank(self, blob: dict[str, Any]) -> None:
+        self._submit(
             endpoint="api/client/add_rank",  # Formerly /api/rank
             blob=blob,
         )
 
-    def submit_user(self, blob: dict[str, Any]) -> requests.Response:
-        return self._retry_post(
+    def submit_user(self, blob: dict[str, Any]) -> None:
+        self._submit(
             endpoint="api/client/add_mtga_account",  # Formerly /api/account
             blob=blob,
         )
 
-    def submit_error_info(self, blob: dict[str, Any]) -> Optional[requests.Response]:
+    def submit_error_info(self, blob: dict[str, Any]) -> None:
         now = datetime.datetime.utcnow()
         if self._last_error_posted_at > now - _ERROR_COOLDOWN:
             logger.warning(
                 f"Waiting to post another error; last message was sent too recently ({self._last_error_posted_at.isoformat()})"
             )
-            return None
+            return
 
         self._last_error_posted_at = now
-        return self._retry_post(
+        self._submit(
             endpoint="api/client/log_errors",  # Formerly /api/client_errors
             blob=blob,
-            use_gzip=True,
+            compress=True,
         )
@@ -0,0 +1,30 @@
+import logging
+import logging.handlers
+
+# No imports from this package and no side effects, so the app's logging setup can share
+# these with the follower, which imports its modules as top-level scripts.
+
+
+class DeferredFlushMixin:
+    """Skips the flush after every record; BatchingQueueListener flushes once the queue is drained."""
+
+    def flush(self) -> None:
+        pass
+
+    def flush_batch(self) -> None:
+        super().flush()
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    def dequeue(self, block: bool) -> logging.LogRecord:
+        if block and self.queue.empty():
+            self.flush()
+        return super().dequeue(block)
+
+    def flush(self) -> None:
+        for handler in self.handlers:
+            getattr(handler, "flush_batch", handler.flush)()
+
+    def stop(self) -> None:
+        super().stop()
+        self.flush()
@@ -0,0 +1,133 @@
+import hashlib
+import os
+import pickle
+from typing import Any, NamedTuple, Optional
+
+import logging_utils
+
+logger = logging_utils.get_logger("checkpoint")
+
+DEFAULT_CHECKPOINT_DIR = os.path.join(os.path.expanduser("~"), ".seventeenlands", "checkpoints")
+CHECKPOINT_FORMAT_VERSION = 1
+
+# Bytes hashed at the start of the file, and just before the checkpointed offset
+_WINDOW_SIZE = 4096
+
+
+class FileIdentity(NamedTuple):
+    """Enough about a log file to tell whether it is still the file a checkpoint was taken of."""
+
+    path: str
+    device: int
+    inode: int
+    head_size: int
+    head_hash: str
+    tail_hash: str
+
+
+def _hash_range(f: Any, start: int, size: int) -> str:
+    f.seek(start)
+    return hashlib.blake2b(f.read(size), digest_size=16).hexdigest()
+
+
+def checkpoint_file(directory: str, filename: str) -> str:
+    """Return where the checkpoint for a log file is kept; each log file has its own."""
+    key = hashlib.blake2b(os.path.abspath(filename).encode("utf8"), digest_size=8).hexdigest()
+    return os.path.join(directory, f"{key}.pkl")
+
+
+def file_identity(filename: str, offset: int) -> FileIdentity:
+    """
+    Identify a log file as of the given byte offset.
+
+    Besides the device and inode, this hashes the first bytes of the file and the bytes just
+    before the offset, so a log that was truncated and rewritten in place is not mistaken for
+    the original.
+
+    :param filename: The log file.
+    :param offset:   The byte offset the checkpoint resumes from.
+
+    :returns: The file's identity.
+    """
+    stat = os.stat(filename)
+    head_size = min(offset, _WINDOW_SIZE)
+    tail_start = max(0, offset - _WINDOW_SIZE)
+    with open(filename, "rb") as f:
+        return FileIdentity(
+            path=os.path.abspath(filename),
+            device=stat.st_dev,
+            inode=stat.st_ino,
+            head_size=head_size,
+            head_hash=_hash_range(f, 0, head_size),
+            tail_hash=_hash_range(f, tail_start, offset - tail_start),
+        )
+
+
+def save_checkpoint(
+        directory: str, filename: str, offset: int, state: dict[str, Any], client_version: str
+) -> None:
+    """
+    Atomically write a checkpoint of the follower's progress through a log file.
+
+    :param directory:      The directory checkpoints are kept in.
+    :param filename:       The log file being followed.
+    :param offset:         The byte offset of the first unread line.
+    :param state:          The follower state to restore, as of offset.
+    :param client_version: The client version; checkpoints from other versions are ignored.
+    """
+    checkpoint = {
+        "format_version": CHECKPOINT_FORMAT_VERSION,
+        "client_version": client_version,
+        "identity": file_identity(filename, offset),
+        "offset": offset,
+        "state": state,
+    }
+    os.makedirs(directory, exist_ok=True)
+    path = checkpoint_file(directory, filename)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+
+
+def load_checkpoint(
+        directory: str, filename: str, client_version: str
+) -> Optional[tuple[int, dict[str, Any]]]:
+    """
+    Load a checkpoint, if it was taken of this log file and the file has only grown since.
+
+    :param directory:      The directory checkpoints are kept in.
+    :param filename:       The log file about to be followed.
+    :param client_version: The running client version.
+
+    :returns: The byte offset to resume from and the follower state, or None to start over.
+    """
+    path = checkpoint_file(directory, filename)
+    try:
+        with open(path, "rb") as f:
+            checkpoint = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+        return None
+
+    if (
+            checkpoint.get("format_version") != CHECKPOINT_FORMAT_VERSION
+            or checkpoint.get("client_version") != client_version
+    ):
+        logger.info("Ignoring checkpoint from a different client version")
+        return None
+
+    offset = checkpoint["offset"]
+    try:
+        if os.path.getsize(filename) < offset:
+            return None
+        identity = file_identity(filename, offset)
+    except OSError:
+        return None
+    if identity != checkpoint["identity"]:
+        logger.info(f"Checkpoint is for a different log file than {filename}; starting over")
+        return None
+
+    return offset, checkpoint["state"]
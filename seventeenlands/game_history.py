@@ -0,0 +1,163 @@
+import json
+import zlib
+from array import array
+from typing import Any, Iterator, Optional
+
+COMPRESSION_MODES = ("none", "event", "stream")
+DEFAULT_COMPRESSION = "stream"
+DEFAULT_LEVEL = 6
+
+_SEPARATOR = ", "
+
+
+def _serialize(event: dict[str, Any], timestamp: Optional[str]) -> bytes:
+    # Prepend the timestamp to the encoded text rather than building a merged dict
+    text = json.dumps(event)
+    prefix = '{"_timestamp": ' + json.dumps(timestamp)
+    if text == "{}":
+        return (prefix + "}").encode("utf8")
+    return (prefix + ", " + text[1:]).encode("utf8")
+
+
+class GameHistory:
+    """
+    Append-only store of the GRE messages recorded during a game.
+
+    Events are kept as their JSON encoding rather than as live dicts. Successive game state
+    messages repeat most of their keys and values, so the default "stream" mode feeds every
+    event through one zlib stream and lets the compressor's window share them; "event"
+    compresses each event on its own, and "none" keeps the plain text.
+    """
+
+    def __init__(self, compression: str = DEFAULT_COMPRESSION, level: int = DEFAULT_LEVEL) -> None:
+        """
+        :param compression: One of COMPRESSION_MODES.
+        :param level:       zlib compression level.
+        """
+        if compression not in COMPRESSION_MODES:
+            raise ValueError(f"Unknown history compression: {compression}")
+        self.compression = compression
+        self.level = level
+        # Compressed (or plain) output, and the end offset of each event in the plain text
+        self._chunks: list[bytes] = []
+        self._ends = array("Q")
+        self._compressor = zlib.compressobj(level) if compression == "stream" else None
+
+    def append(self, event: dict[str, Any], timestamp: Optional[str] = None) -> None:
+        """
+        Record a message.
+
+        :param event:     The message blob.
+        :param timestamp: ISO timestamp stored under the event's "_timestamp" key.
+        """
+        data = _serialize(event, timestamp)
+        self._ends.append((self._ends[-1] if self._ends else 0) + len(data))
+        if self._compressor is not None:
+            chunk = self._compressor.compress(data)
+            if chunk:
+                self._chunks.append(chunk)
+        elif self.compression == "event":
+            self._chunks.append(zlib.compress(data, self.level))
+        else:
+            self._chunks.append(data)
+
+    def freeze(self) -> "HistoryView":
+        """Return a read-only view of the events recorded so far."""
+        if self._compressor is not None:
+            # Make everything written so far decodable without ending the stream
+            self._chunks.append(self._compressor.flush(zlib.Z_SYNC_FLUSH))
+        return HistoryView(self.compression, self._chunks, len(self._chunks), self._ends, len(self._ends))
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of event data held, not counting data still buffered in the compressor."""
+        return sum(len(chunk) for chunk in self._chunks)
+
+    def __len__(self) -> int:
+        return len(self._ends)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        return iter(self._snapshot(zlib.Z_SYNC_FLUSH))
+
+    def _snapshot(self, flush_mode: int) -> "HistoryView":
+        # Flush a copy of the compressor, so reading leaves the stored stream as it was
+        chunks = self._chunks
+        if self._compressor is not None:
+            chunks = chunks + [self._compressor.copy().flush(flush_mode)]
+        return HistoryView(self.compression, chunks, len(chunks), self._ends, len(self._ends))
+
+    def __getstate__(self) -> dict[str, Any]:
+        # A compressor can't be pickled, so store a copy of the stream ended there; the
+        # restored history starts a new stream for later events
+        state = {k: v for k, v in self.__dict__.items() if k != "_compressor"}
+        if self._compressor is not None:
+            state["_chunks"] = self._snapshot(zlib.Z_FINISH)._chunks
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._compressor = zlib.compressobj(self.level) if self.compression == "stream" else None
+
+
+class HistoryView:
+    """
+    Frozen prefix of a GameHistory.
+
+    Iterating decodes one event at a time, and iter_json_chunks() streams the JSON array
+    without decoding the events at all, so the submission path never holds the whole history
+    as dicts.
+    """
+
+    __slots__ = ("_compression", "_chunks", "_chunk_count", "_ends", "_length")
+
+    def __init__(
+            self, compression: str, chunks: list[bytes], chunk_count: int, ends: array, length: int
+    ) -> None:
+        self._compression = compression
+        self._chunks = chunks
+        self._chunk_count = chunk_count
+        self._ends = ends
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        for data in self._iter_event_bytes():
+            yield json.loads(data)
+
+    def iter_json_chunks(self) -> Iterator[str]:
+        yield "["
+        for i, data in enumerate(self._iter_event_bytes()):
+            if i:
+                yield _SEPARATOR
+            yield data.decode("utf8")
+        yield "]"
+
+    def _iter_event_bytes(self) -> Iterator[bytes]:
+        if self._compression == "none":
+            yield from self._chunks[: self._length]
+        elif self._compression == "event":
+            for chunk in self._chunks[: self._length]:
+                yield zlib.decompress(chunk)
+        else:
+            yield from self._split_stream()
+
+    def _split_stream(self) -> Iterator[bytes]:
+        decompressor = zlib.decompressobj()
+        buffer = bytearray()
+        start = 0
+        index = 0
+        for chunk in self._chunks[: self._chunk_count]:
+            if decompressor.eof:
+                # The history was pickled mid-game, which ends one stream and starts another
+                decompressor = zlib.decompressobj()
+            buffer += decompressor.decompress(chunk)
+            while index < self._length and self._ends[index] - start <= len(buffer):
+                size = self._ends[index] - start
+                yield bytes(buffer[:size])
+                del buffer[:size]
+                start = self._ends[index]
+                index += 1
+            if index == self._length:
+                return
@@ -0,0 +1,164 @@
+import collections
+import json
+import urllib.parse
+from typing import Any, NamedTuple, Optional, Union
+
+import requests
+import requests.adapters
+import requests.structures
+import urllib3.exceptions
+
+import logging_utils
+
+logger = logging_utils.get_logger("http_session")
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 60.0
+
+MOCK_SCHEME = "mock://"
+MOCK_HOST = f"{MOCK_SCHEME}17lands"
+
+_MOCK_RESPONSES: dict[str, Any] = {
+    "api/client/client_version_validation": {"min_version": "0.0.0"},
+}
+
+
+class HttpOptions(NamedTuple):
+    pool_size: int = DEFAULT_POOL_SIZE
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT
+    read_timeout: float = DEFAULT_READ_TIMEOUT
+    http2: bool = False
+
+    @property
+    def timeout(self) -> tuple[float, float]:
+        return self.connect_timeout, self.read_timeout
+
+
+class MockAdapter(requests.adapters.BaseAdapter):
+    """Answers requests locally, recording them, so the client can run without network access."""
+
+    def __init__(self, max_recorded: int = 100) -> None:
+        super().__init__()
+        self.requests: collections.deque[requests.PreparedRequest] = collections.deque(
+            maxlen=max_recorded
+        )
+
+    def send(
+            self,
+            request: requests.PreparedRequest,
+            stream: bool = False,
+            timeout: Any = None,
+            verify: Any = True,
+            cert: Any = None,
+            proxies: Any = None,
+    ) -> requests.Response:
+        self.requests.append(request)
+        endpoint = urllib.parse.urlsplit(request.url).path.lstrip("/")
+
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.url = request.url
+        response.request = request
+        response.encoding = "utf-8"
+        response.headers = requests.structures.CaseInsensitiveDict(
+            {"content-type": "application/json"}
+        )
+        response._content = json.dumps(_MOCK_RESPONSES.get(endpoint, {})).encode("utf8")
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+class Http2Session:
+    """Minimal requests-style session backed by an httpx client speaking HTTP/2."""
+
+    def __init__(self, pool_size: int) -> None:
+        import httpx
+
+        self._httpx = httpx
+        # Raises ImportError when the optional h2 package is missing
+        self._client = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=pool_size, max_keepalive_connections=pool_size
+            ),
+        )
+
+    def post(
+            self,
+            url: str,
+            data: Optional[bytes] = None,
+            json: Any = None,
+            headers: Optional[dict[str, str]] = None,
+            timeout: Optional[tuple[float, float]] = None,
+    ) -> Any:
+        return self._request(
+            "POST", url, timeout=timeout, content=data, json=json, headers=headers
+        )
+
+    def get(
+            self,
+            url: str,
+            params: Optional[dict[str, Any]] = None,
+            timeout: Optional[tuple[float, float]] = None,
+    ) -> Any:
+        return self._request("GET", url, timeout=timeout, params=params)
+
+    def close(self) -> None:
+        self._client.close()
+
+    def _request(
+            self, method: str, url: str, timeout: Optional[tuple[float, float]], **kwargs: Any
+    ) -> Any:
+        if timeout is not None:
+            connect_timeout, read_timeout = timeout
+            kwargs["timeout"] = self._httpx.Timeout(read_timeout, connect=connect_timeout)
+        # Map to the requests errors retry_utils knows, keeping connect-phase
+        # failures apart from ones raised after the request was sent
+        try:
+            return self._client.request(method, url, **kwargs)
+        except (self._httpx.ConnectTimeout, self._httpx.PoolTimeout) as e:
+            raise requests.exceptions.ConnectTimeout(str(e)) from e
+        except self._httpx.ConnectError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+        except self._httpx.TimeoutException as e:
+            raise requests.exceptions.ReadTimeout(str(e)) from e
+        except self._httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(
+                urllib3.exceptions.ProtocolError(str(e))
+            ) from e
+
+
+Session = Union[requests.Session, Http2Session]
+
+
+def create_session(host: str, options: HttpOptions) -> Session:
+    """
+    Create a connection-pooling session for talking to the given host.
+
+    :param host:    The API host. Hosts using the mock:// scheme are answered locally.
+    :param options: Pool size, timeouts and protocol preferences.
+
+    :returns: A session whose connections are kept alive between requests.
+    """
+    if host.startswith(MOCK_SCHEME):
+        session = requests.Session()
+        session.mount(MOCK_SCHEME, MockAdapter())
+        return session
+
+    if options.http2:
+        try:
+            return Http2Session(pool_size=options.pool_size)
+        except ImportError:
+            logger.warning("HTTP/2 needs httpx[http2] installed; falling back to HTTP/1.1")
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=1, pool_maxsize=options.pool_size
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
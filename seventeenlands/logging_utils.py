@@ -1,6 +1,10 @@
+import atexit
 import logging
 import logging.handlers
 import os
+import queue
+
+from batched_logging import BatchingQueueListener, DeferredFlushMixin
 
 _LOG_FOLDER = os.path.join(os.path.expanduser("~"), ".seventeenlands")
 if not os.path.exists(_LOG_FOLDER):
@@ -11,16 +15,54 @@ _LOG_FORMATTER = logging.Formatter(
     "%(asctime)s.%(msecs)03d,%(levelname)s,%(name)s,%(message)s",
     datefmt="%Y%m%d %H%M%S",
 )
+
+
+class _TimedRotatingFileHandler(DeferredFlushMixin, logging.handlers.TimedRotatingFileHandler):
+    pass
+
+
+class _StreamHandler(DeferredFlushMixin, logging.StreamHandler):
+    pass
+
+
 _HANDLERS: set[logging.Handler] = {
-    logging.handlers.TimedRotatingFileHandler(
+    _TimedRotatingFileHandler(
         _LOG_FILENAME,
         when="D",
         interval=1,
         backupCount=7,
         utc=True,
     ),
-    logging.StreamHandler(),
+    _StreamHandler(),
 }
+for _handler in _HANDLERS:
+    _handler.setFormatter(_LOG_FORMATTER)
+
+# Loggers only put records on the queue; a listener thread does the formatting and writing,
+# so a slow disk never stalls the follower loop.
+_QUEUE: queue.Queue = queue.Queue()
+_QUEUE_HANDLER = logging.handlers.QueueHandler(_QUEUE)
+_listener = BatchingQueueListener(_QUEUE, *_HANDLERS, respect_handler_level=True)
+_listener.start()
+
+
+def _stop_listener() -> None:
+    _listener.stop()
+
+
+atexit.register(_stop_listener)
+
+
+def _restart_listener_in_child() -> None:
+    # Only the forking thread survives a fork, so the child needs its own queue and listener
+    global _QUEUE, _listener
+    _QUEUE = queue.Queue()
+    _QUEUE_HANDLER.queue = _QUEUE
+    _listener = BatchingQueueListener(_QUEUE, *_HANDLERS, respect_handler_level=True)
+    _listener.start()
+
+
+os.register_at_fork(after_in_child=_restart_listener_in_child)
 
 _loggers: dict[str, logging.Logger] = {}
 
@@ -30,9 +72,7 @@ def get_logger(name: str) -> logging.Logger:
         return _loggers[name]
 
     logger = logging.getLogger(name)
-    for handler in _HANDLERS:
-        handler.setFormatter(_LOG_FORMATTER)
-        logger.addHandler(handler)
+    logger.addHandler(_QUEUE_HANDLER)
 
     logger.setLevel(logging.INFO)
     # logger.info(f"Saving logs to {_LOG_FILENAME}")
@@ -40,3 +80,9 @@ def get_logger(name: str) -> logging.Logger:
     _loggers[name] = logger
 
     return logger
+
+
+def flush() -> None:
+    """Block until every record logged so far has been written."""
+    _QUEUE.join()
+    _listener.flush()
@@ -12,7 +12,7 @@ details.
 """
 
 import argparse
-import copy
+import bisect
 import datetime
 import getpass
 import itertools
@@ -25,14 +25,21 @@ import subprocess
 import sys
 import time
 import traceback
+import types
 import uuid
 from collections import defaultdict
-from typing import Any, Optional
+from typing import Any, Mapping, Optional
 
 import dateutil.parser
 
 import api_client
+import checkpoint
+import game_history
+import http_session
 import logging_utils
+import opponent_state
+import outbox
+import payload_codec
 
 logger = logging_utils.get_logger("17Lands")
 
@@ -102,10 +109,14 @@ class MockApiClient:
     def submit_error_info(self, blob: dict[str, Any]) -> None:
         logger.debug("MockApiClient: Would submit error info")
 
+    def close(self, timeout: Optional[float] = None) -> bool:
+        return True
+
 
 CLIENT_VERSION = "0.1.44.p"
 
 UPDATE_CHECK_INTERVAL = datetime.timedelta(hours=1)
+SUBMISSION_DRAIN_TIMEOUT = datetime.timedelta(minutes=10)
 UPDATE_PROMPT_FREQUENCY = 24
 
 TOKEN_ENTRY_TITLE = "MTGA Log Client Token"
@@ -117,6 +128,56 @@ TOKEN_MISSING_MESSAGE = (
 TOKEN_INVALID_MESSAGE = "That token is invalid. Please specify a valid client token. See 17lands.com/getting_started for more details."
 
 FILE_UPDATED_FORCE_REFRESH_SECONDS = 60
+CHECKPOINT_INTERVAL = datetime.timedelta(seconds=30)
+
+# The parsing state needed to resume from a checkpointed log offset. Configuration,
+# connections and the lines kept only for error reports are left out.
+_CHECKPOINTED_ATTRIBUTES = frozenset(
+    {
+        "buffer",
+        "cur_log_time",
+        "last_utc_time",
+        "last_event_time",
+        "last_raw_time",
+        "disconnected_user",
+        "disconnected_screen_name",
+        "disconnected_full_screen_name",
+        "disconnected_rank",
+        "cur_user",
+        "cur_draft_event",
+        "cur_rank_data",
+        "cur_opponent_level",
+        "cur_opponent_match_id",
+        "current_match_id",
+        "current_event_id",
+        "starting_team_id",
+        "seat_id",
+        "turn_count",
+        "current_game_maindeck",
+        "current_game_sideboard",
+        "current_game_additional_deck_info",
+        "game_service_metadata",
+        "game_client_metadata",
+        "objects_by_owner",
+        "opponent_cards",
+        "opening_hand_count_by_seat",
+        "opening_hand",
+        "drawn_hands",
+        "drawn_cards_by_instance_id",
+        "opponent_actions",
+        "opponent_state",
+        "game_object_annotations",
+        "cards_in_hand",
+        "user_screen_name",
+        "full_screen_name",
+        "screen_names",
+        "game_history_events",
+        "pending_game_submission",
+        "pending_game_result",
+        "pending_match_result",
+        "last_blob",
+    }
+)
 
 OSX_LOG_ROOT = os.path.join("Library", "Logs")
 WINDOWS_LOG_ROOT = os.path.join(
@@ -229,6 +290,14 @@ MAX_MILLISECONDS_SINCE_EPOCH = int(1000 * datetime.datetime(3000, 1, 1).timestam
 _ERROR_LINES_RECENCY = 10
 
 
+def _decode_line(line: bytes) -> str:
+    """Decode a line read in binary mode the way text mode would, with universal newlines."""
+    text = line.decode("utf-8", errors="replace")
+    if text.endswith("\r\n"):
+        return text[:-2] + "\n"
+    return text
+
+
 def extract_time(time_str: str) -> datetime.datetime:
     """
     Convert a time string in various formats to a datetime.
@@ -305,16 +374,144 @@ def contains_log_key(key: str, full_log: str) -> bool:
     return key in full_log or key.replace("_", "") in full_log
 
 
+class OpponentActionTracker:
+    """
+    Tracks the opponent's most recent actions, keyed by (instanceId, actionType).
+
+    The keys are kept in a sorted list that is patched with bisect as actions come and go,
+    so emitting the current actions never needs a full sort.
+    """
+
+    def __init__(self) -> None:
+        self._actions: dict[tuple[Any, Any], dict[str, Any]] = {}
+        self._ordered_keys: list[tuple[Any, Any]] = []
+
+    @staticmethod
+    def _sort_key(key: tuple[Any, Any]) -> tuple[bool, Any, str]:
+        instance_id, action_type = key
+        return instance_id is None, instance_id or 0, action_type or ""
+
+    def update(
+            self, actions: list[dict[str, Any]], seat_id: int
+    ) -> Optional[opponent_state.ActionDiff]:
+        """
+        Replace the tracked actions with the given seat's actions from a single message.
+
+        :param actions: The 'actions' list of a GameStateMessage.
+        :param seat_id: The seat whose actions should be tracked.
+
+        :returns: How the tracked actions changed, or None if they did not.
+        """
+        new_actions = {}
+        for action in actions:
+            if action.get("seatId") != seat_id:
+                continue
+            action_blob = action.get("action", {})
+            key = (action_blob.get("instanceId"), action_blob.get("actionType"))
+            new_actions[key] = action_blob
+
+        # Messages without any actions for the seat leave the previous actions in place
+        if not new_actions or new_actions == self._actions:
+            return None
+
+        removed = list(self._actions.keys() - new_actions.keys())
+        for key in removed:
+            index = bisect.bisect_left(
+                self._ordered_keys, self._sort_key(key), key=self._sort_key
+            )
+            del self._ordered_keys[index]
+        for key in new_actions.keys() - self._actions.keys():
+            bisect.insort(self._ordered_keys, key, key=self._sort_key)
+
+        upserted = [
+            action
+            for key, action in new_actions.items()
+            if self._actions.get(key) != action
+        ]
+        self._actions = new_actions
+        return opponent_state.ActionDiff(upserted=upserted, removed=removed)
+
+    def ordered(self) -> list[dict[str, Any]]:
+        """Return the tracked actions ordered by instance id, then action type."""
+        return [self._actions[key] for key in self._ordered_keys]
+
+
 class Follower:
     """Follows along a log, parses the messages, and passes along the parsed data to the API endpoint."""
 
-    def __init__(self, token: str, host: str) -> None:
+    def __init__(
+            self,
+            token: str,
+            host: str,
+            outbox_path: Optional[str] = None,
+            http_options: Optional[http_session.HttpOptions] = None,
+            codec: Optional[payload_codec.Codec] = None,
+            history_compression: str = game_history.DEFAULT_COMPRESSION,
+            client: Optional[Any] = None,
+            checkpoint_dir: Optional[str] = None,
+    ) -> None:
         self.host = host
         self.token = token
+        self.history_compression = history_compression
+        self.checkpoint_dir = checkpoint_dir
         self.json_decoder = json.JSONDecoder()
-        self._api_client = api_client.ApiClient(host=host)
+        # A client passed in (e.g. a replay recorder) stands in for the 17lands API
+        self._api_client = client or api_client.ApiClient(
+            host=host, outbox_path=outbox_path, http_options=http_options, codec=codec
+        )
         self._reinitialize()
 
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for queued API submissions to be sent.
+
+        :param timeout: Maximum number of seconds to wait, or None to wait indefinitely.
+
+        :returns: Whether or not every submission was sent.
+        """
+        return self._api_client.close(timeout=timeout)
+
+    def checkpoint_state(self) -> dict[str, Any]:
+        """Return the parsing state needed to resume from the current position in the log."""
+        state = {key: getattr(self, key) for key in _CHECKPOINTED_ATTRIBUTES}
+        state["pending_game_submission"] = dict(self.pending_game_submission)
+        return state
+
+    def restore_checkpoint_state(self, state: dict[str, Any]) -> None:
+        """Resume from state returned by checkpoint_state()."""
+        for key in _CHECKPOINTED_ATTRIBUTES.intersection(state):
+            setattr(self, key, state[key])
+        # Whoever reads the opponent records may have seen later ones than the checkpoint's
+        self.opponent_state.reset()
+        if self.pending_game_submission:
+            self.pending_game_submission = types.MappingProxyType(
+                self.pending_game_submission
+            )
+
+    def __save_checkpoint(self, filename: str, offset: int) -> None:
+        try:
+            checkpoint.save_checkpoint(
+                self.checkpoint_dir,
+                filename,
+                offset,
+                self.checkpoint_state(),
+                client_version=CLIENT_VERSION,
+            )
+        except Exception as e:
+            logger.warning(f"Could not save checkpoint to {self.checkpoint_dir}: {e}")
+
+    def __restore_checkpoint(self, filename: str) -> int:
+        """Restore state from the checkpoint for this file, returning the offset to resume from."""
+        loaded = checkpoint.load_checkpoint(
+            self.checkpoint_dir, filename, client_version=CLIENT_VERSION
+        )
+        if loaded is None:
+            return 0
+        offset, state = loaded
+        self.restore_checkpoint_state(state)
+        logger.info(f"Resuming {filename} from checkpoint at byte {offset}")
+        return offset
+
     def _reinitialize(self) -> None:
         self.buffer: list[str] = []
         self.cur_log_time = datetime.datetime.fromtimestamp(0)
@@ -347,14 +544,15 @@ class Follower:
         self.drawn_cards_by_instance_id: defaultdict[Any, dict[Any, Any]] = defaultdict(
             dict
         )
-        self.opponent_actions: list[Any] = []
+        self.opponent_actions = OpponentActionTracker()
+        self.opponent_state = opponent_state.OpponentStateLog()
         self.game_object_annotations: list[Any] = []
         self.cards_in_hand: defaultdict[Any, list[Any]] = defaultdict(list)
         self.user_screen_name: Optional[str] = None
         self.full_screen_name: Optional[str] = None
-        self.screen_names: defaultdict[Any, str] = defaultdict(lambda: "")
-        self.game_history_events: list[Any] = []
-        self.pending_game_submission: dict[str, Any] = {}
+        self.screen_names: defaultdict[Any, str] = defaultdict(str)
+        self.game_history_events = game_history.GameHistory(self.history_compression)
+        self.pending_game_submission: Mapping[str, Any] = {}
         self.pending_game_result: dict[str, Any] = {}
         self.pending_match_result: dict[str, Any] = {}
 
@@ -389,14 +587,25 @@ class Follower:
             last_read_time = time.time()
             last_file_size = 0
             try:
-                with open(filename, errors="replace") as f:
+                # Read bytes so that the offset can be checkpointed and sought back to
+                with open(filename, "rb") as f:
+                    if self.checkpoint_dir:
+                        f.seek(self.__restore_checkpoint(filename))
+                    last_checkpoint_time = time.time()
                     while True:
                         line = f.readline()
                         file_size = pathlib.Path(filename).stat().st_size
                         if line:
-                            self.__append_line(line)
+                            self.__append_line(_decode_line(line))
                             last_read_time = time.time()
                             last_file_size = file_size
+                            if (
+                                    self.checkpoint_dir
+                                    and last_read_time - last_checkpoint_time
+                                    > CHECKPOINT_INTERVAL.total_seconds()
+                            ):
+                                self.__save_checkpoint(filename, f.tell())
+                                last_checkpoint_time = last_read_time
                         else:
                             self.__handle_complete_log_entry()
                             last_modified_time = os.stat(filename).st_mtime
@@ -412,10 +621,15 @@ class Follower:
                                 # # logger.info(
                                 #     f"Starting from beginning of file as file has been updated much more recently than the last read (previous = {last_read_time}; current = {last_modified_time})"
                                 # )
+                                # The checkpoint only resumes if the file was not rewritten
+                                if self.checkpoint_dir:
+                                    self.__save_checkpoint(filename, f.tell())
                                 break
                             elif follow:
                                 time.sleep(SLEEP_TIME)
                             else:
+                                if self.checkpoint_dir:
+                                    self.__save_checkpoint(filename, f.tell())
                                 break
             except FileNotFoundError:
                 time.sleep(SLEEP_TIME)
@@ -430,6 +644,15 @@ class Follower:
                 logger.info("Done processing file.")
                 break
 
+    def _log_opponent_update(self, record: dict[str, Any]) -> None:
+        """
+        Report a change in what is known about the opponent.
+
+        :param record: A delta or snapshot record from opponent_state.OpponentStateLog.
+        """
+        opponent_state.stamp_trace(record, match_id=self.current_match_id)
+        logger.info(opponent_state.format_record(record))
+
     def _log_error(self, message: str, error: Exception, stacktrace: str) -> None:
         logger.error(message)
         self._api_client.submit_error_info(
@@ -777,7 +1000,7 @@ class Follower:
         if "finalMatchResult" in game_room_info:
             results = game_room_info["finalMatchResult"].get("resultList", [])
             if results:
-                if self.__enqueue_game_data():
+                if self._enqueue_game_data():
                     self.__enqueue_game_results(
                         results, match_game_room_state_changed_obj=blob
                     )
@@ -787,10 +1010,7 @@ class Follower:
             self, message_blob: dict[str, Any], timestamp: Optional[datetime.datetime]
     ) -> None:
         self.game_history_events.append(
-            {
-                "_timestamp": None if timestamp is None else timestamp.isoformat(),
-                **message_blob,
-            }
+            message_blob, timestamp=None if timestamp is None else timestamp.isoformat()
         )
 
     def __handle_gre_to_client_message(
@@ -841,13 +1061,8 @@ class Follower:
                     turns_sum = sum(p.get("turnNumber", 0) for p in players)
                     self.turn_count = max(self.turn_count, turns_sum)
 
-                previous_objects_by_owner = {
-                    owner: list(cards.values())
-                    for owner, cards in self.objects_by_owner.items()
-                }
-                previous_opponent_actions = self.opponent_actions.copy()
-                previous_game_object_annotations = self.game_object_annotations.copy()
-
+                opponent_seat_id = 2 if self.seat_id == 1 else 1
+                changed_opponent_cards = {}
                 for game_object in game_state_message.get("gameObjects", []):
                     if game_object["type"] not in (
                             "GameObjectType_Card",
@@ -858,25 +1073,26 @@ class Follower:
                     owner = game_object["ownerSeatId"]
                     instance_id = game_object["instanceId"]
                     card_id = game_object["overlayGrpId"]
+                    if (
+                            self.seat_id
+                            and owner == opponent_seat_id
+                            and self.objects_by_owner[owner].get(instance_id) != card_id
+                    ):
+                        changed_opponent_cards[instance_id] = card_id
                     self.objects_by_owner[owner][instance_id] = card_id
 
+                zones = game_state_message.get("zones", [])
                 actions = game_state_message.get("actions", [])
-                for zone in game_state_message.get("zones", []):
-                    player_seat_id = self.seat_id
-                    opponent_seat_id = 2 if player_seat_id == 1 else 1
-
-                    if zone["type"] == "ZoneType_Battlefield" or zone["type"] == "ZoneType_Stack":
-                        if actions:
-                            for action in actions:
-                                if opponent_seat_id == action.get("seatId"):
-                                    new_actions = {
-                                        (action.get("action").get("instanceId"),
-                                         action.get("action").get("actionType")): action.get("action")
-                                        for action in actions
-                                        if opponent_seat_id == action.get("seatId")
-                                    }
-                                    self.opponent_actions = list(new_actions.values())
+                action_diff = None
+                if actions and any(
+                        zone["type"] in ("ZoneType_Battlefield", "ZoneType_Stack")
+                        for zone in zones
+                ):
+                    action_diff = self.opponent_actions.update(
+                        actions, seat_id=opponent_seat_id
+                    )
 
+                for zone in zones:
                     if zone["type"] == "ZoneType_Hand":
                         owner = zone["ownerSeatId"]
                         player_objects = self.objects_by_owner[owner]
@@ -907,25 +1123,15 @@ class Follower:
                                     "values": color_values
                                 })
 
-                log_parts = []
-
-                for owner, current_cards_dict in self.objects_by_owner.items():
-                    if self.seat_id and owner != self.seat_id:
-                        current_cards = list(current_cards_dict.values())
-                        previous_cards = previous_objects_by_owner.get(owner, [])
-                        if previous_cards != current_cards:
-                            log_parts.append(f"cards={current_cards}")
-
-                if previous_opponent_actions != self.opponent_actions:
-                    from operator import itemgetter
-                    _actions_sorted = sorted(self.opponent_actions, key=itemgetter("instanceId"))
-                    log_parts.append(f"actions={_actions_sorted}")
-
-                if previous_game_object_annotations != self.game_object_annotations:
-                    log_parts.append(f"annotations={self.game_object_annotations}")
-
-                if log_parts:
-                    logger.info(f"::Opponent:: {' | '.join(log_parts)}")
+                record = self.opponent_state.record(
+                    cards=self.objects_by_owner.get(opponent_seat_id, {}),
+                    changed_cards=changed_opponent_cards,
+                    actions=self.opponent_actions.ordered,
+                    action_diff=action_diff,
+                    annotations=self.game_object_annotations,
+                )
+                if record is not None:
+                    self._log_opponent_update(record)
 
                 players_deciding_hand = {
                     (p["systemSeatNumber"], p.get("mulliganCount", 0))
@@ -1041,7 +1247,7 @@ class Follower:
             if self.starting_team_id is None:
                 self.starting_team_id = payload.get("StartingTeamId")
 
-            if self.__enqueue_game_data():
+            if self._enqueue_game_data():
                 self.pending_game_result = {
                     "game_end_payload": payload,
                     "game_number": payload.get("GameNumber"),
@@ -1069,7 +1275,7 @@ class Follower:
 
         results = game_info.get("results")
         if results:
-            if self.__enqueue_game_data():
+            if self._enqueue_game_data():
                 self.__enqueue_game_results(results)
 
     def __maybe_submit_pending_game(self) -> None:
@@ -1088,15 +1294,19 @@ class Follower:
         if submit_pending_game:
             self.__maybe_submit_pending_game()
 
+        # Replace rather than clear the per-game containers: a pending submission may still
+        # reference the finished game's lists.
         self.turn_count = 0
-        self.objects_by_owner.clear()
-        self.opponent_cards.clear()
-        self.opening_hand_count_by_seat.clear()
-        self.opening_hand.clear()
-        self.drawn_hands.clear()
-        self.drawn_cards_by_instance_id.clear()
+        self.objects_by_owner = defaultdict(dict)
+        self.opponent_cards = []
+        self.opening_hand_count_by_seat = defaultdict(int)
+        self.opening_hand = defaultdict(list)
+        self.drawn_hands = defaultdict(list)
+        self.drawn_cards_by_instance_id = defaultdict(dict)
         self.starting_team_id = None
-        self.game_history_events.clear()
+        self.game_history_events = game_history.GameHistory(self.history_compression)
+        # Opponent cards start over, which a delta can't express
+        self.opponent_state.reset()
         self.current_game_maindeck = None
         self.current_game_sideboard = None
         self.current_game_additional_deck_info = None
@@ -1228,7 +1438,7 @@ class Follower:
                 stacktrace=traceback.format_exc(),
             )
 
-    def __enqueue_game_data(self) -> bool:
+    def _enqueue_game_data(self) -> bool:
         if not self.__has_pending_game_data():
             return False
 
@@ -1247,7 +1457,7 @@ class Follower:
                 "on_play": self.seat_id == self.starting_team_id,
                 "opening_hand": self.opening_hand[self.seat_id],
                 "mulligans": self.drawn_hands[self.seat_id][:-1],
-                "drawn_hands": self.drawn_hands[self.seat_id],
+                "drawn_hands": self.drawn_hands[self.seat_id].copy(),
                 "drawn_cards": list(
                     self.drawn_cards_by_instance_id[self.seat_id].values()
                 ),
@@ -1273,10 +1483,13 @@ class Follower:
                 "opponent_seat_id": opponent_id,
                 "screen_name": self.screen_names[self.seat_id],
                 "opponent_screen_name": self.screen_names[opponent_id],
-                "events": self.game_history_events,
+                "events": self.game_history_events.freeze(),
             }
 
-            self.pending_game_submission = copy.deepcopy(game)
+            # The game's containers are handed over as-is; __clear_game_data gives the live
+            # state fresh ones. drawn_hands is copied since a mulligan can still append to it
+            # before then.
+            self.pending_game_submission = types.MappingProxyType(game)
             return True
 
         except Exception as e:
@@ -1805,7 +2018,20 @@ def processing_loop(args: argparse.Namespace, token: str) -> None:
 
     follow = not args.once
 
-    follower = Follower(token, host=args.host)
+    follower = Follower(
+        token,
+        host=args.host,
+        outbox_path=args.outbox_file,
+        http_options=http_session.HttpOptions(
+            pool_size=args.pool_size,
+            connect_timeout=args.connect_timeout,
+            read_timeout=args.read_timeout,
+            http2=args.http2,
+        ),
+        codec=payload_codec.get_codec(args.codec, args.compression_level),
+        history_compression=args.history_compression,
+        checkpoint_dir=args.checkpoint_dir or None,
+    )
 
     # if running in "normal" mode...
     if (
@@ -1833,6 +2059,8 @@ def processing_loop(args: argparse.Namespace, token: str) -> None:
             "Found no files to parse. Try to find Arena's Player.log file and pass it as an argument with -l"
         )
 
+    follower.close(timeout=SUBMISSION_DRAIN_TIMEOUT.total_seconds())
+
     logger.info("Exiting")
 
 
@@ -1849,13 +2077,64 @@ def main() -> None:
     parser.add_argument(
         "--host",
         default=api_client.DEFAULT_HOST,
-        help=f"Host to submit requests to. If not specified, will use {api_client.DEFAULT_HOST}",
+        help=f"Host to submit requests to. If not specified, will use {api_client.DEFAULT_HOST}. Use {http_session.MOCK_HOST} to answer requests locally without network access",
+    )
+    parser.add_argument(
+        "--pool_size",
+        type=int,
+        default=http_session.DEFAULT_POOL_SIZE,
+        help=f"Number of keep-alive connections to the host (default {http_session.DEFAULT_POOL_SIZE})",
+    )
+    parser.add_argument(
+        "--connect_timeout",
+        type=float,
+        default=http_session.DEFAULT_CONNECT_TIMEOUT,
+        help=f"Seconds to wait for a connection to the host (default {http_session.DEFAULT_CONNECT_TIMEOUT})",
+    )
+    parser.add_argument(
+        "--read_timeout",
+        type=float,
+        default=http_session.DEFAULT_READ_TIMEOUT,
+        help=f"Seconds to wait for the host to respond (default {http_session.DEFAULT_READ_TIMEOUT})",
+    )
+    parser.add_argument(
+        "--http2",
+        action="store_true",
+        help="Submit over HTTP/2 (requires httpx[http2]; falls back to HTTP/1.1 otherwise)",
     )
     parser.add_argument(
         "--token",
         default=config_token,
         help=f"Token of the user. If not specified, will use the token at {CONFIG_FILE}",
     )
+    parser.add_argument(
+        "--codec",
+        choices=("gzip", "zstd"),
+        default=payload_codec.DEFAULT_CODEC,
+        help=f"Compression for game and error submissions (default {payload_codec.DEFAULT_CODEC}). zstd needs Python 3.14+ or the zstandard package",
+    )
+    parser.add_argument(
+        "--compression_level",
+        type=int,
+        help="Compression level for --codec (default is the codec's own default)",
+    )
+    parser.add_argument(
+        "--history_compression",
+        choices=game_history.COMPRESSION_MODES,
+        default=game_history.DEFAULT_COMPRESSION,
+        help="How game history is held in memory until the game is submitted: plain JSON text, "
+             "compressed per event, or as one compressed stream (the default)",
+    )
+    parser.add_argument(
+        "--checkpoint_dir",
+        default=checkpoint.DEFAULT_CHECKPOINT_DIR,
+        help=f"Directory for periodic checkpoints of progress through each log file, so a restart resumes where it left off (default {checkpoint.DEFAULT_CHECKPOINT_DIR}). Pass an empty string to always reparse from the start",
+    )
+    parser.add_argument(
+        "--outbox_file",
+        default=outbox.DEFAULT_OUTBOX_PATH,
+        help=f"SQLite file holding pending submissions so they survive restarts (default {outbox.DEFAULT_OUTBOX_PATH}). Pass an empty string to keep them in memory only",
+    )
     parser.add_argument(
         "--once",
         action="store_true",
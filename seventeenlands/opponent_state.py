@@ -0,0 +1,123 @@
+import json
+import secrets
+import time
+from typing import Any, Callable, NamedTuple, Optional
+
+FORMAT_VERSION = 1
+LOG_MARKER = "::OpponentState::"
+DEFAULT_SNAPSHOT_INTERVAL = 50
+
+
+class ActionDiff(NamedTuple):
+    """How the tracked opponent actions changed in one message."""
+
+    upserted: list[dict[str, Any]]
+    removed: list[tuple[Any, Any]]
+
+
+class OpponentStateLog:
+    """
+    Turns changes in what is known about the opponent into sequenced records.
+
+    Most records are deltas holding only what changed: card instances added or changed,
+    actions upserted or removed, and annotations appended. Every snapshot_interval records,
+    and whenever consumers could not follow along with deltas (a new game, a restored
+    checkpoint), a full snapshot is emitted instead, so a reader that missed records can
+    resync at the next one.
+
+    Record fields:
+        v:                   FORMAT_VERSION.
+        seq:                 Sequence number; a delta applies only on top of seq - 1.
+        type:                "snapshot" or "delta".
+        cards:               [instanceId, grpId] pairs; all of them in a snapshot.
+        actions:             Actions, each keyed by (instanceId, actionType); all of them in a
+                             snapshot.
+        actions_removed:     [instanceId, actionType] keys of removed actions (deltas only).
+        annotations:         Annotations; appended to the previous ones in a delta.
+
+    When written to the log, records are also stamped by stamp_trace:
+        trace:               Random id following this update through to the UI.
+        ts:                  Unix time the record was written.
+        match_id:            The current match (snapshots only).
+    """
+
+    def __init__(self, snapshot_interval: int = DEFAULT_SNAPSHOT_INTERVAL) -> None:
+        self.seq = 0
+        self.snapshot_interval = snapshot_interval
+        # None means the next record must be a snapshot
+        self._deltas_since_snapshot: Optional[int] = None
+        self._annotations_sent = 0
+
+    def reset(self) -> None:
+        """Make the next record a snapshot."""
+        self._deltas_since_snapshot = None
+
+    def record(
+            self,
+            cards: dict[int, int],
+            changed_cards: dict[int, int],
+            actions: Callable[[], list[dict[str, Any]]],
+            action_diff: Optional[ActionDiff],
+            annotations: list[dict[str, Any]],
+    ) -> Optional[dict[str, Any]]:
+        """
+        Build the record for one message's changes.
+
+        :param cards:         All known opponent cards, by instance id.
+        :param changed_cards: The cards added or changed by this message.
+        :param actions:       Returns all tracked opponent actions; only called for a snapshot.
+        :param action_diff:   How the actions changed, or None if they did not.
+        :param annotations:   All recorded annotations.
+
+        :returns: The record, or None if nothing changed.
+        """
+        if len(annotations) < self._annotations_sent:
+            self.reset()
+        new_annotations = annotations[self._annotations_sent:]
+        if not changed_cards and action_diff is None and not new_annotations:
+            return None
+
+        self.seq += 1
+        self._annotations_sent = len(annotations)
+        if (
+                self._deltas_since_snapshot is None
+                or self._deltas_since_snapshot >= self.snapshot_interval
+        ):
+            self._deltas_since_snapshot = 0
+            return {
+                "v": FORMAT_VERSION,
+                "seq": self.seq,
+                "type": "snapshot",
+                "cards": [[instance_id, card_id] for instance_id, card_id in cards.items()],
+                "actions": actions(),
+                "annotations": annotations,
+            }
+
+        self._deltas_since_snapshot += 1
+        delta: dict[str, Any] = {"v": FORMAT_VERSION, "seq": self.seq, "type": "delta"}
+        if changed_cards:
+            delta["cards"] = [
+                [instance_id, card_id] for instance_id, card_id in changed_cards.items()
+            ]
+        if action_diff is not None:
+            if action_diff.upserted:
+                delta["actions"] = action_diff.upserted
+            if action_diff.removed:
+                delta["actions_removed"] = [list(key) for key in action_diff.removed]
+        if new_annotations:
+            delta["annotations"] = new_annotations
+        return delta
+
+
+def stamp_trace(record: dict[str, Any], match_id: Optional[str] = None) -> dict[str, Any]:
+    """Add a trace id and write time to a record about to be logged."""
+    record["trace"] = secrets.token_hex(8)
+    record["ts"] = round(time.time(), 6)
+    if record["type"] == "snapshot" and match_id is not None:
+        record["match_id"] = match_id
+    return record
+
+
+def format_record(record: dict[str, Any]) -> str:
+    """Serialize a record for the log, without any insignificant whitespace."""
+    return f"{LOG_MARKER} {json.dumps(record, separators=(',', ':'))}"
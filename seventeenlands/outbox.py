@@ -0,0 +1,204 @@
+import datetime
+import os
+import sqlite3
+import time
+import zlib
+from typing import Any, Callable, Optional
+
+import logging_utils
+from payload_codec import Payload
+from submission_queue import DEFAULT_MAX_PENDING_PER_ENDPOINT, Submission
+
+logger = logging_utils.get_logger("outbox")
+
+DEFAULT_OUTBOX_PATH = os.path.join(os.path.expanduser("~"), ".seventeenlands", "outbox.db")
+DEFAULT_MAX_RECORDS = 20000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_AGE = datetime.timedelta(days=7)
+
+# A NULL content_encoding means the body is plain JSON, which is stored zlib-compressed.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions
+(
+    id               INTEGER PRIMARY KEY AUTOINCREMENT,
+    host             TEXT    NOT NULL,
+    endpoint         TEXT    NOT NULL,
+    content_encoding TEXT,
+    body             BLOB    NOT NULL,
+    size             INTEGER NOT NULL,
+    created_at       REAL    NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS submissions_host_endpoint ON submissions (host, endpoint, id);
+"""
+
+
+def _stored_body(payload: Payload) -> bytes:
+    if payload.content_encoding is None:
+        return zlib.compress(payload.body)
+    return payload.body
+
+
+class Outbox:
+    """
+    Durable submission store backed by a SQLite queue table.
+
+    Each record holds the encoded request body, built once when the submission is queued, and
+    is deleted once acked. Records that were never acked (the process stopped, or the request
+    kept failing) are replayed oldest first the next time an outbox is opened for the same
+    host. Only the record being sent is ever loaded, so a long backfill streams through the
+    table rather than through memory.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            host: str,
+            encode: Callable[[Any, bool], Payload],
+            endpoint_limits: Optional[dict[str, int]] = None,
+            coalesced_endpoints: frozenset[str] = frozenset(),
+            max_records: int = DEFAULT_MAX_RECORDS,
+            max_bytes: int = DEFAULT_MAX_BYTES,
+            max_age: datetime.timedelta = DEFAULT_MAX_AGE,
+    ) -> None:
+        """
+        :param path:                The SQLite file to keep records in.
+        :param host:                The API host; records queued for other hosts are left alone.
+        :param encode:              Builds the request body for a (blob, compress) submission.
+        :param endpoint_limits:     Per-endpoint maximum pending records, overriding
+                                    DEFAULT_MAX_PENDING_PER_ENDPOINT.
+        :param coalesced_endpoints: Endpoints whose pending record is replaced by newer ones.
+        :param max_records:         Maximum number of records kept; the oldest are dropped.
+        :param max_bytes:           Maximum compressed size of all records; the oldest are dropped.
+        :param max_age:             Records older than this are dropped instead of sent.
+        """
+        self.path = path
+        self.host = host
+        self._encode = encode
+        self._endpoint_limits = endpoint_limits or {}
+        self._coalesced_endpoints = coalesced_endpoints
+        self._max_records = max_records
+        self._max_bytes = max_bytes
+        self._max_age = max_age
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+        # Records with an id at or below the cursor have been handed to the worker.
+        self._cursor_id = 0
+        self._total_records = 0
+        self._total_bytes = 0
+        self._pending = 0
+
+        with self._conn:
+            self._delete(
+                "host = ? AND created_at < ?",
+                (self.host, time.time() - self._max_age.total_seconds()),
+            )
+            self._total_records, self._total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM submissions WHERE host = ?",
+                (self.host,),
+            ).fetchone()
+        self._pending = self._total_records
+
+        if self._pending:
+            logger.info(f"Replaying {self._pending} pending submissions from {path}")
+
+    def prepare(self, endpoint: str, blob: Any, compress: bool) -> Submission:
+        # Carries the body as stored, which pop() turns back into the payload to send
+        payload = self._encode(blob, compress)
+        return Submission(endpoint, payload=Payload(_stored_body(payload), payload.content_encoding))
+
+    def push(self, submission: Submission) -> None:
+        endpoint, payload = submission.endpoint, submission.payload
+        body = payload.body
+
+        with self._conn:
+            if endpoint in self._coalesced_endpoints:
+                self._delete(
+                    "host = ? AND endpoint = ? AND id > ?",
+                    (self.host, endpoint, self._cursor_id),
+                )
+            else:
+                limit = self._endpoint_limits.get(
+                    endpoint, DEFAULT_MAX_PENDING_PER_ENDPOINT
+                )
+                (pending_for_endpoint,) = self._conn.execute(
+                    "SELECT COUNT(*) FROM submissions WHERE host = ? AND endpoint = ? AND id > ?",
+                    (self.host, endpoint, self._cursor_id),
+                ).fetchone()
+                if pending_for_endpoint >= limit:
+                    logger.warning(f"Outbox full; dropping oldest {endpoint} submission")
+                    self._delete(
+                        "id = (SELECT MIN(id) FROM submissions WHERE host = ? AND endpoint = ? AND id > ?)",
+                        (self.host, endpoint, self._cursor_id),
+                    )
+
+            self._conn.execute(
+                "INSERT INTO submissions (host, endpoint, content_encoding, body, size, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (self.host, endpoint, payload.content_encoding, body, len(body), time.time()),
+            )
+            self._total_records += 1
+            self._total_bytes += len(body)
+            self._pending += 1
+
+            while self._total_records > 1 and (
+                    self._total_records > self._max_records
+                    or self._total_bytes > self._max_bytes
+            ):
+                logger.warning("Outbox over its size limit; dropping oldest submission")
+                self._delete(
+                    "id = (SELECT MIN(id) FROM submissions WHERE host = ?)", (self.host,)
+                )
+
+    def pop(self) -> Optional[Submission]:
+        expire_before = time.time() - self._max_age.total_seconds()
+        while True:
+            row = self._conn.execute(
+                "SELECT id, endpoint, content_encoding, body, created_at FROM submissions WHERE host = ? AND id > ? ORDER BY id LIMIT 1",
+                (self.host, self._cursor_id),
+            ).fetchone()
+            if row is None:
+                return None
+
+            record_id, endpoint, content_encoding, body, created_at = row
+            self._cursor_id = record_id
+            self._pending -= 1
+
+            if created_at < expire_before:
+                logger.warning(f"Dropping expired {endpoint} submission from outbox")
+                with self._conn:
+                    self._delete("id = ?", (record_id,))
+                continue
+
+            if content_encoding is None:
+                body = zlib.decompress(body)
+            return Submission(
+                endpoint, payload=Payload(body, content_encoding), record_id=record_id
+            )
+
+    def ack(self, submission: Submission) -> None:
+        with self._conn:
+            self._delete("id = ?", (submission.record_id,))
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __len__(self) -> int:
+        return self._pending
+
+    def _delete(self, where: str, params: tuple[Any, ...]) -> None:
+        rows = self._conn.execute(
+            f"DELETE FROM submissions WHERE {where} RETURNING id, size", params
+        ).fetchall()
+        for record_id, size in rows:
+            self._total_records -= 1
+            self._total_bytes -= size
+            if record_id > self._cursor_id:
+                self._pending -= 1
+
@@ -0,0 +1,158 @@
+import json
+import zlib
+from typing import Any, Iterator, NamedTuple, Optional, Protocol
+
+DEFAULT_CODEC = "gzip"
+DEFAULT_GZIP_LEVEL = 6
+DEFAULT_ZSTD_LEVEL = 3
+
+# Containers nested deeper than this are handed to the C encoder in one piece.
+_STREAM_DEPTH = 3
+# Text is buffered up to this many characters before being fed to the compressor.
+_CHUNK_SIZE = 64 * 1024
+
+_ENCODER = json.JSONEncoder()
+
+
+class Payload(NamedTuple):
+    body: bytes
+    content_encoding: Optional[str] = None
+
+    @property
+    def headers(self) -> dict[str, str]:
+        headers = {"content-type": "application/json"}
+        if self.content_encoding is not None:
+            headers["content-encoding"] = self.content_encoding
+        return headers
+
+
+class Compressor(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+
+class Codec(Protocol):
+    name: str
+
+    def compressor(self) -> Compressor: ...
+
+
+class GzipCodec:
+    name = "gzip"
+
+    def __init__(self, level: int = DEFAULT_GZIP_LEVEL) -> None:
+        self.level = level
+
+    def compressor(self) -> Compressor:
+        # wbits=31 selects the gzip container rather than raw zlib
+        return zlib.compressobj(self.level, zlib.DEFLATED, 31)
+
+
+class ZstdCodec:
+    name = "zstd"
+
+    def __init__(self, level: int = DEFAULT_ZSTD_LEVEL) -> None:
+        self.level = level
+        try:
+            from compression import zstd
+
+            self._new_compressor = lambda: zstd.ZstdCompressor(level=self.level)
+        except ImportError:
+            import zstandard
+
+            self._new_compressor = lambda: zstandard.ZstdCompressor(
+                level=self.level
+            ).compressobj()
+
+    def compressor(self) -> Compressor:
+        return self._new_compressor()
+
+
+def get_codec(name: str, level: Optional[int] = None) -> Codec:
+    """
+    Look up a compression codec by name.
+
+    :param name:  "gzip" or "zstd".
+    :param level: Compression level, or None for the codec's default.
+
+    :returns: The codec.
+    :raises ValueError: If the codec is unknown or its library is not installed.
+    """
+    if name == "gzip":
+        return GzipCodec(DEFAULT_GZIP_LEVEL if level is None else level)
+    if name == "zstd":
+        try:
+            return ZstdCodec(DEFAULT_ZSTD_LEVEL if level is None else level)
+        except ImportError:
+            raise ValueError("zstd needs Python 3.14+ or the zstandard package")
+    raise ValueError(f"Unknown codec: {name}")
+
+
+def iter_json_chunks(obj: Any, depth: int = 0) -> Iterator[str]:
+    """
+    Serialize a value to JSON text piece by piece.
+
+    The output matches json.dumps. The top few levels of dicts and lists are walked in Python
+    so that no single string holds the whole document; everything below is encoded in one call
+    to the C encoder. Objects with an iter_json_chunks() method supply their own text.
+
+    :param obj:   The value to serialize.
+    :param depth: How deep obj is nested in the value being serialized.
+
+    :returns: An iterator over pieces of the JSON text.
+    """
+    if hasattr(obj, "iter_json_chunks"):
+        yield from obj.iter_json_chunks()
+    elif depth >= _STREAM_DEPTH or not isinstance(obj, (dict, list, tuple)):
+        yield _ENCODER.encode(obj)
+    elif isinstance(obj, dict):
+        yield "{"
+        for i, (key, value) in enumerate(obj.items()):
+            if i:
+                yield ", "
+            if isinstance(key, str):
+                yield _ENCODER.encode(key)
+                yield ": "
+                yield from iter_json_chunks(value, depth + 1)
+            else:
+                # Let the encoder apply its key coercion rules
+                yield _ENCODER.encode({key: value})[1:-1]
+        yield "}"
+    else:
+        yield "["
+        for i, value in enumerate(obj):
+            if i:
+                yield ", "
+            yield from iter_json_chunks(value, depth + 1)
+        yield "]"
+
+
+def encode_payload(blob: Any, codec: Optional[Codec] = None) -> Payload:
+    """
+    Serialize and optionally compress a blob into a request body.
+
+    The JSON text is streamed into the compressor, so a large blob is never held as one string.
+
+    :param blob:  The JSON-serializable value to send.
+    :param codec: The compression codec, or None to send plain JSON.
+
+    :returns: The encoded body with its content encoding.
+    """
+    if codec is None:
+        return Payload("".join(iter_json_chunks(blob)).encode("utf8"))
+
+    compressor = codec.compressor()
+    parts = []
+    buffer: list[str] = []
+    buffered = 0
+    for chunk in iter_json_chunks(blob):
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= _CHUNK_SIZE:
+            parts.append(compressor.compress("".join(buffer).encode("utf8")))
+            buffer.clear()
+            buffered = 0
+    parts.append(compressor.compress("".join(buffer).encode("utf8")))
+    parts.append(compressor.flush())
+    return Payload(b"".join(parts), codec.name)
@@ -0,0 +1,292 @@
+"""
+Replay archived MTGA logs offline, in parallel, into a SQLite database.
+
+Each log file is parsed by its own Follower in a worker process. Nothing is sent to 17lands;
+completed games and opponent updates are written to a per-file database, and the parts are
+merged into the output as they finish. Replaying a file again replaces its earlier rows, so
+the dataset can be re-derived after a parser fix.
+
+    python seventeenlands/replay.py ~/mtga-logs --output replay.db --jobs 8
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import pathlib
+import sqlite3
+import tempfile
+import time
+import zlib
+from typing import Any, Optional
+
+import http_session
+import logging_utils
+import mtga_follower
+import payload_codec
+
+logger = logging_utils.get_logger("replay")
+
+DEFAULT_PATTERN = "*.log"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS replayed_files
+(
+    source           TEXT PRIMARY KEY,
+    size             INTEGER NOT NULL,
+    mtime            REAL    NOT NULL,
+    games            INTEGER NOT NULL,
+    opponent_updates INTEGER NOT NULL,
+    seconds          REAL    NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS games
+(
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    source      TEXT NOT NULL,
+    match_id    TEXT,
+    game_number INTEGER,
+    event_name  TEXT,
+    won         INTEGER,
+    log_time    TEXT,
+    game        TEXT NOT NULL,
+    history     BLOB
+);
+
+CREATE INDEX IF NOT EXISTS games_source ON games (source);
+CREATE INDEX IF NOT EXISTS games_match_id ON games (match_id, game_number);
+
+CREATE TABLE IF NOT EXISTS opponent_records
+(
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    source      TEXT    NOT NULL,
+    seq         INTEGER NOT NULL,
+    match_id    TEXT,
+    log_time    TEXT,
+    record_type TEXT    NOT NULL,
+    record      TEXT    NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS opponent_records_source ON opponent_records (source, id);
+"""
+
+_TABLE_COLUMNS = {
+    "games": "source, match_id, game_number, event_name, won, log_time, game, history",
+    "opponent_records": "source, seq, match_id, log_time, record_type, record",
+}
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+class ReplayRecorder:
+    """
+    Stands in for ApiClient during a replay, writing completed games to a database.
+
+    Every other submission is dropped.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, source: str) -> None:
+        self._conn = conn
+        self.source = source
+        self.games = 0
+
+    def submit_game_result(self, blob: dict[str, Any]) -> None:
+        game = dict(blob)
+        history = game.pop("history", None) or {}
+        events = history.get("events")
+        game["history"] = {k: v for k, v in history.items() if k != "events"}
+
+        compressed_history = None
+        if events is not None:
+            compressed_history = zlib.compress(
+                "".join(payload_codec.iter_json_chunks(events)).encode("utf8")
+            )
+        self._conn.execute(
+            f"INSERT INTO games ({_TABLE_COLUMNS['games']}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                self.source,
+                game.get("match_id"),
+                game.get("game_number"),
+                game.get("event_name"),
+                game.get("won"),
+                game.get("time"),
+                json.dumps(game),
+                compressed_history,
+            ),
+        )
+        self.games += 1
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        return True
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("submit_"):
+            return lambda blob: None
+        raise AttributeError(name)
+
+
+class ReplayFollower(mtga_follower.Follower):
+    """Follower that records opponent state records to the replay database instead of logging them."""
+
+    def __init__(self, conn: sqlite3.Connection, source: str, token: str) -> None:
+        self._conn = conn
+        self.source = source
+        self.recorder = ReplayRecorder(conn, source)
+        self.opponent_updates = 0
+        super().__init__(token, host=http_session.MOCK_HOST, client=self.recorder)
+
+    def _log_opponent_update(self, record: dict[str, Any]) -> None:
+        self._conn.execute(
+            f"INSERT INTO opponent_records ({_TABLE_COLUMNS['opponent_records']}) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                self.source,
+                record["seq"],
+                self.current_match_id,
+                self.cur_log_time.isoformat(),
+                record["type"],
+                json.dumps(record, separators=(",", ":")),
+            ),
+        )
+        self.opponent_updates += 1
+
+
+def replay_file(source: str, part_path: str, token: str) -> dict[str, Any]:
+    """
+    Replay one log file into its own database. Runs in a worker process.
+
+    :param source:    The log file.
+    :param part_path: The SQLite file to write to.
+    :param token:     The token to stamp on the recorded games.
+
+    :returns: Counts and timings for the file.
+    """
+    start = time.perf_counter()
+    stat = os.stat(source)
+    conn = _connect(part_path)
+    try:
+        with conn:
+            follower = ReplayFollower(conn, source, token)
+            follower.parse_log(source, follow=False)
+            stats = {
+                "source": source,
+                "size": stat.st_size,
+                "mtime": stat.st_mtime,
+                "games": follower.recorder.games,
+                "opponent_updates": follower.opponent_updates,
+                "seconds": time.perf_counter() - start,
+            }
+            conn.execute(
+                "INSERT INTO replayed_files (source, size, mtime, games, opponent_updates, seconds) VALUES (:source, :size, :mtime, :games, :opponent_updates, :seconds)",
+                stats,
+            )
+    finally:
+        conn.close()
+        # Pool workers exit without running atexit hooks, so write out this file's log lines now
+        logging_utils.flush()
+    return stats
+
+
+def merge_part(conn: sqlite3.Connection, part_path: str) -> None:
+    """Move a worker's rows into the output database, replacing earlier rows for its files."""
+    conn.execute("ATTACH DATABASE ? AS part", (part_path,))
+    try:
+        with conn:
+            for table in ("replayed_files", *_TABLE_COLUMNS):
+                conn.execute(
+                    f"DELETE FROM main.{table} WHERE source IN (SELECT source FROM part.replayed_files)"
+                )
+            conn.execute("INSERT INTO main.replayed_files SELECT * FROM part.replayed_files")
+            for table, columns in _TABLE_COLUMNS.items():
+                conn.execute(
+                    f"INSERT INTO main.{table} ({columns}) SELECT {columns} FROM part.{table} ORDER BY id"
+                )
+    finally:
+        conn.execute("DETACH DATABASE part")
+
+
+def replay_directory(
+        log_dir: str,
+        output: str,
+        jobs: Optional[int] = None,
+        pattern: str = DEFAULT_PATTERN,
+        token: str = "replay",
+) -> list[dict[str, Any]]:
+    """
+    Replay every matching log file under a directory into one database.
+
+    :param log_dir: The directory to search, recursively.
+    :param output:  The SQLite file to write to; created if missing.
+    :param jobs:    Number of worker processes (default is one per CPU).
+    :param pattern: Glob pattern selecting the log files.
+    :param token:   The token to stamp on the recorded games.
+
+    :returns: Per-file counts and timings, in completion order.
+    """
+    # Largest files first, so one big archive doesn't start last and hold up the pool
+    sources = sorted(
+        (path for path in pathlib.Path(log_dir).rglob(pattern) if path.is_file()),
+        key=lambda path: path.stat().st_size,
+        reverse=True,
+    )
+    logger.info(f"Replaying {len(sources)} log files from {log_dir} into {output}")
+
+    results = []
+    conn = _connect(output)
+    start = time.perf_counter()
+    try:
+        with tempfile.TemporaryDirectory(prefix="replay-", dir=os.path.dirname(os.path.abspath(output))) as part_dir:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+                futures = {
+                    executor.submit(
+                        replay_file, str(source), os.path.join(part_dir, f"{i}.db"), token
+                    ): os.path.join(part_dir, f"{i}.db")
+                    for i, source in enumerate(sources)
+                }
+                for future in concurrent.futures.as_completed(futures):
+                    try:
+                        stats = future.result()
+                    except Exception:
+                        logger.exception("Replay worker failed")
+                        continue
+                    merge_part(conn, futures[future])
+                    results.append(stats)
+                    logger.info(
+                        f"Replayed {stats['source']}: {stats['games']} games, "
+                        f"{stats['opponent_updates']} opponent updates in {stats['seconds']:.1f}s"
+                    )
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - start
+    total_bytes = sum(stats["size"] for stats in results)
+    logger.info(
+        f"Replayed {len(results)} files ({total_bytes / 1e6:.1f} MB) in {elapsed:.1f}s "
+        f"({total_bytes / 1e6 / max(elapsed, 1e-9):.1f} MB/s)"
+    )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("log_dir", help="Directory holding archived Player.log files")
+    parser.add_argument("--output", default="replay.db", help="SQLite file to write (default replay.db)")
+    parser.add_argument("--jobs", type=int, help="Number of worker processes (default is one per CPU)")
+    parser.add_argument(
+        "--pattern",
+        default=DEFAULT_PATTERN,
+        help=f"Glob pattern selecting log files under log_dir (default {DEFAULT_PATTERN})",
+    )
+    parser.add_argument("--token", default="replay", help="Token to stamp on recorded games")
+    args = parser.parse_args()
+
+    replay_directory(args.log_dir, args.output, jobs=args.jobs, pattern=args.pattern, token=args.token)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ import time
 from typing import Callable, Optional, TypeVar
 
 import requests.exceptions
+import urllib3.exceptions
 
 import logging_utils
 
@@ -52,15 +53,50 @@ def retry_until_successful(
             next_retry_delay = max_retry_delay
 
 
+def is_connect_error(error: Exception) -> bool:
+    """
+    Whether a request failed before the server could have received it.
+
+    :param error: The error raised by the request.
+
+    :returns: True for connection failures and connect timeouts, False for errors
+              raised once the request was sent, such as read timeouts or dropped
+              connections while waiting for the response.
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError):
+        # requests wraps a ProtocolError when the connection drops mid-request
+        return not (error.args and isinstance(error.args[0], urllib3.exceptions.ProtocolError))
+    return False
+
+
 def retry_api_call(
     callback: Callable[[], T],
     response_validator: Callable[[T], bool],
+    idempotent: bool = True,
 ) -> T:
+    """
+    Call the API until the response validates, backing off between attempts.
+
+    :param callback:           Sends the request.
+    :param response_validator: Whether a response is final.
+    :param idempotent:         Whether sending the request twice is harmless. Requests that
+                               aren't, like submissions, are only retried after connect-phase
+                               errors, since the server may have accepted a request whose
+                               response timed out.
+
+    :returns: The first response that validates.
+    """
     def _should_retry_error(error: Exception) -> bool:
         logger.exception(f"Error: {error}")
+        if not idempotent:
+            return is_connect_error(error)
         error_class = type(error)
         if issubclass(error_class, requests.exceptions.ConnectionError):
             return True
+        if issubclass(error_class, requests.exceptions.Timeout):
+            return True
         return False
 
     return retry_until_successful(
@@ -0,0 +1,233 @@
+import collections
+import threading
+from typing import Any, Callable, Optional, Protocol
+
+import logging_utils
+from payload_codec import Payload
+
+logger = logging_utils.get_logger("submission_queue")
+
+DEFAULT_MAX_PENDING = 1000
+DEFAULT_MAX_PENDING_PER_ENDPOINT = 250
+
+
+class Submission:
+    """A pending request: either the raw blob, or its already encoded payload."""
+
+    __slots__ = ("endpoint", "blob", "compress", "payload", "record_id")
+
+    def __init__(
+            self,
+            endpoint: str,
+            blob: Any = None,
+            compress: bool = False,
+            payload: Optional[Payload] = None,
+            record_id: Optional[int] = None,
+    ) -> None:
+        self.endpoint = endpoint
+        self.blob = blob
+        self.compress = compress
+        self.payload = payload
+        self.record_id = record_id
+
+
+class SubmissionStore(Protocol):
+    """Where a SubmissionQueue keeps submissions until the worker has sent them."""
+
+    def prepare(self, endpoint: str, blob: Any, compress: bool) -> Submission:
+        """Build the submission to push; runs before the queue takes its lock, so encode here."""
+
+    def push(self, submission: Submission) -> None: ...
+
+    def pop(self) -> Optional[Submission]: ...
+
+    def ack(self, submission: Submission) -> None: ...
+
+    def close(self) -> None: ...
+
+    def __len__(self) -> int: ...
+
+
+class MemoryStore:
+    """
+    Bounded in-memory submission store.
+
+    When the store (or a single endpoint's share of it) is full, the oldest pending submission
+    is dropped. Endpoints that only care about the latest state can be coalesced, so a burst
+    of updates collapses into one request.
+    """
+
+    def __init__(
+            self,
+            max_pending: int = DEFAULT_MAX_PENDING,
+            endpoint_limits: Optional[dict[str, int]] = None,
+            coalesced_endpoints: frozenset[str] = frozenset(),
+    ) -> None:
+        """
+        :param max_pending:         Maximum number of queued submissions across all endpoints.
+        :param endpoint_limits:     Per-endpoint maximum queued submissions, overriding
+                                    DEFAULT_MAX_PENDING_PER_ENDPOINT.
+        :param coalesced_endpoints: Endpoints whose pending submission is replaced by newer ones.
+        """
+        self._max_pending = max_pending
+        self._endpoint_limits = endpoint_limits or {}
+        self._coalesced_endpoints = coalesced_endpoints
+
+        self._pending: collections.deque[Submission] = collections.deque()
+        self._pending_by_endpoint: collections.Counter[str] = collections.Counter()
+        self._latest_by_endpoint: dict[str, Submission] = {}
+
+    def prepare(self, endpoint: str, blob: Any, compress: bool) -> Submission:
+        # Encoded by the worker when sent, so a coalesced blob is only ever encoded once
+        return Submission(endpoint, blob, compress)
+
+    def push(self, submission: Submission) -> None:
+        endpoint = submission.endpoint
+        if endpoint in self._coalesced_endpoints:
+            pending = self._latest_by_endpoint.get(endpoint)
+            if pending is not None:
+                pending.blob = submission.blob
+                pending.compress = submission.compress
+                return
+
+        limit = self._endpoint_limits.get(endpoint, DEFAULT_MAX_PENDING_PER_ENDPOINT)
+        if self._pending_by_endpoint[endpoint] >= limit:
+            self._drop_oldest(endpoint)
+        elif len(self._pending) >= self._max_pending:
+            self._drop_oldest(None)
+
+        self._pending.append(submission)
+        self._pending_by_endpoint[endpoint] += 1
+        if endpoint in self._coalesced_endpoints:
+            self._latest_by_endpoint[endpoint] = submission
+
+    def pop(self) -> Optional[Submission]:
+        if not self._pending:
+            return None
+        submission = self._pending.popleft()
+        self._forget(submission)
+        return submission
+
+    def ack(self, submission: Submission) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def _drop_oldest(self, endpoint: Optional[str]) -> None:
+        for submission in self._pending:
+            if endpoint is None or submission.endpoint == endpoint:
+                break
+        else:
+            return
+
+        self._pending.remove(submission)
+        self._forget(submission)
+        logger.warning(
+            f"Submission queue full; dropped oldest {submission.endpoint} submission"
+        )
+
+    def _forget(self, submission: Submission) -> None:
+        self._pending_by_endpoint[submission.endpoint] -= 1
+        if self._latest_by_endpoint.get(submission.endpoint) is submission:
+            del self._latest_by_endpoint[submission.endpoint]
+
+
+class SubmissionQueue:
+    """
+    Queue of API submissions drained by a background worker thread.
+
+    Producers never wait on the network; the store decides what happens when too much is
+    pending. A submission is acked once it has been sent, so a durable store only forgets it
+    after the request went through.
+    """
+
+    def __init__(
+            self,
+            send: Callable[[Submission], Any],
+            store: Optional[SubmissionStore] = None,
+    ) -> None:
+        """
+        :param send:  Callback performing the request for a submission.
+        :param store: Where pending submissions are kept. Defaults to a MemoryStore.
+        """
+        self._send = send
+        self._store = store if store is not None else MemoryStore()
+        self._in_flight = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+        self._worker = threading.Thread(
+            target=self._run, name="submission-queue", daemon=True
+        )
+        self._worker.start()
+
+    def put(self, endpoint: str, blob: Any, compress: bool = False) -> None:
+        """Queue a submission without waiting for it to be sent."""
+        # Encoding can take a while for a large blob; the worker shouldn't wait on it
+        submission = self._store.prepare(endpoint, blob, compress)
+        with self._condition:
+            if self._closed:
+                logger.warning(f"Submission queue closed; dropping {endpoint} submission")
+                return
+
+            self._store.push(submission)
+            self._condition.notify_all()
+
+    def pending_count(self) -> int:
+        with self._condition:
+            return len(self._store)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for every queued submission to be sent.
+
+        :param timeout: Maximum number of seconds to wait, or None to wait indefinitely.
+
+        :returns: Whether or not the queue was fully drained.
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not len(self._store) and self._in_flight == 0, timeout
+            )
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Drain the queue (up to the timeout) and stop the worker."""
+        drained = self.join(timeout)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            if not drained:
+                logger.warning(
+                    f"Stopped with {len(self._store)} submissions still pending"
+                )
+            self._store.close()
+        return drained
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: len(self._store) or self._closed)
+                if self._closed:
+                    return
+                submission = self._store.pop()
+                if submission is None:
+                    continue
+                self._in_flight += 1
+
+            sent = False
+            try:
+                self._send(submission)
+                sent = True
+            except Exception as e:
+                logger.exception(f"Error submitting to {submission.endpoint}: {e}")
+            finally:
+                with self._condition:
+                    # Once closed, unacked submissions are left for the store to replay
+                    if sent and not self._closed:
+                        self._store.ack(submission)
+                    self._in_flight -= 1
+                    self._condition.notify_all()